@@ -0,0 +1,213 @@
+"""ASGI entry point for the CV Parser service.
+
+Serves the same API as main.cv_optimizer on an asyncio event loop: Gemini
+calls, Firestore cache reads and writes and URL downloads are awaited rather
+than holding a worker thread each, so one instance can keep many LLM calls in
+flight. Text extraction and GCS access, which have no asyncio API, run in a
+worker thread. Run with:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+"""
+
+import asyncio
+import logging
+import uuid
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.datastructures import UploadFile
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import main
+from models.schemas import SCHEMA_REGISTRY
+from utils import circuit_breaker
+from utils.document_processor import DocumentProcessor
+from utils.text_extraction import PDF_BACKENDS
+from utils.upload_spool import spool_upload
+from utils.security import SECURITY_HEADERS, check_rate_limit, check_request_headers, cors_headers
+
+logger = logging.getLogger(__name__)
+
+
+def add_security_headers(response: Response) -> Response:
+    """Add the standard security headers to a Starlette response."""
+    response.headers.update(SECURITY_HEADERS)
+    return response
+
+
+async def cv_optimizer(request: Request) -> Response:
+    """ASGI handler for CV optimization, equivalent to main.cv_optimizer.
+
+    Args:
+        request: Starlette Request object
+
+    Returns:
+        Response: Processed response with appropriate headers
+    """
+    # Handle CORS preflight
+    if request.method == 'OPTIONS':
+        return Response(headers=cors_headers(request.headers.get('Origin')))
+
+    if not check_rate_limit(request.headers.get('X-Forwarded-For', 'unknown')):
+        return JSONResponse({'error': 'Rate limit exceeded. Please try again later.'}, 429)
+
+    request_id = request.headers.get('X-Request-ID', str(uuid.uuid4()))
+    logger.info(f"Processing request {request_id}", extra={'request_id': request_id})
+
+    try:
+        header_error = check_request_headers(request.method, request.headers)
+        if header_error:
+            return add_security_headers(JSONResponse(*header_error))
+
+        # JWT validation may fetch the signing secret from Secret Manager
+        auth_error = await asyncio.to_thread(main.check_authentication, request.headers)
+        if auth_error:
+            return add_security_headers(JSONResponse({"error": auth_error}, 401))
+
+        if request.method == 'GET':
+            if request.url.path == '/health':
+                return add_security_headers(JSONResponse(main.health_status(), 200))
+            return add_security_headers(JSONResponse({"error": "Method not allowed"}, 405))
+
+        if request.method == 'POST':
+            return await process_post_request(request, request_id)
+
+        return add_security_headers(JSONResponse({"error": "Method not allowed"}, 405))
+
+    except Exception as e:
+        logger.error(f"Error processing request {request_id}: {str(e)}", exc_info=True)
+        return add_security_headers(JSONResponse(
+            {"error": "Internal server error", "request_id": request_id},
+            500
+        ))
+
+
+async def process_tasks(
+    processor: DocumentProcessor,
+    tasks: List[str],
+    cv_text: str,
+    jd_text: Optional[str],
+    request_id: str
+) -> Dict[str, Dict[str, Any]]:
+    """Run several tasks concurrently on the event loop (see main.process_tasks).
+
+    Args:
+        processor: DocumentProcessor used for every task
+        tasks: Task identifiers to run
+        cv_text: Extracted CV text
+        jd_text: Optional extracted JD text
+        request_id: Unique request identifier, used for logging
+
+    Returns:
+        Dict mapping each task to {"status": "success", "result": ...}
+        or {"status": "error", "error": ...}
+    """
+    async def run_task(task: str) -> Dict[str, Any]:
+        try:
+            bundle = await asyncio.to_thread(main.get_task_bundle, task)
+            return {"status": "success", "result": await processor.process_text_async(cv_text, jd_text, bundle=bundle)}
+        except Exception as e:
+            logger.error(f"Task '{task}' failed for request {request_id}: {str(e)}", exc_info=True)
+            return {"status": "error", "error": main.task_error_message(e)}
+
+    return dict(zip(tasks, await asyncio.gather(*(run_task(task) for task in tasks))))
+
+
+async def process_post_request(request: Request, request_id: str) -> Response:
+    """Process a POST request for CV optimization (see main.process_post_request).
+
+    Args:
+        request: Starlette Request object
+        request_id: Unique request identifier
+
+    Returns:
+        Response: Processed response with results
+    """
+    try:
+        form = await request.form()
+        cv_file = form.get('cv_file')
+        if not isinstance(cv_file, UploadFile):
+            return JSONResponse({"error": "No CV file provided"}, 400)
+
+        tasks = main.parse_task_values(form.getlist('tasks'))
+        if tasks is not None:
+            if not tasks or any(task not in SCHEMA_REGISTRY for task in tasks):
+                return JSONResponse({"error": "Invalid task specified"}, 400)
+            bundle = None
+        else:
+            task = form.get('task')
+            if not task or task not in SCHEMA_REGISTRY:
+                return JSONResponse({"error": "Invalid task specified"}, 400)
+            bundle = await asyncio.to_thread(main.get_task_bundle, task)
+
+        stream = main.stream_requested(str(form.get('stream', '')), request.headers.get('Accept', ''))
+        if stream and tasks is not None:
+            return JSONResponse({"error": "Streaming is only supported for single-task requests"}, 400)
+
+        pdf_backend = form.get('pdf_backend') or None
+        if pdf_backend and pdf_backend not in PDF_BACKENDS:
+            return JSONResponse({"error": "Invalid PDF backend specified"}, 400)
+
+        # Fail fast while Vertex AI is known to be down
+        if circuit_breaker.is_open(circuit_breaker.VERTEX):
+            return add_security_headers(JSONResponse(
+                {"error": "Vertex AI is temporarily unavailable", "request_id": request_id},
+                503,
+                headers={'Retry-After': str(circuit_breaker.retry_after_seconds(circuit_breaker.VERTEX))}
+            ))
+
+        # Spool the uploads once; their buffers are passed on without copies
+        with ExitStack() as uploads:
+            cv_content = uploads.enter_context(await asyncio.to_thread(spool_upload, cv_file.file)).view
+            jd_file = form.get('jd_file')
+            jd_content = None
+            if isinstance(jd_file, UploadFile):
+                jd_content = uploads.enter_context(await asyncio.to_thread(spool_upload, jd_file.file)).view
+
+            if not main.storage_client:
+                await asyncio.to_thread(main.initialize_clients)
+
+            processor = DocumentProcessor(
+                storage_client=main.storage_client,
+                vertex_client=main.get_gemini_client(),
+                pdf_backend=pdf_backend
+            )
+            cv_text, jd_text = await processor.extract_texts_async(cv_content, jd_content)
+
+        if tasks is not None:
+            results = await process_tasks(processor, tasks, cv_text, jd_text, request_id)
+            all_failed = all(r["status"] == "error" for r in results.values())
+            return add_security_headers(JSONResponse(
+                main.with_truncation({"results": results, "request_id": request_id}, processor),
+                500 if all_failed else 200
+            ))
+
+        if stream:
+            # The model stream is synchronous; Starlette iterates it in a worker thread
+            events = await asyncio.to_thread(processor.process_text_stream, cv_text, jd_text, bundle=bundle)
+            return add_security_headers(StreamingResponse(
+                main.sse_events(events, request_id, processor.truncated),
+                media_type='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            ))
+
+        result = await processor.process_text_async(cv_text, jd_text, bundle=bundle)
+        return add_security_headers(JSONResponse(
+            main.with_truncation({"result": result, "request_id": request_id}, processor),
+            200
+        ))
+
+    except Exception as e:
+        logger.error(f"Error processing POST request {request_id}: {str(e)}", exc_info=True)
+        error_message = str(e)
+        if "Vertex AI error" in error_message:
+            return JSONResponse({"error": error_message, "request_id": request_id}, 500)
+        return JSONResponse({"error": "Failed to process request", "request_id": request_id}, 500)
+
+
+app = Starlette(routes=[
+    Route('/{path:path}', cv_optimizer, methods=['GET', 'POST', 'OPTIONS'])
+])
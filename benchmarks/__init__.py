@@ -0,0 +1,5 @@
+"""Micro-benchmarks for hot paths of the CV Optimizer service.
+
+Run a benchmark as a module from the repository root, e.g.
+``python -m benchmarks.json_extraction``.
+"""
@@ -0,0 +1,144 @@
+"""Benchmark streaming DOCX extraction against python-docx.
+
+Generates a corpus of CV-like DOCX files (paragraphs plus a skills table)
+with python-docx, then extracts every file with the previous extractor
+(docx.Document(...).paragraphs) and with
+utils.text_extraction.extract_docx_text, which streams word/document.xml.
+Reports documents per second, the share of table text each one recovers,
+and the peak RSS growth of extracting one long document, measured in a
+fresh process per extractor so that the parsers' native allocations count
+(Linux only).
+
+    python -m benchmarks.docx_extraction [--documents 200] [--paragraphs 20,200,2000] [--memory-paragraphs 10000]
+"""
+
+import argparse
+import io
+import multiprocessing
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+import docx
+
+from utils import text_extraction
+
+WORDS = ("python", "sql", "kubernetes", "led", "designed", "team", "platform", "data", "customers",
+         "reduced", "latency", "migrated", "services", "analytics", "delivered", "roadmap")
+
+
+def build_docx(rng: random.Random, paragraphs: int, table_rows: int) -> Tuple[bytes, List[str]]:
+    """Generate a DOCX and return it with the texts of its table cells."""
+    document = docx.Document()
+    document.add_heading("Curriculum Vitae", level=1)
+    for _ in range(paragraphs):
+        document.add_paragraph(" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40))))
+    table = document.add_table(rows=table_rows, cols=2)
+    cells = []
+    for row in table.rows:
+        for cell in row.cells:
+            # A token that never occurs in the paragraphs
+            cell.text = f"skill{len(cells)} {rng.choice(WORDS)}"
+            cells.append(cell.text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue(), cells
+
+
+def python_docx_text(file_content: bytes) -> str:
+    """The extractor replaced by the streaming one."""
+    document = docx.Document(io.BytesIO(file_content))
+    return "\n".join(text for text in (para.text.strip() for para in document.paragraphs) if text)
+
+
+EXTRACTORS: Dict[str, Callable[[bytes], str]] = {
+    "python-docx": python_docx_text,
+    "streaming": text_extraction.extract_docx_text,
+}
+
+
+def status_kib(field: str) -> int:
+    """Read a memory field of /proc/self/status, in KiB."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} is not reported by /proc/self/status")
+
+
+def peak_rss_growth(name: str, warm_up: bytes, file_content: bytes) -> int:
+    """
+    Return how far extracting a document raises the RSS of this process above where it was, in KiB.
+
+    A small document is extracted first so that imports and parser caches
+    are not counted. The peak is reset through /proc/self/clear_refs (Linux
+    only) because ru_maxrss carries over the parent's peak into a spawned
+    process.
+    """
+    EXTRACTORS[name](warm_up)
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+    before = status_kib("VmRSS")
+    EXTRACTORS[name](file_content)
+    return status_kib("VmHWM") - before
+
+
+def run(corpus: List[Tuple[bytes, List[str]]]) -> Dict[str, Dict[str, float]]:
+    """
+    Extract every document with every extractor.
+
+    Args:
+        corpus: Generated documents with their table cell texts
+
+    Returns:
+        Per-extractor seconds and share of table cells found in the text
+    """
+    totals = {name: {"seconds": 0.0, "cells": 0.0} for name in EXTRACTORS}
+    cell_count = sum(len(cells) for _, cells in corpus) or 1
+    for content, cells in corpus:
+        for name, extract in EXTRACTORS.items():
+            start = time.perf_counter()
+            text = extract(content)
+            totals[name]["seconds"] += time.perf_counter() - start
+            totals[name]["cells"] += sum(cell in text for cell in cells)
+    for stats in totals.values():
+        stats["cells"] /= cell_count
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=200, help="documents per size")
+    parser.add_argument("--paragraphs", default="20,200,2000", help="comma-separated paragraph counts")
+    parser.add_argument("--table-rows", type=int, default=10, help="rows of the skills table")
+    parser.add_argument("--memory-paragraphs", type=int, default=10000,
+                        help="paragraphs of the document whose peak memory is measured")
+    parser.add_argument("--seed", type=int, default=0, help="corpus random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for paragraphs in map(int, args.paragraphs.split(",")):
+        corpus = [build_docx(rng, paragraphs, args.table_rows) for _ in range(args.documents)]
+        size = sum(len(content) for content, _ in corpus) / len(corpus)
+        results = run(corpus)
+        baseline = results["python-docx"]["seconds"]
+        print(f"{args.documents} documents of {paragraphs} paragraphs, {size / 1024:.0f} KiB on average")
+        for name, stats in results.items():
+            print(
+                f"  {name:<12} {args.documents / stats['seconds']:9.1f} docs/s  "
+                f"({baseline / stats['seconds']:5.1f}x)  table cells found {stats['cells']:6.1%}"
+            )
+
+    warm_up, _ = build_docx(rng, 1, 1)
+    long_document, _ = build_docx(rng, args.memory_paragraphs, args.table_rows)
+    print(f"Peak RSS growth for one document of {args.memory_paragraphs} paragraphs "
+          f"({len(long_document) / 1024:.0f} KiB)")
+    context = multiprocessing.get_context("spawn")
+    for name in EXTRACTORS:
+        with context.Pool(1) as pool:
+            growth = pool.apply(peak_rss_growth, (name, warm_up, long_document))
+        print(f"  {name:<12} +{growth / 1024:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
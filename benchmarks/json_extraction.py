@@ -0,0 +1,127 @@
+"""Benchmark JSON extraction from large model responses.
+
+Compares the previous regex candidate scan (non-greedy ``{...}`` findall with
+a trial json.loads per candidate, followed by regex cleanup) with the
+single-pass balanced-brace extractor in utils.gemini_client.
+
+    python -m benchmarks.json_extraction [--tokens 8000] [--repeat 50]
+"""
+
+import argparse
+import json
+import re
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+from utils.gemini_client import extract_json
+
+# Rough size of one model token in characters of JSON output
+CHARS_PER_TOKEN = 4
+
+
+def legacy_extract(text: str) -> Any:
+    """The regex-based extraction and cleanup this benchmark compares against."""
+    json_blocks = re.findall(r'```(?:json)?\n?(.*?)\n?```', text, flags=re.DOTALL)
+    if json_blocks:
+        extracted = json_blocks[0]
+    else:
+        extracted = text
+        for json_obj in re.findall(r'({[\s\S]*?})', text):
+            try:
+                json.loads(json_obj)
+                extracted = json_obj
+                break
+            except json.JSONDecodeError:
+                continue
+    cleaned = re.sub(r'```(?:json)?\n?(.*?)\n?```', r'\1', extracted, flags=re.DOTALL)
+    cleaned = re.sub(r'(\w+)(?=\s*:)', r'"\1"', cleaned)
+    cleaned = re.sub(r',(\s*[}\]])', r'\1', cleaned)
+    return json.loads(cleaned.strip())
+
+
+def single_pass_extract(text: str) -> Any:
+    """The balanced-brace extractor as used by _process_schema_response."""
+    return extract_json(text)[1]
+
+
+def build_response(tokens: int, nested: bool = False) -> str:
+    """
+    Build a parsing-style response of roughly the given size, wrapped in prose.
+
+    With nested=True every experience entry starts with a nested object, so
+    none of the non-greedy {...} candidates of the regex scan is valid JSON.
+    """
+    experience: List[Dict[str, Any]] = []
+    data = {
+        "headline": "Senior Software Engineer",
+        "profileStatement": "Engineer with a focus on distributed systems.",
+        "skills": [{"name": f"Skill {i}", "proficiency": "Expert", "skillType": "hard"} for i in range(20)],
+        "achievements": ["Cut p99 latency by 40%", "Led migration to GCP"],
+        "experience": experience
+    }
+    document = {"status": "success", "data": data}
+    target = tokens * CHARS_PER_TOKEN
+    while len(json.dumps(document, indent=2)) < target:
+        entry: Dict[str, Any] = {"location": {"city": "Paris", "country": "France"}} if nested else {}
+        experience.append({
+            **entry,
+            "company": f"Company {len(experience)}",
+            "title": "Engineer",
+            "start": "2019-01",
+            "end": "2021-06",
+            "current": False,
+            "summary": "Built and operated services {with braces} in text.",
+            "highlights": ["Designed APIs", "Mentored engineers", "Improved reliability"]
+        })
+    return (
+        "Here is the analysis of the CV you provided.\n\n"
+        + json.dumps(document, indent=2)
+        + "\n\nLet me know if you need anything else."
+    )
+
+
+def run(tokens: int, repeat: int, nested: bool = False) -> Dict[str, Tuple[float, bool]]:
+    """
+    Time both extractors on the same response.
+
+    Args:
+        tokens: Approximate response size in tokens
+        repeat: Number of timed runs per extractor
+        nested: Use the nested response shape (see build_response)
+
+    Returns:
+        Best seconds per call for each extractor, and whether it returned
+        the outermost (complete) object
+    """
+    text = build_response(tokens, nested)
+    expected = json.loads(text[text.index("{"):text.rindex("}") + 1])
+    extractors: Dict[str, Callable[[str], Any]] = {
+        "regex candidate scan": legacy_extract,
+        "single-pass extractor": single_pass_extract
+    }
+    return {
+        name: (
+            min(timeit.repeat(lambda: extractor(text), number=1, repeat=repeat)),
+            extractor(text) == expected
+        )
+        for name, extractor in extractors.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=8000, help="approximate response size in tokens")
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs per extractor")
+    args = parser.parse_args()
+
+    for nested in (False, True):
+        results = run(args.tokens, args.repeat, nested)
+        baseline = results["regex candidate scan"][0]
+        shape = "nested" if nested else "flat"
+        print(f"{shape} response of ~{args.tokens} tokens, best of {args.repeat} runs")
+        for name, (seconds, complete) in results.items():
+            found = "outermost object" if complete else "an inner object"
+            print(f"  {name:<24} {seconds * 1000:8.3f} ms  ({baseline / seconds:5.1f}x)  returned {found}")
+
+if __name__ == "__main__":
+    main()
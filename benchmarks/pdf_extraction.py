@@ -0,0 +1,117 @@
+"""Benchmark PDF text extraction backends.
+
+Extracts every PDF in a directory with each backend in
+utils.text_extraction.PDF_BACKENDS and reports pages per second, failures,
+and how closely each backend's text matches pypdf's (the previous extractor).
+Text is compared as a multiset of whitespace-separated words, so differences
+in line breaks and block order do not count, but merged or split words do.
+
+    python -m benchmarks.pdf_extraction [--dir data/cv_pdfs] [--limit 500]
+"""
+
+import argparse
+import io
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pypdf import PdfReader
+
+from utils import text_extraction
+
+# Word overlap from which a document counts as equivalent to pypdf's text
+EQUIVALENT_SIMILARITY = 0.98
+
+
+def word_similarity(text: str, reference: str) -> float:
+    """Shared words of text and reference, relative to the larger of the two."""
+    words, reference_words = Counter(text.split()), Counter(reference.split())
+    total = max(sum(words.values()), sum(reference_words.values()))
+    if not total:
+        return 1.0
+    return sum((words & reference_words).values()) / total
+
+
+def run(paths: List[Path], backends: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Extract every file with every backend.
+
+    Args:
+        paths: PDF files to extract
+        backends: Keys of PDF_BACKENDS; pypdf is always run as the reference
+
+    Returns:
+        Per-backend pages, seconds, failures, mean word similarity to pypdf
+        and the share of documents at or above EQUIVALENT_SIMILARITY
+    """
+    totals = {name: {"pages": 0, "seconds": 0.0, "failures": 0, "similarity": 0.0, "equivalent": 0, "compared": 0}
+              for name in backends}
+    for path in paths:
+        content = path.read_bytes()
+        try:
+            pages = len(PdfReader(io.BytesIO(content)).pages)
+        except Exception:
+            pages = 0
+        texts: Dict[str, Optional[str]] = {}
+        for name in backends:
+            start = time.perf_counter()
+            try:
+                texts[name] = text_extraction.join_pages(text_extraction.PDF_BACKENDS[name](content))
+            except Exception:
+                texts[name] = None
+                totals[name]["failures"] += 1
+            totals[name]["seconds"] += time.perf_counter() - start
+            totals[name]["pages"] += pages
+        reference = texts.get(text_extraction.PYPDF_BACKEND)
+        if reference is None:
+            continue
+        for name in backends:
+            if texts[name] is None:
+                continue
+            similarity = word_similarity(texts[name], reference)
+            totals[name]["similarity"] += similarity
+            totals[name]["equivalent"] += similarity >= EQUIVALENT_SIMILARITY
+            totals[name]["compared"] += 1
+
+    for stats in totals.values():
+        compared = stats.pop("compared") or 1
+        stats["similarity"] /= compared
+        stats["equivalent"] /= compared
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=Path("data/cv_pdfs"), help="directory of PDFs")
+    parser.add_argument("--limit", type=int, default=0, help="only extract the first N files (0 for all)")
+    parser.add_argument("--backends", default=",".join(text_extraction.PDF_BACKENDS),
+                        help="comma-separated backends to compare")
+    args = parser.parse_args()
+
+    backends = [name.strip() for name in args.backends.split(",")]
+    if text_extraction.PYPDF_BACKEND not in backends:
+        backends.insert(0, text_extraction.PYPDF_BACKEND)
+    for name in backends:
+        if text_extraction.resolve_pdf_backend(name) != name:
+            parser.error(f"{name} is not installed")
+
+    paths = sorted(args.dir.glob("*.pdf"))
+    if args.limit:
+        paths = paths[:args.limit]
+    results = run(paths, backends)
+
+    baseline = results[text_extraction.PYPDF_BACKEND]
+    baseline_rate = baseline["pages"] / baseline["seconds"]
+    print(f"{len(paths)} PDFs, {baseline['pages']} pages")
+    for name, stats in results.items():
+        rate = stats["pages"] / stats["seconds"]
+        print(
+            f"  {name:<8} {rate:9.1f} pages/s  ({rate / baseline_rate:5.1f}x)  "
+            f"{stats['failures']:4d} failed  word similarity to pypdf {stats['similarity']:.3f}, "
+            f"{stats['equivalent']:.1%} of documents >= {EQUIVALENT_SIMILARITY}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark per-page parallel PDF extraction against a single pass.
+
+Builds PDFs of increasing page counts from the CVs in data/cv_pdfs and
+extracts each one sequentially in a worker (ExtractionPool.run) and split by
+page range across the workers (ExtractionPool.map), as
+DocumentProcessor._extract_text_from_pdf does. Reports both timings per
+backend and the smallest page count at which the split is faster, which is
+what PDF_PARALLEL_MIN_PAGES should be set to on the same hardware.
+
+    python -m benchmarks.pdf_page_parallel [--workers 4] [--pages 1,2,4,8,16,32]
+"""
+
+import argparse
+import functools
+import io
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pypdf import PdfReader, PdfWriter
+
+from utils import text_extraction
+from utils.extraction_pool import ExtractionPool
+
+
+def build_pdf(sources: List[Path], pages: int) -> bytes:
+    """Concatenate pages of the source PDFs into a document of the given length."""
+    writer = PdfWriter()
+    for path in sources:
+        for page in PdfReader(path).pages:
+            if len(writer.pages) == pages:
+                break
+            writer.add_page(page)
+        if len(writer.pages) == pages:
+            break
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def best_of(repeat: int, func) -> float:
+    """Best wall time of repeat calls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(pool: ExtractionPool, documents: Dict[int, bytes], backend: str, repeat: int) -> Dict[int, Tuple[float, float]]:
+    """
+    Time sequential and page-split extraction of every document.
+
+    Args:
+        pool: Started pool that takes every document (inline_max_bytes=0)
+        documents: PDF content by page count
+        backend: Key of PDF_BACKENDS
+        repeat: Timed runs per measurement
+
+    Returns:
+        (sequential seconds, split seconds) by page count
+    """
+    extract = functools.partial(text_extraction.extract_pdf_document, backend=backend)
+    results = {}
+    for pages, content in documents.items():
+        extract_range = functools.partial(text_extraction.extract_pdf_document, backend=backend, total_pages=pages)
+        ranges = text_extraction.split_pages(pages, pool.max_workers)
+        if text_extraction.merge_extractions(pool.map(extract_range, content, ranges)) != pool.run(extract, content):
+            raise AssertionError(f"{backend}: split extraction of {pages} pages differs from a single pass")
+        results[pages] = (
+            best_of(repeat, lambda: pool.run(extract, content)),
+            best_of(repeat, lambda: pool.map(extract_range, content, ranges))
+        )
+    return results
+
+
+def crossover(results: Dict[int, Tuple[float, float]]) -> Optional[int]:
+    """Smallest page count from which the split is faster at every larger count."""
+    found = None
+    for pages in sorted(results, reverse=True):
+        sequential, split = results[pages]
+        if split >= sequential:
+            break
+        found = pages
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=Path("data/cv_pdfs"), help="directory of source PDFs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction worker processes")
+    parser.add_argument("--pages", default="1,2,4,8,16,32", help="comma-separated page counts")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement")
+    parser.add_argument("--backends", default=",".join(text_extraction.PDF_BACKENDS),
+                        help="comma-separated backends to measure")
+    args = parser.parse_args()
+
+    sources = sorted(args.dir.glob("*.pdf"))
+    documents = {pages: build_pdf(sources, pages) for pages in map(int, args.pages.split(","))}
+    pool = ExtractionPool(max_workers=args.workers, inline_max_bytes=0, timeout_seconds=600)
+    pool.start()
+    try:
+        print(f"{args.workers} workers on {os.cpu_count()} CPUs, best of {args.repeat} runs")
+        for backend in (name.strip() for name in args.backends.split(",")):
+            if text_extraction.resolve_pdf_backend(backend) != backend:
+                print(f"  {backend} is not installed")
+                continue
+            results = run(pool, documents, backend, args.repeat)
+            print(f"  {backend}")
+            for pages, (sequential, split) in results.items():
+                print(f"    {pages:4d} pages  single pass {sequential * 1000:9.1f} ms  "
+                      f"split {split * 1000:9.1f} ms  ({sequential / split:4.2f}x)")
+            point = crossover(results)
+            print(f"    crossover: {f'{point} pages' if point else 'none in the measured range'}")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Benchmark the peak memory of handling a large upload.
+
+Builds a multipart request carrying a PDF of --pages pages, parses it with
+werkzeug as the Flask entry point does, and then handles the CV in one of
+two ways: read into bytes (FileStorage.read(), the previous behaviour), or
+spooled with utils.upload_spool and passed on as a memoryview. Either way
+the document is hashed, sniffed and extracted in the extraction pool, as
+DocumentProcessor does. Each variant runs in a fresh process and reports
+how far handling the upload raised that process's peak RSS (Linux only,
+via /proc/self/status) and how long it took. Pages of a spool file that are
+mapped count towards the RSS too, so the comparison is not flattering.
+
+    python -m benchmarks.upload_memory [--pages 400] [--backend pymupdf]
+"""
+
+import argparse
+import functools
+import gc
+import hashlib
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request
+
+import config
+from benchmarks.docx_extraction import status_kib
+from benchmarks.pdf_page_parallel import build_pdf
+from utils import text_extraction
+from utils.extraction_pool import ExtractionPool
+from utils.upload_spool import spool_upload
+
+VARIANTS = ("read", "spool")
+
+
+def handle(variant: str, pdf_path: Path, backend: str) -> Dict[str, float]:
+    """
+    Handle one upload in this process and measure it.
+
+    Args:
+        variant: "read" for FileStorage.read(), "spool" for spool_upload
+        pdf_path: PDF sent as the cv_file field
+        backend: Key of PDF_BACKENDS
+
+    Returns:
+        Peak RSS growth in KiB, seconds, and the number of characters extracted
+    """
+    pool = ExtractionPool(
+        max_workers=1,
+        inline_max_bytes=config.EXTRACTION_INLINE_MAX_BYTES,
+        timeout_seconds=600
+    )
+    pool.start()
+    builder = EnvironBuilder(method="POST", data={
+        "cv_file": (io.BytesIO(pdf_path.read_bytes()), "cv.pdf", "application/pdf")
+    })
+    request = Request(builder.get_environ())
+    cv_file = request.files["cv_file"]
+    limits = text_extraction.ExtractionLimits(
+        config.EXTRACTION_MAX_PAGES, config.EXTRACTION_MAX_CHARS, config.EXTRACTION_MAX_SECONDS
+    )
+    extract = functools.partial(text_extraction.extract_pdf_document, backend=backend, limits=limits)
+    gc.collect()
+
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+    before = status_kib("VmRSS")
+    start = time.perf_counter()
+    try:
+        if variant == "read":
+            upload = None
+            content = cv_file.read()
+        else:
+            upload = spool_upload(cv_file.stream)
+            content = upload.view
+        hashlib.blake2b(content, digest_size=16).hexdigest()
+        text_extraction.sniff_content_type(content)
+        extracted = pool.run(extract, content)
+        del content
+        if upload is not None:
+            upload.close()
+        return {
+            "peak_kib": status_kib("VmHWM") - before,
+            "seconds": time.perf_counter() - start,
+            "chars": len(extracted.text)
+        }
+    finally:
+        pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=Path("data/cv_pdfs"), help="directory of source PDFs")
+    parser.add_argument("--pages", type=int, default=400, help="pages of the uploaded PDF")
+    parser.add_argument("--backend", default=text_extraction.PYMUPDF_BACKEND, help="PDF backend")
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--pdf", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        # Child process: measure one variant and report it to the parent
+        print(json.dumps(handle(args.variant, args.pdf, args.backend)))
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf:
+        pdf.write(build_pdf(sorted(args.dir.glob("*.pdf")), args.pages))
+        pdf.flush()
+        size = Path(pdf.name).stat().st_size
+        print(f"{args.pages}-page PDF upload, {size / 1024 / 1024:.1f} MiB, {args.backend}, "
+              f"spool threshold {config.UPLOAD_SPOOL_MAX_MEMORY_BYTES // 1024} KiB in {config.UPLOAD_SPOOL_DIR or 'the temp dir'}")
+        results = {}
+        for variant in VARIANTS:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.upload_memory", "--variant", variant,
+                 "--pdf", pdf.name, "--backend", args.backend],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results[variant] = json.loads(output.strip().splitlines()[-1])
+
+    baseline = results["read"]["peak_kib"]
+    for variant, stats in results.items():
+        print(f"  {variant:<6} peak RSS +{stats['peak_kib'] / 1024:7.1f} MiB "
+              f"({stats['peak_kib'] / baseline if baseline else 0:4.2f}x)  "
+              f"{stats['seconds'] * 1000:8.1f} ms  {stats['chars']} chars")
+
+
+if __name__ == "__main__":
+    main()
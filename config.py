@@ -25,6 +25,13 @@ SUPPORTED_MODELS: List[str] = [
     "gemini-2.5-flash-001"
 ]
 VERTEX_AI_ENABLED = os.getenv("VERTEX_AI_ENABLED", "true").lower() in ("true", "1", "yes")
+# Ask the model for JSON matching the response schema (native structured output)
+STRUCTURED_OUTPUT_ENABLED = os.getenv("STRUCTURED_OUTPUT_ENABLED", "true").lower() in ("true", "1", "yes")
+# Tasks that try cheaper models first and escalate to DEFAULT_MODEL on validation or quality failure
+MODEL_CASCADE_TASKS: List[str] = [t.strip() for t in os.getenv("MODEL_CASCADE_TASKS", "ps,cs").split(",") if t.strip()]
+MODEL_CASCADE_MODELS: List[str] = [
+    m.strip() for m in os.getenv("MODEL_CASCADE_MODELS", "gemini-2.0-flash-lite").split(",") if m.strip()
+]
 
 # Model configuration
 DEFAULT_GENERATION_CONFIG: Dict[str, Any] = {
@@ -35,6 +42,12 @@ DEFAULT_GENERATION_CONFIG: Dict[str, Any] = {
     "candidate_count": int(os.getenv("MODEL_CANDIDATE_COUNT", "1"))
 }
 
+# Vertex AI context caching of the system prompt and few-shot examples
+CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "false").lower() in ("true", "1", "yes")
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "3600"))
+CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = int(os.getenv("CONTEXT_CACHE_REFRESH_MARGIN_SECONDS", "300"))
+CONTEXT_CACHE_RETRY_SECONDS = int(os.getenv("CONTEXT_CACHE_RETRY_SECONDS", "600"))
+
 # Google ADK settings
 USE_ADK = os.getenv("USE_ADK", "false").lower() in ("true", "1", "yes")
 ADK_AGENT_LOCATION = os.getenv(
@@ -63,8 +76,38 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
 # Cache configuration
 CACHE_TTL_DAYS = int(os.getenv("CACHE_TTL_DAYS", "30"))
-MEMORY_CACHE_SIZE = int(os.getenv("MEMORY_CACHE_SIZE", "100"))
+MEMORY_CACHE_MAX_BYTES = int(os.getenv("MEMORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
 CACHE_COMPRESSION_THRESHOLD = int(os.getenv("CACHE_COMPRESSION_THRESHOLD", "1000000"))
+RESOURCE_CACHE_TTL_SECONDS = int(os.getenv("RESOURCE_CACHE_TTL_SECONDS", "300"))
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() in ("true", "1", "yes")
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("true", "1", "yes")
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(24 * 3600)))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+# JWT validation caching
+JWT_SECRET_REFRESH_SECONDS = int(os.getenv("JWT_SECRET_REFRESH_SECONDS", "300"))
+JWT_SECRET_ROTATION_GRACE_SECONDS = int(os.getenv("JWT_SECRET_ROTATION_GRACE_SECONDS", "3600"))
+JWT_TOKEN_CACHE_SIZE = int(os.getenv("JWT_TOKEN_CACHE_SIZE", "1024"))
+
+# Multi-task requests (several tasks for one CV in a single request)
+MULTI_TASK_MAX_WORKERS = int(os.getenv("MULTI_TASK_MAX_WORKERS", "6"))
+
+# Text extraction: documents above the inline size are parsed in worker processes
+EXTRACTION_POOL_WORKERS = int(os.getenv("EXTRACTION_POOL_WORKERS", "2"))
+EXTRACTION_INLINE_MAX_BYTES = int(os.getenv("EXTRACTION_INLINE_MAX_BYTES", str(128 * 1024)))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "30"))
+# PDF text extraction backend (see utils.text_extraction.PDF_BACKENDS); pypdf is the fallback
+PDF_EXTRACTION_BACKEND = os.getenv("PDF_EXTRACTION_BACKEND", "pymupdf")
+# Per-document extraction budget; 0 disables a limit. Truncated text is not cached
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "0"))
+EXTRACTION_MAX_CHARS = int(os.getenv("EXTRACTION_MAX_CHARS", "0"))
+EXTRACTION_MAX_SECONDS = float(os.getenv("EXTRACTION_MAX_SECONDS", "0"))
+# Pooled PDFs with at least this many pages are split by page range across the extraction
+# workers (0 disables); off until benchmarks.pdf_page_parallel finds a crossover on the instance
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "0"))
+# Uploads above this size are spooled to a memory-mapped file in UPLOAD_SPOOL_DIR ("" for the temp dir)
+UPLOAD_SPOOL_MAX_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_MEMORY_BYTES", str(EXTRACTION_INLINE_MAX_BYTES)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else "")
 
 # Content type validation
 ALLOWED_CONTENT_TYPES: List[str] = [
@@ -75,4 +118,17 @@ ALLOWED_CONTENT_TYPES: List[str] = [
 # Retry configuration for Vertex AI
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
 BASE_DELAY = int(os.getenv("BASE_DELAY", "1"))
-MAX_DELAY = int(os.getenv("MAX_DELAY", "10")) 
\ No newline at end of file
+MAX_DELAY = int(os.getenv("MAX_DELAY", "10"))
+# Process-wide retry budget: retries stop while fewer than half the tokens remain
+RETRY_BUDGET_MAX_TOKENS = float(os.getenv("RETRY_BUDGET_MAX_TOKENS", "10"))
+RETRY_BUDGET_TOKEN_RATIO = float(os.getenv("RETRY_BUDGET_TOKEN_RATIO", "0.1"))
+
+# Hedged Gemini calls: a second request races a call slower than the given latency percentile
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "false").lower() in ("true", "1", "yes")
+HEDGING_PERCENTILE = float(os.getenv("HEDGING_PERCENTILE", "0.95"))
+HEDGING_INITIAL_DELAY_SECONDS = float(os.getenv("HEDGING_INITIAL_DELAY_SECONDS", "10"))
+HEDGING_MAX_RATIO = float(os.getenv("HEDGING_MAX_RATIO", "0.1"))
+
+# Circuit breakers around Vertex AI, Firestore and GCS
+BREAKER_FAIL_MAX = int(os.getenv("BREAKER_FAIL_MAX", "5"))
+BREAKER_RESET_TIMEOUT_SECONDS = int(os.getenv("BREAKER_RESET_TIMEOUT_SECONDS", "30"))
@@ -8,25 +8,34 @@ import os
 import json
 import logging
 import functions_framework
-from typing import Dict, Any, Optional, Tuple, Type, Union
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Type, Union
 import uuid
 from urllib.parse import urlparse
 import jwt
-from jwt.exceptions import ExpiredSignatureError, InvalidAudienceError, DecodeError
-from flask import Request, make_response, Response, Flask, request, jsonify
+from jwt.exceptions import ExpiredSignatureError, InvalidAudienceError, DecodeError, InvalidSignatureError
+from flask import Request, make_response, Response, Flask, request, jsonify, stream_with_context, has_request_context
 import base64
+import hashlib
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from pydantic import BaseModel, Field, ValidationError
 from google.cloud import storage, secretmanager
 import google.cloud.logging
-import vertexai
-from vertexai.language_models import TextGenerationModel
 import traceback
 from datetime import datetime
 
 from utils.storage import StorageClient
-from utils.document_processor import DocumentProcessor
+from utils.document_processor import DocumentProcessor, get_memory_cache_stats
+from utils.extraction_pool import get_extraction_pool
+from utils.text_extraction import PDF_BACKENDS
+from utils.upload_spool import spool_upload
+from utils import circuit_breaker
 from utils.gemini_client import GeminiClient
+from utils.cache import ResourceCache, ExpiringLRUCache
+from utils.secret_manager import RefreshingSecret
+from utils.task_bundle import TaskBundle, build_task_bundle
 from utils.security import (
     rate_limit,
     add_security_headers,
@@ -45,7 +54,24 @@ logger = logging.getLogger(__name__)
 # Initialize Google Cloud clients
 storage_client: Optional[storage.Client] = None
 secret_client: Optional[secretmanager.SecretManagerServiceClient] = None
-vertex_client: Optional[TextGenerationModel] = None
+# Shared Gemini client; it pools one model handle per model/system instruction
+vertex_client: Optional[GeminiClient] = None
+
+# Prompts, schemas and examples are static between deployments, so warm
+# instances serve them from memory and only revalidate their version per TTL
+resource_cache = ResourceCache(ttl_seconds=config.RESOURCE_CACHE_TTL_SECONDS)
+
+# Precompiled per-task bundles, keyed by task
+task_bundles: Dict[str, TaskBundle] = {}
+_bundle_lock = threading.Lock()
+
+# GCS object paths for each resource type (used when not using Secret Manager)
+RESOURCE_FILE_PATHS = {
+    'system_prompt': 'prompts/system_prompt.md',
+    'user_prompt': 'prompts/{task}_user_prompt.md',
+    'schema': 'schemas/{task}_schema.json',
+    'examples': 'few_shot_examples/{task}_few_shot_examples.md'
+}
 
 def initialize_clients() -> None:
     """Initialize Google Cloud clients with proper error handling.
@@ -58,13 +84,23 @@ def initialize_clients() -> None:
     try:
         storage_client = storage.Client()
         secret_client = secretmanager.SecretManagerServiceClient()
-        vertexai.init(project=os.getenv('GOOGLE_CLOUD_PROJECT'))
-        vertex_client = TextGenerationModel.from_pretrained("text-bison@001")
+        get_gemini_client()
         logger.info("Successfully initialized all Google Cloud clients")
     except Exception as e:
         logger.error(f"Failed to initialize clients: {str(e)}")
         raise
 
+def get_gemini_client() -> GeminiClient:
+    """Return the shared GeminiClient, creating it on first use.
+    
+    Returns:
+        GeminiClient: Client for the default model
+    """
+    global vertex_client
+    if vertex_client is None:
+        vertex_client = GeminiClient(config.PROJECT_ID, config.LOCATION, config.DEFAULT_MODEL)
+    return vertex_client
+
 def get_secret(secret_id: str) -> str:
     """Retrieve secret from Secret Manager with proper error handling.
     
@@ -85,9 +121,23 @@ def get_secret(secret_id: str) -> str:
         logger.error(f"Failed to retrieve secret {secret_id}: {str(e)}")
         raise
 
+# JWT signing secret, refreshed in the background instead of fetched per request
+jwt_secret = RefreshingSecret(
+    fetch=lambda: get_secret('jwt-secret'),
+    refresh_interval=config.JWT_SECRET_REFRESH_SECONDS,
+    rotation_grace=config.JWT_SECRET_ROTATION_GRACE_SECONDS
+)
+
+# Payloads of already-verified tokens, keyed by token hash until they expire
+verified_tokens = ExpiringLRUCache(maxsize=config.JWT_TOKEN_CACHE_SIZE)
+
 def validate_jwt(token: str) -> Dict[str, Any]:
     """Validate JWT token with proper error handling.
     
+    Tokens that verified before are served from a bounded cache until their
+    'exp' claim. Otherwise the signature is checked against each active
+    signing secret, newest first, to support secret rotation.
+    
     Args:
         token: JWT token to validate
         
@@ -98,12 +148,27 @@ def validate_jwt(token: str) -> Dict[str, Any]:
         jwt.InvalidTokenError: If token is invalid or expired
     """
     try:
-        jwt_secret = get_secret('jwt-secret')
-        payload = jwt.decode(token, jwt_secret, algorithms=['HS256'])
+        token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        cached_payload = verified_tokens.get(token_hash)
+        if cached_payload is not None:
+            return dict(cached_payload)
+        
+        keys = jwt_secret.keys()
+        for index, key in enumerate(keys):
+            try:
+                payload = jwt.decode(token, key, algorithms=['HS256'])
+                break
+            except InvalidSignatureError:
+                if index == len(keys) - 1:
+                    raise
         
         if 'exp' in payload and datetime.utcnow().timestamp() > payload['exp']:
             raise ExpiredSignatureError("Token has expired")
         
+        # Tokens without an expiry are never cached
+        if 'exp' in payload:
+            verified_tokens.set(token_hash, dict(payload), float(payload['exp']))
+        
         return payload
     except (ExpiredSignatureError, InvalidAudienceError, DecodeError) as e:
         logger.error(f"JWT validation error: {str(e)}")
@@ -171,73 +236,189 @@ def load_resource_file(task: str, resource_type: str) -> str:
             logger.warning(f"Failed to load {resource_type} from Secret Manager: {e}")
     
     # Fall back to GCS
-    file_paths = {
-        'system_prompt': f'prompts/system_prompt.md',
-        'user_prompt': f'prompts/{task}_user_prompt.md',
-        'schema': f'schemas/{task}_schema.json',
-        'examples': f'few_shot_examples/{task}_few_shot_examples.md'
-    }
+    file_path = RESOURCE_FILE_PATHS[resource_type].format(task=task)
     
     try:
-        content = storage_client.read_file(file_paths[resource_type])
+        content = storage_client.read_file(file_path)
         if content is None:
-            raise FileNotFoundError(f"Could not read file from GCS: {file_paths[resource_type]}")
+            raise FileNotFoundError(f"Could not read file from GCS: {file_path}")
         return content
     except Exception as e:
-        logger.error(f"Error loading resource file {file_paths[resource_type]}: {e}")
+        logger.error(f"Error loading resource file {file_path}: {e}")
         raise
 
-def fetch_resources(task: str) -> Tuple[str, str, str, Type[BaseResponseSchema]]:
-    """Fetch all resources needed for a specific task.
+def _resource_secret_id(task: str, resource_type: str) -> str:
+    """Return the Secret Manager secret ID holding a task resource."""
+    secret_ids = {
+        'system_prompt': f"{config.PROMPTS_SECRET_PREFIX}system-prompt",
+        'user_prompt': f"{config.PROMPTS_SECRET_PREFIX}{task}-user-prompt",
+        'schema': f"{config.SCHEMAS_SECRET_PREFIX}{task}-schema",
+        'examples': f"{config.EXAMPLES_SECRET_PREFIX}{task}-examples"
+    }
+    return secret_ids[resource_type]
+
+def get_resource_version(task: str, resource_type: str) -> Optional[str]:
+    """Return the current source version of a resource without downloading it.
+    
+    Uses the Secret Manager version name or the GCS object generation, both of
+    which are cheap metadata lookups compared to reading the resource itself.
     
     Args:
         task: Task identifier (parsing, ps, cs, etc.)
+        resource_type: Type of resource (prompt, schema, examples)
         
     Returns:
-        Tuple[str, str, str, Type[BaseResponseSchema]]: System prompt, user prompt,
-            few shot examples, and schema model class
+        Optional[str]: Version identifier, or None if it cannot be determined
+    """
+    if not storage_client:
+        initialize_clients()
+    
+    if config.USE_SECRETS_MANAGER:
+        secret_id = _resource_secret_id(task, resource_type)
+        name = f"projects/{os.getenv('GOOGLE_CLOUD_PROJECT')}/secrets/{secret_id}/versions/latest"
+        return secret_client.get_secret_version(request={"name": name}).name
+    
+    file_path = RESOURCE_FILE_PATHS[resource_type].format(task=task)
+    blob = storage_client.bucket(config.GCS_BUCKET_NAME).get_blob(file_path)
+    return str(blob.generation) if blob else None
+
+def get_cached_resource(task: str, resource_type: str) -> str:
+    """Load a task resource through the process-wide resource cache.
+    
+    Args:
+        task: Task identifier (parsing, ps, cs, etc.)
+        resource_type: Type of resource (prompt, schema, examples)
+        
+    Returns:
+        str: Content of the resource file
+    """
+    # The system prompt is shared by every task, so cache it once
+    cache_task = None if resource_type == 'system_prompt' else task
+    return resource_cache.get(
+        (cache_task, resource_type),
+        loader=lambda: load_resource_file(task, resource_type),
+        version_probe=lambda: get_resource_version(task, resource_type)
+    )
+
+def invalidate_resources(task: Optional[str] = None) -> int:
+    """Drop cached resources so they are reloaded on next use.
+    
+    Args:
+        task: Optional task to invalidate; all resources are dropped if omitted
+        
+    Returns:
+        int: Number of cache entries removed
+    """
+    if task is None:
+        return resource_cache.invalidate()
+    return resource_cache.invalidate(lambda key: key[0] == task)
+
+def _bundle_resource_keys(bundle: TaskBundle) -> Tuple[Tuple[Optional[str], str], ...]:
+    """Return the resource cache keys a bundle was built from."""
+    keys = [(None, 'system_prompt'), (bundle.task, 'user_prompt'), (bundle.task, 'examples')]
+    if bundle.sources[3] is not None:
+        keys.append((bundle.task, 'schema'))
+    return tuple(keys)
+
+def _load_task_bundle(task: str) -> TaskBundle:
+    """Load a task's resources and (re)build its bundle if they changed.
+    
+    Args:
+        task: Task identifier (parsing, ps, cs, etc.)
+        
+    Returns:
+        TaskBundle: Current bundle for the task
         
     Raises:
-        ValueError: If required resources cannot be loaded or schema model is not found
+        ValueError: If the schema model is not found
     """
+    schema_model = SCHEMA_REGISTRY.get(task)
+    if not schema_model:
+        raise ValueError(f"No schema model found for task: {task}")
+    
+    system_prompt = get_cached_resource(task, 'system_prompt')
+    user_prompt = get_cached_resource(task, 'user_prompt')
+    few_shot_examples = get_cached_resource(task, 'examples')
+    
+    # The schema file is only used for the consistency check, so it is optional
     try:
-        system_prompt = load_resource_file(task, 'system_prompt')
-        user_prompt = load_resource_file(task, 'user_prompt')
-        few_shot_examples = load_resource_file(task, 'examples')
-        
-        schema_model = SCHEMA_REGISTRY.get(task)
-        if not schema_model:
-            raise ValueError(f"No schema model found for task: {task}")
+        schema_json = get_cached_resource(task, 'schema')
+    except Exception as e:
+        logger.warning(f"Error validating schema for task '{task}': {str(e)}")
+        schema_json = None
+    
+    # Revalidated resources come back as the same cached objects, in which
+    # case the existing bundle is still current
+    sources = (system_prompt, user_prompt, few_shot_examples, schema_json)
+    current = task_bundles.get(task)
+    if current and all(old is new for old, new in zip(current.sources, sources)):
+        return current
+    
+    bundle = build_task_bundle(task, system_prompt, user_prompt, few_shot_examples, schema_json, schema_model)
+    task_bundles[task] = bundle
+    logger.info(f"Built task bundle for '{task}' (version {bundle.version})")
+    return bundle
 
-        # Validate schema consistency
-        try:
-            schema_json = load_resource_file(task, 'schema')
-            if schema_json:
-                schema_dict = json.loads(schema_json)
-                pydantic_schema = schema_model.model_json_schema()
-                
-                # Validate schema structure
-                required_fields = ['properties', 'required', 'type', '$defs']
-                missing_fields = [f for f in required_fields if f not in schema_dict and f in pydantic_schema]
-                if missing_fields:
-                    logger.warning(f"Schema file for task '{task}' is missing fields: {', '.join(missing_fields)}")
-                
-                # Validate property consistency
-                if 'properties' in schema_dict and 'properties' in pydantic_schema:
-                    file_props = set(schema_dict['properties'].keys())
-                    model_props = set(pydantic_schema['properties'].keys())
-                    missing_in_file = model_props - file_props
-                    if missing_in_file:
-                        logger.warning(f"Schema file for task '{task}' is missing properties: {', '.join(missing_in_file)}")
-        except Exception as e:
-            logger.warning(f"Error validating schema for task '{task}': {str(e)}")
+def get_task_bundle(task: str) -> TaskBundle:
+    """Return the precompiled bundle for a task.
+    
+    Warm bundles are returned directly; a bundle is only rebuilt once its
+    resources have passed their cache TTL and changed at the source.
+    
+    Args:
+        task: Task identifier (parsing, ps, cs, etc.)
         
-        return system_prompt, user_prompt, few_shot_examples, schema_model
+    Returns:
+        TaskBundle: Bundle with prompts, examples, schema and response model
         
+    Raises:
+        ValueError: If required resources cannot be loaded or schema model is not found
+    """
+    bundle = task_bundles.get(task)
+    if bundle and all(resource_cache.is_fresh(key) for key in _bundle_resource_keys(bundle)):
+        return bundle
+    
+    try:
+        with _bundle_lock:
+            return _load_task_bundle(task)
     except Exception as e:
         logger.error(f"Error fetching resources for task '{task}': {str(e)}")
         raise ValueError(f"Failed to fetch resources for task '{task}': {str(e)}")
 
+def warmup_task_bundles() -> Dict[str, TaskBundle]:
+    """Build the bundle for every allowed task ahead of the first request.
+    
+    Failures are logged and left to be retried lazily on first use.
+    
+    Returns:
+        Dict[str, TaskBundle]: Bundles that were built successfully
+    """
+    for task in config.ALLOWED_TASKS:
+        if task not in SCHEMA_REGISTRY:
+            logger.warning(f"Skipping warmup for task '{task}': no schema model registered")
+            continue
+        try:
+            get_task_bundle(task)
+        except Exception as e:
+            logger.warning(f"Failed to warm up task '{task}': {str(e)}")
+    return dict(task_bundles)
+
+def fetch_resources(task: str) -> Tuple[str, str, str, Type[BaseResponseSchema]]:
+    """Fetch all resources needed for a specific task.
+    
+    Args:
+        task: Task identifier (parsing, ps, cs, etc.)
+        
+    Returns:
+        Tuple[str, str, str, Type[BaseResponseSchema]]: System prompt, user prompt,
+            few shot examples, and schema model class
+        
+    Raises:
+        ValueError: If required resources cannot be loaded or schema model is not found
+    """
+    bundle = get_task_bundle(task)
+    return bundle.system_prompt, bundle.user_prompt, bundle.few_shot_examples, bundle.schema_model
+
 @functions_framework.http
 @rate_limit()
 def cv_optimizer(request: Request) -> Response:
@@ -274,7 +455,7 @@ def cv_optimizer(request: Request) -> Response:
         # Process request based on method
         if request.method == 'GET':
             if request.path == '/health':
-                return add_security_headers(make_response(jsonify({"status": "healthy"}), 200))
+                return add_security_headers(make_response(jsonify(health_status()), 200))
             return add_security_headers(make_response(jsonify({"error": "Method not allowed"}), 405))
         
         # Handle POST request
@@ -290,28 +471,42 @@ def cv_optimizer(request: Request) -> Response:
             500
         ))
 
-def authenticate_request(request: Request) -> Optional[Response]:
-    """Authenticate the incoming request.
+def health_status() -> Dict[str, Any]:
+    """Return the health check payload with circuit breaker, extraction pool, text cache, hedging and cascade statistics."""
+    health = {
+        "status": "healthy",
+        "circuit_breakers": circuit_breaker.get_breaker_metrics(),
+        "extraction_pool": get_extraction_pool().stats(),
+        "text_cache": get_memory_cache_stats()
+    }
+    if isinstance(vertex_client, GeminiClient) and vertex_client.hedging:
+        health["hedging"] = vertex_client.hedging.stats()
+    if isinstance(vertex_client, GeminiClient) and vertex_client.cascades:
+        health["model_cascades"] = vertex_client.get_cascade_stats()
+    return health
+
+def check_authentication(headers: Any) -> Optional[str]:
+    """Authenticate a request from its headers, independent of the web framework.
     
     Supports both GCP IAM and Supabase JWT authentication.
     
     Args:
-        request: Flask Request object
+        headers: Request headers
         
     Returns:
-        Optional[Response]: Error response if authentication fails, None if successful
+        Optional[str]: Error message if authentication fails, None if successful
     """
-    gcp_auth_user = request.headers.get('X-Goog-Authenticated-User-Email')
-    gcp_iap_user = request.headers.get('X-Goog-IAP-JWT-Assertion')
+    gcp_auth_user = headers.get('X-Goog-Authenticated-User-Email')
+    gcp_iap_user = headers.get('X-Goog-IAP-JWT-Assertion')
     
     if gcp_auth_user or gcp_iap_user:
         auth_user = gcp_auth_user or "IAP Authenticated User"
         logger.info(f"GCP authenticated user: {auth_user}")
         return None
     
-    auth_header = request.headers.get("Authorization")
+    auth_header = headers.get("Authorization")
     if not auth_header:
-        return make_response(jsonify({"error": "No authorization header"}), 401)
+        return "No authorization header"
     
     try:
         jwt_payload = validate_jwt(auth_header.split(' ')[1])
@@ -321,11 +516,190 @@ def authenticate_request(request: Request) -> Optional[Response]:
         return None
     except Exception as e:
         logger.warning(f"Authentication failed: {str(e)}")
-        return make_response(jsonify({"error": f"Unauthorized: {str(e)}"}), 401)
+        return f"Unauthorized: {str(e)}"
+
+def authenticate_request(request: Request) -> Optional[Response]:
+    """Authenticate the incoming request.
+    
+    Supports both GCP IAM and Supabase JWT authentication.
+    
+    Args:
+        request: Flask Request object
+        
+    Returns:
+        Optional[Response]: Error response if authentication fails, None if successful
+    """
+    error = check_authentication(request.headers)
+    if error:
+        return make_response(jsonify({"error": error}), 401)
+    return None
+
+def parse_requested_tasks(request: Request) -> Optional[List[str]]:
+    """Read the list of tasks for a multi-task request.
+    
+    Tasks may be sent as repeated 'tasks' form fields, a comma-separated
+    'tasks' value, or both. Duplicates are dropped, keeping the first
+    occurrence.
+    
+    Args:
+        request: Flask Request object
+        
+    Returns:
+        List of task names, or None if the request has no 'tasks' field
+    """
+    return parse_task_values(request.form.getlist('tasks'))
+
+def parse_task_values(values: List[str]) -> Optional[List[str]]:
+    """Split and deduplicate raw 'tasks' form values (see parse_requested_tasks).
+    
+    Args:
+        values: Every 'tasks' value of the form
+        
+    Returns:
+        List of task names, or None if there were no values
+    """
+    if not values:
+        return None
+    tasks: List[str] = []
+    for value in values:
+        for task in value.split(','):
+            task = task.strip()
+            if task and task not in tasks:
+                tasks.append(task)
+    return tasks
+
+def task_error_message(error: Exception) -> str:
+    """Return the client-facing message for a failed task."""
+    error_message = str(error)
+    if "Vertex AI error" in error_message:
+        return error_message
+    return "Failed to process task"
+
+def process_tasks(
+    processor: DocumentProcessor,
+    tasks: List[str],
+    cv_text: str,
+    jd_text: Optional[str],
+    request_id: str
+) -> Dict[str, Dict[str, Any]]:
+    """Run several tasks concurrently on already extracted text.
+    
+    Each task runs in its own worker thread, so total latency is roughly that
+    of the slowest task. A failing task does not affect the others.
+    
+    Args:
+        processor: DocumentProcessor used for every task
+        tasks: Task identifiers to run
+        cv_text: Extracted CV text
+        jd_text: Optional extracted JD text
+        request_id: Unique request identifier, used for logging
+        
+    Returns:
+        Dict mapping each task to {"status": "success", "result": ...}
+        or {"status": "error", "error": ...}
+    """
+    def run_task(task: str) -> Dict[str, Any]:
+        try:
+            bundle = get_task_bundle(task)
+            return {"status": "success", "result": processor.process_text(cv_text, jd_text, bundle=bundle)}
+        except Exception as e:
+            logger.error(f"Task '{task}' failed for request {request_id}: {str(e)}", exc_info=True)
+            return {"status": "error", "error": task_error_message(e)}
+
+    max_workers = max(1, min(len(tasks), config.MULTI_TASK_MAX_WORKERS))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cv-task") as executor:
+        return dict(zip(tasks, executor.map(run_task, tasks)))
+
+def wants_stream(request: Request) -> bool:
+    """Return True if the client opted in to a server-sent events response.
+    
+    Args:
+        request: Flask Request object
+        
+    Returns:
+        bool: True if 'stream' is set in the form or text/event-stream is accepted
+    """
+    return stream_requested(request.form.get('stream', ''), request.headers.get('Accept', ''))
+
+def stream_requested(stream_field: str, accept: str) -> bool:
+    """Return True if a 'stream' form value or Accept header asks for server-sent events."""
+    return stream_field.lower() in ('true', '1', 'yes') or 'text/event-stream' in accept
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def with_truncation(body: Dict[str, Any], processor: DocumentProcessor) -> Dict[str, Any]:
+    """Add the truncation metadata of the request's documents to a response body, if any were truncated."""
+    if processor.truncated:
+        body["truncated"] = processor.truncated
+    return body
+
+def sse_events(
+    events: Iterator[Dict[str, Any]],
+    request_id: str,
+    truncated: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    """Format model stream events as server-sent events (see stream_response).
+    
+    Args:
+        events: Events from GeminiClient.generate_content_stream
+        request_id: Unique request identifier
+        truncated: Truncation metadata of the extracted documents, sent with the start event
+        
+    Yields:
+        Formatted server-sent events
+    """
+    yield format_sse("start", {"request_id": request_id, **({"truncated": truncated} if truncated else {})})
+    try:
+        for event in events:
+            if event["type"] == "chunk":
+                yield format_sse("chunk", {"text": event["text"]})
+            elif event["type"] == "field":
+                yield format_sse("field", {"path": event["path"], "value": event["value"]})
+            elif event["type"] == "result":
+                yield format_sse("result", {"result": event["result"], "request_id": request_id})
+    except Exception as e:
+        logger.error(f"Error streaming response for request {request_id}: {str(e)}", exc_info=True)
+        yield format_sse("error", {"error": "Failed to process request", "request_id": request_id})
+
+def stream_response(
+    events: Iterator[Dict[str, Any]],
+    request_id: str,
+    truncated: Optional[Dict[str, Any]] = None
+) -> Response:
+    """Relay model stream events to the client as server-sent events.
+    
+    Emits a 'start' event straight away, a 'chunk' event per piece of model
+    output, a 'field' event per validated field of the response as it closes
+    and a final 'result' event carrying the schema-validated result, or an
+    'error' event if the stream fails.
+    
+    Args:
+        events: Events from GeminiClient.generate_content_stream
+        request_id: Unique request identifier
+        truncated: Truncation metadata of the extracted documents, sent with the start event
+        
+    Returns:
+        Response: Streaming text/event-stream response
+    """
+    generate = sse_events(events, request_id, truncated)
+    body = stream_with_context(generate) if has_request_context() else generate
+    response = Response(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 def process_post_request(request: Request, request_id: str) -> Response:
     """Process POST request for CV optimization.
     
+    A single 'task' form field returns {"result": ...}. A 'tasks' field
+    (repeated or comma-separated) extracts the CV once, runs every task
+    concurrently and returns {"results": {task: {"status": ..., ...}}}.
+    Single-task requests may opt in to a server-sent events response (see
+    wants_stream and stream_response).
+    
     Args:
         request: Flask Request object
         request_id: Unique request identifier
@@ -337,44 +711,93 @@ def process_post_request(request: Request, request_id: str) -> Response:
         # Validate request data
         if not request.files.get('cv_file'):
             return make_response(jsonify({"error": "No CV file provided"}), 400)
-            
-        task = request.form.get('task')
-        if not task or task not in SCHEMA_REGISTRY:
-            return make_response(jsonify({"error": "Invalid task specified"}), 400)
-            
-        # Load required resources
-        system_prompt, user_prompt, few_shot_examples, schema_model = fetch_resources(task)
-        
-        # Process CV file - handle as binary
-        cv_file = request.files['cv_file']
-        cv_content = cv_file.read()  # Keep as bytes
-        
-        # Get optional JD if provided
-        jd_content = None
-        if 'jd_file' in request.files:
-            jd_file = request.files['jd_file']
-            jd_content = jd_file.read()  # Keep as bytes
-        
-        # Initialize clients if needed
-        if not storage_client:
-            initialize_clients()
-        
-        # Process document
-        processor = DocumentProcessor(
-            storage_client=storage_client,
-            vertex_client=vertex_client,
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            few_shot_examples=few_shot_examples,
-            schema_model=schema_model
-        )
         
-        result = processor.process_document(cv_content, jd_content)
+        tasks = parse_requested_tasks(request)
+        if tasks is not None:
+            if not tasks or any(task not in SCHEMA_REGISTRY for task in tasks):
+                return make_response(jsonify({"error": "Invalid task specified"}), 400)
+            bundle = None
+        else:
+            task = request.form.get('task')
+            if not task or task not in SCHEMA_REGISTRY:
+                return make_response(jsonify({"error": "Invalid task specified"}), 400)
+                
+            # Load required resources
+            bundle = get_task_bundle(task)
         
-        return add_security_headers(make_response(
-            jsonify({"result": result, "request_id": request_id}),
-            200
-        ))
+        stream = wants_stream(request)
+        if stream and tasks is not None:
+            return make_response(jsonify({"error": "Streaming is only supported for single-task requests"}), 400)
+        
+        pdf_backend = request.form.get('pdf_backend') or None
+        if pdf_backend and pdf_backend not in PDF_BACKENDS:
+            return make_response(jsonify({"error": "Invalid PDF backend specified"}), 400)
+        
+        # Fail fast while Vertex AI is known to be down instead of tying up a worker
+        if circuit_breaker.is_open(circuit_breaker.VERTEX):
+            response = make_response(
+                jsonify({"error": "Vertex AI is temporarily unavailable", "request_id": request_id}),
+                503
+            )
+            response.headers['Retry-After'] = str(circuit_breaker.retry_after_seconds(circuit_breaker.VERTEX))
+            return add_security_headers(response)
+        
+        # Spool the uploads once; their buffers are passed on without copies
+        with ExitStack() as uploads:
+            cv_content = uploads.enter_context(spool_upload(request.files['cv_file'].stream)).view
+            
+            # Get optional JD if provided
+            jd_content = None
+            if 'jd_file' in request.files:
+                jd_content = uploads.enter_context(spool_upload(request.files['jd_file'].stream)).view
+            
+            # Initialize clients if needed
+            if not storage_client:
+                initialize_clients()
+            
+            if tasks is not None:
+                processor = DocumentProcessor(
+                    storage_client=storage_client,
+                    vertex_client=vertex_client,
+                    pdf_backend=pdf_backend
+                )
+                cv_text, jd_text = processor.extract_texts(cv_content, jd_content)
+                results = process_tasks(processor, tasks, cv_text, jd_text, request_id)
+                all_failed = all(r["status"] == "error" for r in results.values())
+                return add_security_headers(make_response(
+                    jsonify(with_truncation({"results": results, "request_id": request_id}, processor)),
+                    500 if all_failed else 200
+                ))
+            
+            if stream:
+                processor = DocumentProcessor(
+                    storage_client=storage_client,
+                    vertex_client=get_gemini_client(),
+                    pdf_backend=pdf_backend
+                )
+                # Extraction errors are still reported as a regular JSON error
+                cv_text, jd_text = processor.extract_texts(cv_content, jd_content)
+                events = processor.process_text_stream(cv_text, jd_text, bundle=bundle)
+                return add_security_headers(stream_response(events, request_id, processor.truncated))
+            
+            # Process document
+            processor = DocumentProcessor(
+                storage_client=storage_client,
+                vertex_client=vertex_client,
+                system_prompt=bundle.system_prompt,
+                user_prompt=bundle.user_prompt,
+                few_shot_examples=bundle.few_shot_examples,
+                schema_model=bundle.schema_model,
+                prompt_template=bundle.prompt_template,
+                pdf_backend=pdf_backend
+            )
+            
+            result = processor.process_document(cv_content, jd_content, bundle=bundle)
+            
+            return add_security_headers(make_response(
+                jsonify(with_truncation({"result": result, "request_id": request_id}, processor)),
+                200
+            ))
         
     except Exception as e:
         logger.error(f"Error processing POST request {request_id}: {str(e)}", exc_info=True)
@@ -387,4 +810,8 @@ def process_post_request(request: Request, request_id: str) -> Response:
         return make_response(
             jsonify({"error": "Failed to process request", "request_id": request_id}),
             500
-        ) 
\ No newline at end of file
+        )
+
+if config.WARMUP_ON_STARTUP:
+    warmup_task_bundles()
+    get_extraction_pool().start()
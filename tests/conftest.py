@@ -91,4 +91,20 @@ def mock_flask_request():
         def get_json(self):
             return {}
             
-    return MockRequest() 
\ No newline at end of file
+    return MockRequest() 
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """Start every test with closed circuit breakers."""
+    from utils import circuit_breaker
+    circuit_breaker.reset_breakers()
+    yield
+    circuit_breaker.reset_breakers()
+
+@pytest.fixture(autouse=True)
+def reset_firestore_clients():
+    """Give every test its own process-wide Firestore clients."""
+    from utils import document_processor
+    document_processor.close_firestore_clients()
+    yield
+    document_processor.close_firestore_clients()
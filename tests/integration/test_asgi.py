@@ -0,0 +1,144 @@
+import json
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from starlette.testclient import TestClient
+
+import asgi
+import main
+from tests.integration.test_main_flow import mock_load_resource_file
+
+
+@pytest.fixture
+def client():
+    """TestClient for the ASGI app with header validation and auth mocked out."""
+    main.invalidate_resources()
+    with patch("asgi.check_request_headers", return_value=None), \
+         patch("main.get_resource_version", return_value="1"), \
+         patch("main.validate_jwt", return_value={'sub': 'mock-user-id'}):
+        yield TestClient(asgi.app)
+
+
+@pytest.fixture
+def cv_upload(sample_cv_path):
+    with open(sample_cv_path, 'rb') as f:
+        return {'cv_file': (sample_cv_path.name, f.read(), 'application/pdf')}
+
+
+HEADERS = {'Authorization': 'Bearer mock-token', 'X-Request-ID': 'test-request-id'}
+
+
+def _mock_processor(mock_doc_processor_class):
+    processor = MagicMock()
+    processor.truncated = {}
+    processor.extract_texts_async = AsyncMock(return_value=("CV text", None))
+    mock_doc_processor_class.return_value = processor
+    return processor
+
+
+@patch("main.load_resource_file", side_effect=mock_load_resource_file)
+@patch("main.get_gemini_client")
+@patch("asgi.DocumentProcessor")
+@patch("main.storage_client", new_callable=MagicMock)
+def test_single_task_request(mock_storage_client, mock_doc_processor_class, mock_get_gemini_client,
+                             mock_loader, client, cv_upload):
+    """Test that a single task is awaited on the async processor path."""
+    processor = _mock_processor(mock_doc_processor_class)
+    processor.process_text_async = AsyncMock(return_value={"status": "success", "data": {"a": 1}})
+
+    response = client.post('/', data={'task': 'parsing'}, files=cv_upload, headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.json() == {"result": {"status": "success", "data": {"a": 1}}, "request_id": "test-request-id"}
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+    processor.extract_texts_async.assert_awaited_once()
+    assert processor.process_text_async.await_args.kwargs["bundle"].task == 'parsing'
+    mock_doc_processor_class.assert_called_once_with(
+        storage_client=mock_storage_client,
+        vertex_client=mock_get_gemini_client.return_value,
+        pdf_backend=None
+    )
+
+
+@patch("main.load_resource_file", side_effect=mock_load_resource_file)
+@patch("main.get_gemini_client")
+@patch("asgi.DocumentProcessor")
+@patch("main.storage_client", new_callable=MagicMock)
+def test_multi_task_request(mock_storage_client, mock_doc_processor_class, mock_get_gemini_client,
+                            mock_loader, client, cv_upload):
+    """Test that tasks run concurrently and fail independently."""
+    processor = _mock_processor(mock_doc_processor_class)
+
+    async def process_text_async(cv_text, jd_text, bundle):
+        if bundle.task == 'ka':
+            raise Exception("Vertex AI error: quota exceeded")
+        return {"status": "success", "task": bundle.task}
+
+    processor.process_text_async = AsyncMock(side_effect=process_text_async)
+
+    response = client.post('/', data={'tasks': 'parsing,ps,ka'}, files=cv_upload, headers=HEADERS)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results['parsing'] == {"status": "success", "result": {"status": "success", "task": "parsing"}}
+    assert results['ka'] == {"status": "error", "error": "Vertex AI error: quota exceeded"}
+    assert processor.process_text_async.await_count == 3
+
+
+@patch("main.load_resource_file", side_effect=mock_load_resource_file)
+@patch("main.get_gemini_client")
+@patch("asgi.DocumentProcessor")
+@patch("main.storage_client", new_callable=MagicMock)
+def test_streaming_request(mock_storage_client, mock_doc_processor_class, mock_get_gemini_client,
+                           mock_loader, client, cv_upload):
+    """Test that a streaming request relays events as server-sent events."""
+    processor = _mock_processor(mock_doc_processor_class)
+    processor.truncated = {"cv": {"truncated_by": "max_chars", "chars": 200000}}
+    processor.process_text_stream.return_value = iter([
+        {"type": "chunk", "text": "{}"},
+        {"type": "result", "result": {"status": "success", "data": {}}}
+    ])
+
+    response = client.post('/', data={'task': 'parsing', 'stream': 'true'}, files=cv_upload, headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/event-stream')
+    blocks = response.text.strip().split("\n\n")
+    assert [block.split("\n")[0][len("event: "):] for block in blocks] == ["start", "chunk", "result"]
+    assert json.loads(blocks[0].split("\n")[1][len("data: "):])["truncated"] == processor.truncated
+
+
+@patch("asgi.DocumentProcessor")
+@patch("asgi.circuit_breaker.is_open", return_value=True)
+@patch("main.load_resource_file", side_effect=mock_load_resource_file)
+def test_open_vertex_circuit_fails_fast(mock_loader, mock_is_open, mock_doc_processor_class, client, cv_upload):
+    """Test that requests are rejected with 503 while the Vertex AI breaker is open."""
+    response = client.post('/', data={'task': 'parsing'}, files=cv_upload, headers=HEADERS)
+
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    mock_doc_processor_class.assert_not_called()
+
+
+@patch("main.load_resource_file", side_effect=mock_load_resource_file)
+def test_rejects_invalid_task_and_missing_auth(mock_loader, client, cv_upload):
+    """Test request validation and authentication."""
+    response = client.post('/', data={'task': 'unknown'}, files=cv_upload, headers=HEADERS)
+    assert response.status_code == 400
+
+    response = client.post('/', data={'task': 'parsing', 'pdf_backend': 'unknown'}, files=cv_upload, headers=HEADERS)
+    assert response.status_code == 400
+
+    response = client.post('/', data={'task': 'parsing'}, files=cv_upload, headers={'X-Request-ID': 'id'})
+    assert response.status_code == 401
+    assert response.json() == {"error": "No authorization header"}
+
+
+def test_health(client):
+    """Test the health endpoint."""
+    response = client.get('/health', headers=HEADERS)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "healthy"
+    assert "circuit_breakers" in body
+    assert {"hits", "misses", "evictions", "bytes"} <= body["text_cache"].keys()
@@ -5,12 +5,14 @@ from pathlib import Path
 import functions_framework
 from werkzeug.datastructures import FileStorage, Headers
 import io
+import os
 from flask import Request, Flask
 from werkzeug.test import EnvironBuilder
 import google.cloud.aiplatform as aiplatform
 from vertexai.generative_models import GenerativeModel as VertexGenerativeModel
 
 # Import main application module (assuming it's structured like this)
+import config
 import main
 from models.schemas import ParsingResponseSchema, ScoringResponseSchema
 from models.schemas import ParsingDataModel, SkillModel, SkillProficiencyEnum, SkillTypeEnum, ExperienceModel, EducationModel, LocationModel
@@ -55,7 +57,10 @@ class TestMainFlow:
     @pytest.fixture(autouse=True)
     def setup_app_context(self, test_app):
         """Setup Flask application context for all tests."""
-        with test_app.app_context():
+        # Resources are cached process-wide; start each test from a cold cache.
+        # Loading a resource probes its version, which must not reach GCS here.
+        main.invalidate_resources()
+        with test_app.app_context(), patch("main.get_resource_version", return_value="1"):
             yield
     
     def _build_request(self, data, files=None, headers=None, method='POST'):
@@ -120,6 +125,7 @@ class TestMainFlow:
 
         # Mock document processor
         mock_doc_processor = MagicMock()
+        mock_doc_processor.truncated = {}
         mock_doc_processor.process_document.return_value = {
             "status": "success",
             "data": {
@@ -219,6 +225,7 @@ class TestMainFlow:
 
         # Mock document processor
         mock_doc_processor = MagicMock()
+        mock_doc_processor.truncated = {}
         mock_scoring_data = {
             "scores": {
                 "overall": 85,
@@ -303,6 +310,7 @@ class TestMainFlow:
 
         # Mock document processor to raise an error
         mock_doc_processor = MagicMock()
+        mock_doc_processor.truncated = {}
         mock_doc_processor.process_document.side_effect = Exception("Vertex AI error: Failed to generate content")
         mock_doc_processor_class.return_value = mock_doc_processor
 
@@ -336,6 +344,249 @@ class TestMainFlow:
         assert "error" in response_data
         assert "Vertex AI error" in response_data["error"]
 
+    @patch("main.load_resource_file", side_effect=mock_load_resource_file)
+    @patch("main.validate_jwt")
+    @patch("main.DocumentProcessor")
+    @patch("main.storage_client", new_callable=MagicMock)
+    def test_multi_task_request(self, mock_storage_client, mock_doc_processor_class,
+                                mock_verify_jwt, mock_loader, sample_cv_path, test_app):
+        """Test that a multi-task request extracts once and reports per-task status."""
+        mock_verify_jwt.return_value = {'sub': 'mock-user-id'}
+
+        mock_doc_processor = MagicMock()
+        mock_doc_processor.truncated = {"cv": {"truncated_by": "max_pages", "chars": 7, "pages_extracted": 30, "total_pages": 42}}
+        mock_doc_processor.extract_texts.return_value = ("CV text", None)
+
+        def process_text(cv_text, jd_text, bundle):
+            if bundle.task == 'ka':
+                raise Exception("Vertex AI error: quota exceeded")
+            return {"status": "success", "task": bundle.task}
+
+        mock_doc_processor.process_text.side_effect = process_text
+        mock_doc_processor_class.return_value = mock_doc_processor
+
+        with open(sample_cv_path, 'rb') as f:
+            cv_file = FileStorage(stream=io.BytesIO(f.read()), filename=sample_cv_path.name,
+                                  content_type='application/pdf')
+
+        request = self._build_request(
+            {'tasks': 'parsing, ps,ka,parsing'},
+            files={'cv_file': cv_file},
+            headers={'Authorization': 'Bearer mock-token'}
+        )
+        response = self._call_function(request, test_app)
+
+        assert response.status_code == 200
+        results = json.loads(response.data)["results"]
+        assert json.loads(response.data)["truncated"]["cv"]["truncated_by"] == "max_pages"
+        assert set(results) == {'parsing', 'ps', 'ka'}
+        assert results['parsing'] == {"status": "success", "result": {"status": "success", "task": "parsing"}}
+        assert results['ps']["status"] == "success"
+        assert results['ka'] == {"status": "error", "error": "Vertex AI error: quota exceeded"}
+        mock_doc_processor.extract_texts.assert_called_once()
+        assert mock_doc_processor.process_text.call_count == 3
+
+    @patch("main.load_resource_file", side_effect=mock_load_resource_file)
+    @patch("main.validate_jwt")
+    @patch("main.DocumentProcessor")
+    @patch("main.storage_client", new_callable=MagicMock)
+    def test_large_upload_is_spooled_and_released(self, mock_storage_client, mock_doc_processor_class,
+                                                  mock_verify_jwt, mock_loader, sample_cv_path, test_app,
+                                                  tmp_path):
+        """Test that a large CV reaches extraction as a view of a spool file that is deleted afterwards."""
+        mock_verify_jwt.return_value = {'sub': 'mock-user-id'}
+        seen = {}
+
+        def extract_texts(cv_content, jd_content):
+            seen["type"] = type(cv_content)
+            seen["content"] = bytes(cv_content)
+            seen["spool_files"] = os.listdir(tmp_path)
+            return "CV text", None
+
+        mock_doc_processor = MagicMock()
+        mock_doc_processor.truncated = {}
+        mock_doc_processor.extract_texts.side_effect = extract_texts
+        mock_doc_processor.process_text.return_value = {"status": "success"}
+        mock_doc_processor_class.return_value = mock_doc_processor
+
+        content = sample_cv_path.read_bytes()
+        request = self._build_request(
+            {'tasks': 'parsing'},
+            files={'cv_file': FileStorage(stream=io.BytesIO(content), filename=sample_cv_path.name,
+                                          content_type='application/pdf')},
+            headers={'Authorization': 'Bearer mock-token'}
+        )
+        with patch.object(config, "UPLOAD_SPOOL_MAX_MEMORY_BYTES", 1024), \
+                patch.object(config, "UPLOAD_SPOOL_DIR", str(tmp_path)):
+            response = self._call_function(request, test_app)
+
+        assert response.status_code == 200
+        assert seen["type"] is memoryview
+        assert seen["content"] == content
+        assert len(seen["spool_files"]) == 1
+        assert not os.listdir(tmp_path)
+
+    @patch("main.validate_jwt")
+    def test_multi_task_request_rejects_unknown_task(self, mock_verify_jwt, sample_cv_path, test_app):
+        """Test that a multi-task request with an unknown task is rejected."""
+        mock_verify_jwt.return_value = {'sub': 'mock-user-id'}
+        with open(sample_cv_path, 'rb') as f:
+            cv_file = FileStorage(stream=io.BytesIO(f.read()), filename=sample_cv_path.name,
+                                  content_type='application/pdf')
+
+        request = self._build_request(
+            {'tasks': 'parsing,unknown'},
+            files={'cv_file': cv_file},
+            headers={'Authorization': 'Bearer mock-token'}
+        )
+        response = self._call_function(request, test_app)
+
+        assert response.status_code == 400
+
+    @patch("main.load_resource_file", side_effect=mock_load_resource_file)
+    @patch("main.validate_jwt")
+    def test_request_rejects_unknown_pdf_backend(self, mock_verify_jwt, mock_loader, sample_cv_path, test_app):
+        """Test that a request for an unknown PDF backend is rejected."""
+        mock_verify_jwt.return_value = {'sub': 'mock-user-id'}
+        with open(sample_cv_path, 'rb') as f:
+            cv_file = FileStorage(stream=io.BytesIO(f.read()), filename=sample_cv_path.name,
+                                  content_type='application/pdf')
+
+        request = self._build_request(
+            {'task': 'parsing', 'pdf_backend': 'unknown'},
+            files={'cv_file': cv_file},
+            headers={'Authorization': 'Bearer mock-token'}
+        )
+        response = self._call_function(request, test_app)
+
+        assert response.status_code == 400
+        assert response.get_json() == {"error": "Invalid PDF backend specified"}
+
+    @patch("main.load_resource_file", side_effect=mock_load_resource_file)
+    @patch("main.validate_jwt")
+    @patch("main.get_gemini_client")
+    @patch("main.DocumentProcessor")
+    @patch("main.storage_client", new_callable=MagicMock)
+    def test_streaming_request(self, mock_storage_client, mock_doc_processor_class, mock_get_gemini_client,
+                               mock_verify_jwt, mock_loader, sample_cv_path, test_app):
+        """Test that a streaming request relays chunks as server-sent events."""
+        mock_verify_jwt.return_value = {'sub': 'mock-user-id'}
+
+        mock_doc_processor = MagicMock()
+        mock_doc_processor.truncated = {}
+        mock_doc_processor.extract_texts.return_value = ("CV text", None)
+        mock_doc_processor.process_text_stream.return_value = iter([
+            {"type": "chunk", "text": '{"status": '},
+            {"type": "chunk", "text": '"success"}'},
+            {"type": "result", "result": {"status": "success", "data": {"status": "success"}}}
+        ])
+        mock_doc_processor_class.return_value = mock_doc_processor
+
+        with open(sample_cv_path, 'rb') as f:
+            cv_file = FileStorage(stream=io.BytesIO(f.read()), filename=sample_cv_path.name,
+                                  content_type='application/pdf')
+
+        request = self._build_request(
+            {'task': 'parsing', 'stream': 'true', 'pdf_backend': 'pypdf'},
+            files={'cv_file': cv_file},
+            headers={'Authorization': 'Bearer mock-token'}
+        )
+        response = self._call_function(request, test_app)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        events = [
+            (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+            for block in response.get_data(as_text=True).strip().split("\n\n")
+        ]
+        assert [name for name, _ in events] == ["start", "chunk", "chunk", "result"]
+        assert events[1][1] == {"text": '{"status": '}
+        assert events[-1][1]["result"]["status"] == "success"
+        assert events[-1][1]["request_id"] == "test-request-id"
+        mock_doc_processor_class.assert_called_once_with(
+            storage_client=mock_storage_client,
+            vertex_client=mock_get_gemini_client.return_value,
+            pdf_backend='pypdf'
+        )
+
+    @patch("main.load_resource_file", side_effect=mock_load_resource_file)
+    @patch("main.validate_jwt")
+    @patch("main.DocumentProcessor")
+    @patch("main.circuit_breaker.is_open", return_value=True)
+    def test_open_vertex_circuit_fails_fast(self, mock_is_open, mock_doc_processor_class,
+                                            mock_verify_jwt, mock_loader, sample_cv_path, test_app):
+        """Test that requests are rejected with 503 while the Vertex AI breaker is open."""
+        mock_verify_jwt.return_value = {'sub': 'mock-user-id'}
+
+        with open(sample_cv_path, 'rb') as f:
+            cv_file = FileStorage(stream=io.BytesIO(f.read()), filename=sample_cv_path.name,
+                                  content_type='application/pdf')
+
+        request = self._build_request(
+            {'task': 'parsing'},
+            files={'cv_file': cv_file},
+            headers={'Authorization': 'Bearer mock-token'}
+        )
+        response = self._call_function(request, test_app)
+
+        assert response.status_code == 503
+        assert int(response.headers['Retry-After']) >= 1
+        mock_is_open.assert_called_once_with("vertex")
+        mock_doc_processor_class.assert_not_called()
+
+    @patch("main.load_resource_file", side_effect=mock_load_resource_file)
+    def test_task_bundle_reused_across_requests(self, mock_loader):
+        """Test that task resources are loaded once and the bundle is reused."""
+        first = main.get_task_bundle('parsing')
+        second = main.get_task_bundle('parsing')
+
+        assert first is second
+        assert mock_loader.call_count == 4
+        assert first.schema_model is ParsingResponseSchema
+        rendered = first.prompt_template.render(cv_content="CV text", jd_content="")
+        assert "CV text" in rendered
+        assert "Mock few shot examples" in rendered
+
+    @patch("main.get_secret", return_value="new-secret")
+    def test_validate_jwt_caches_secret_and_verified_tokens(self, mock_get_secret):
+        """Test that repeat validations skip the secret fetch and signature check."""
+        import jwt
+        import time
+        from utils.cache import ExpiringLRUCache
+        from utils.secret_manager import RefreshingSecret
+
+        secret = RefreshingSecret(lambda: main.get_secret('jwt-secret'), refresh_interval=300,
+                                  rotation_grace=3600, background=False)
+        token = jwt.encode({"sub": "user-1", "exp": int(time.time()) + 600}, "new-secret", algorithm="HS256")
+
+        with patch.object(main, "jwt_secret", secret), \
+             patch.object(main, "verified_tokens", ExpiringLRUCache(maxsize=10)), \
+             patch("main.jwt.decode", wraps=jwt.decode) as mock_decode:
+            assert main.validate_jwt(token)["sub"] == "user-1"
+            assert main.validate_jwt(token)["sub"] == "user-1"
+
+        mock_get_secret.assert_called_once_with('jwt-secret')
+        mock_decode.assert_called_once()
+
+    def test_validate_jwt_accepts_rotated_out_secret(self):
+        """Test that tokens signed with the previous secret validate during the grace period."""
+        import jwt
+        import time
+        from utils.cache import ExpiringLRUCache
+        from utils.secret_manager import RefreshingSecret
+
+        fetch = MagicMock(side_effect=["old-secret", "new-secret"])
+        secret = RefreshingSecret(fetch, refresh_interval=300, rotation_grace=3600, background=False)
+        secret.keys()
+        secret.refresh()
+        token = jwt.encode({"sub": "user-2", "exp": int(time.time()) + 600}, "old-secret", algorithm="HS256")
+
+        with patch.object(main, "jwt_secret", secret), \
+             patch.object(main, "verified_tokens", ExpiringLRUCache(maxsize=10)):
+            assert main.validate_jwt(token)["sub"] == "user-2"
+            with pytest.raises(jwt.InvalidSignatureError):
+                main.validate_jwt(jwt.encode({"sub": "x", "exp": int(time.time()) + 600}, "wrong", algorithm="HS256"))
+
 
 """
 # E2E Test Outline (Not Implemented)
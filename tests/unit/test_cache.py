@@ -0,0 +1,172 @@
+import pytest
+from unittest.mock import MagicMock
+
+from utils.cache import ResourceCache, ExpiringLRUCache, ByteLRUCache
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResourceCache:
+    """Test cases for ResourceCache."""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def cache(self, clock):
+        return ResourceCache(ttl_seconds=60, clock=clock)
+
+    def test_miss_then_hit(self, cache):
+        """Test that a loaded value is served from memory within the TTL."""
+        loader = MagicMock(return_value="prompt text")
+        probe = MagicMock(return_value="1")
+
+        assert cache.get("key", loader, probe) == "prompt text"
+        assert cache.get("key", loader, probe) == "prompt text"
+
+        loader.assert_called_once()
+        # The version is probed once for the load, not while the entry is fresh
+        probe.assert_called_once()
+        assert cache.stats["misses"] == 1
+        assert cache.stats["hits"] == 1
+
+    def test_revalidation_with_unchanged_version(self, cache, clock):
+        """Test that an expired entry with an unchanged version is not reloaded."""
+        loader = MagicMock(return_value="v1 text")
+        probe = MagicMock(return_value="1")
+
+        cache.get("key", loader, probe)
+        # The cold miss records the version it loaded
+        assert cache.version_of("key") == "1"
+        clock.now = 61
+        assert cache.get("key", loader, probe) == "v1 text"
+        clock.now = 122
+        assert cache.get("key", loader, probe) == "v1 text"
+
+        loader.assert_called_once()
+        assert probe.call_count == 3
+        assert cache.stats["revalidations"] == 2
+
+    def test_reload_on_version_change(self, cache, clock):
+        """Test that a changed source version triggers a reload."""
+        loader = MagicMock(side_effect=["old", "new"])
+        probe = MagicMock(side_effect=["1", "1", "2"])
+
+        cache.get("key", loader, probe)
+        clock.now = 61
+        assert cache.get("key", loader, probe) == "old"
+        clock.now = 122
+        assert cache.get("key", loader, probe) == "new"
+        assert cache.version_of("key") == "2"
+        assert cache.stats["reloads"] == 1
+
+    def test_probe_failure_serves_cached_value(self, cache, clock):
+        """Test that a failing version probe keeps serving the cached value."""
+        loader = MagicMock(return_value="cached")
+        probe = MagicMock(side_effect=Exception("GCS unavailable"))
+
+        cache.get("key", loader, probe)
+        clock.now = 61
+        assert cache.get("key", loader, probe) == "cached"
+        loader.assert_called_once()
+
+    def test_probe_failure_on_cold_miss_still_loads(self, cache):
+        """Test that an unreachable version source does not prevent the first load."""
+        loader = MagicMock(return_value="loaded")
+        probe = MagicMock(side_effect=Exception("GCS unavailable"))
+
+        assert cache.get("key", loader, probe) == "loaded"
+        assert cache.version_of("key") is None
+
+    def test_invalidate(self, cache):
+        """Test explicit invalidation of all or matching entries."""
+        cache.get(("parsing", "examples"), lambda: "a")
+        cache.get(("ps", "examples"), lambda: "b")
+
+        assert cache.invalidate(lambda key: key[0] == "parsing") == 1
+        loader = MagicMock(return_value="reloaded")
+        assert cache.get(("parsing", "examples"), loader) == "reloaded"
+        loader.assert_called_once()
+
+        assert cache.invalidate() == 2
+
+
+class TestExpiringLRUCache:
+    """Test cases for ExpiringLRUCache."""
+
+    def test_expiry(self):
+        """Test that entries are dropped once their expiry time passes."""
+        clock = FakeClock()
+        cache = ExpiringLRUCache(maxsize=10, clock=clock)
+        cache.set("token", {"sub": "user"}, expires_at=100)
+
+        clock.now = 99
+        assert cache.get("token") == {"sub": "user"}
+        clock.now = 100
+        assert cache.get("token") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = ExpiringLRUCache(maxsize=2, clock=FakeClock())
+        cache.set("a", 1, expires_at=100)
+        cache.set("b", 2, expires_at=100)
+        cache.get("a")
+        cache.set("c", 3, expires_at=100)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+
+class TestByteLRUCache:
+    """Test cases for ByteLRUCache."""
+
+    def test_hit_and_miss_counters(self):
+        """Test that hits and misses are counted."""
+        cache = ByteLRUCache(max_bytes=100, sizeof=len)
+        cache.set("a", "x" * 10)
+
+        assert cache.get("a") == "x" * 10
+        assert cache.get("b") is None
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["bytes"] == 10
+
+    def test_evicts_by_bytes(self):
+        """Test that least recently used entries are evicted to fit the byte budget."""
+        cache = ByteLRUCache(max_bytes=100, sizeof=len)
+        cache.set("a", "x" * 40)
+        cache.set("b", "y" * 40)
+        cache.get("a")
+        cache.set("c", "z" * 40)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] == 80
+
+    def test_oversized_value_not_cached(self):
+        """Test that a value larger than the whole budget is rejected."""
+        cache = ByteLRUCache(max_bytes=10, sizeof=len)
+        assert cache.set("big", "x" * 11) is False
+        assert cache.stats()["entries"] == 0
+
+    def test_replacing_key_updates_size(self):
+        """Test that overwriting a key accounts for the new size only."""
+        cache = ByteLRUCache(max_bytes=100, sizeof=len)
+        cache.set("a", "x" * 30)
+        cache.set("a", "x" * 50)
+        assert cache.stats()["bytes"] == 50
+        assert cache.stats()["entries"] == 1
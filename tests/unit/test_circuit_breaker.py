@@ -0,0 +1,136 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+from utils import circuit_breaker
+
+
+@pytest.fixture(autouse=True)
+def small_breakers(mocker):
+    """Trip after two failures and allow a trial call after 30 seconds."""
+    mocker.patch('config.BREAKER_FAIL_MAX', 2)
+    mocker.patch('config.BREAKER_RESET_TIMEOUT_SECONDS', 30)
+
+
+def _fail(error):
+    raise error
+
+
+def test_opens_after_failures_and_rejects():
+    """Test that consecutive upstream failures open the breaker."""
+    for _ in range(2):
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            circuit_breaker.call_with_breaker("vertex", _fail, api_exceptions.ServiceUnavailable("down"))
+
+    func = MagicMock()
+    with pytest.raises(circuit_breaker.CircuitBreakerError):
+        circuit_breaker.call_with_breaker("vertex", func)
+    func.assert_not_called()
+    assert circuit_breaker.is_open("vertex")
+    assert 1 <= circuit_breaker.retry_after_seconds("vertex") <= 30
+
+    metrics = circuit_breaker.get_breaker_metrics()["vertex"]
+    assert metrics["state"] == "open"
+    assert (metrics["failures"], metrics["rejections"], metrics["opened"]) == (2, 1, 1)
+
+def test_client_errors_do_not_count():
+    """Test that invalid requests leave the breaker closed."""
+    for _ in range(3):
+        with pytest.raises(api_exceptions.InvalidArgument):
+            circuit_breaker.call_with_breaker("vertex", _fail, api_exceptions.InvalidArgument("bad"))
+
+    assert not circuit_breaker.is_open("vertex")
+    assert circuit_breaker.call_with_breaker("vertex", lambda: "ok") == "ok"
+
+def test_half_open_trial_closes_breaker(mocker):
+    """Test that a successful trial call after the reset timeout closes the breaker."""
+    mocker.patch('config.BREAKER_RESET_TIMEOUT_SECONDS', 0.05)
+    for _ in range(2):
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            circuit_breaker.call_with_breaker("gcs", _fail, api_exceptions.ServiceUnavailable("down"))
+    assert circuit_breaker.is_open("gcs")
+
+    time.sleep(0.06)
+    assert not circuit_breaker.is_open("gcs")
+    assert circuit_breaker.call_with_breaker("gcs", lambda: "ok") == "ok"
+    assert circuit_breaker.get_breaker_metrics()["gcs"]["state"] == "closed"
+
+def test_half_open_lets_a_single_trial_through(mocker):
+    """Test that concurrent callers fail fast while the half-open trial call runs."""
+    import threading
+
+    mocker.patch('config.BREAKER_RESET_TIMEOUT_SECONDS', 0.05)
+    for _ in range(2):
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            circuit_breaker.call_with_breaker("vertex", _fail, api_exceptions.ServiceUnavailable("down"))
+    time.sleep(0.06)
+
+    trial_started, release_trial = threading.Event(), threading.Event()
+
+    def trial():
+        trial_started.set()
+        release_trial.wait(2)
+        return "ok"
+
+    results = []
+    trial_thread = threading.Thread(target=lambda: results.append(circuit_breaker.call_with_breaker("vertex", trial)))
+    trial_thread.start()
+    assert trial_started.wait(2)
+
+    func = MagicMock()
+    for _ in range(3):
+        with pytest.raises(circuit_breaker.CircuitBreakerError):
+            circuit_breaker.call_with_breaker("vertex", func)
+    func.assert_not_called()
+    assert circuit_breaker.is_open("vertex")
+
+    release_trial.set()
+    trial_thread.join()
+    assert results == ["ok"]
+    assert circuit_breaker.get_breaker_metrics()["vertex"]["state"] == "closed"
+    assert circuit_breaker.call_with_breaker("vertex", lambda: "closed") == "closed"
+
+def test_breakers_are_independent():
+    """Test that each upstream service has its own breaker."""
+    for _ in range(2):
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            circuit_breaker.call_with_breaker("firestore", _fail, api_exceptions.ServiceUnavailable("down"))
+
+    assert circuit_breaker.is_open("firestore")
+    assert not circuit_breaker.is_open("vertex")
+
+def test_calls_run_concurrently():
+    """Test that the breaker does not serialize concurrent calls."""
+    import threading
+
+    barrier = threading.Barrier(3, timeout=2)
+    threads = [threading.Thread(target=circuit_breaker.call_with_breaker, args=("vertex", barrier.wait))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not barrier.broken
+    assert circuit_breaker.get_breaker_metrics()["vertex"]["successes"] == 3
+
+def test_async_calls_are_counted_and_rejected():
+    """Test that awaited calls trip and respect the same breaker."""
+    import asyncio
+
+    async def fail():
+        raise api_exceptions.ServiceUnavailable("down")
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(api_exceptions.ServiceUnavailable):
+                await circuit_breaker.call_with_breaker_async("vertex", fail)
+        with pytest.raises(circuit_breaker.CircuitBreakerError):
+            await circuit_breaker.call_with_breaker_async("vertex", fail)
+
+    asyncio.run(run())
+
+    metrics = circuit_breaker.get_breaker_metrics()["vertex"]
+    assert (metrics["failures"], metrics["rejections"], metrics["opened"]) == (2, 1, 1)
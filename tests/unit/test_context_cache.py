@@ -0,0 +1,121 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.context_cache import ContextCacheManager, InMemoryContextCacheBackend
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def backend():
+    return InMemoryContextCacheBackend(lambda record: MagicMock(name=record["name"]))
+
+
+@pytest.fixture
+def manager(backend, clock):
+    return ContextCacheManager(backend, ttl_seconds=3600, refresh_margin_seconds=300,
+                               retry_after_seconds=600, clock=clock)
+
+
+def test_creates_once_and_reuses(manager, backend):
+    """Test that a prefix is cached on first use and reused afterwards."""
+    first = manager.get_model("gemini-2.5-pro", "System", "Examples")
+    second = manager.get_model("gemini-2.5-pro", "System", "Examples")
+
+    assert first is second
+    assert backend.calls == {"create": 1, "extend": 0}
+    assert manager.stats["creates"] == 1 and manager.stats["hits"] == 1
+
+def test_separate_caches_per_model_and_prefix(manager, backend):
+    """Test that the cache key covers the model and both parts of the prefix."""
+    manager.get_model("gemini-2.5-pro", "System", "Examples")
+    manager.get_model("gemini-2.5-flash", "System", "Examples")
+    manager.get_model("gemini-2.5-pro", "Other", "Examples")
+    manager.get_model("gemini-2.5-pro", "System", "Other")
+
+    assert backend.calls["create"] == 4
+
+def test_refreshes_before_expiry(manager, backend, clock):
+    """Test that the TTL is extended once it is within the refresh margin."""
+    model = manager.get_model("gemini-2.5-pro", "System", "Examples")
+    clock.now += 3600 - 200
+
+    assert manager.get_model("gemini-2.5-pro", "System", "Examples") is model
+    assert backend.calls == {"create": 1, "extend": 1}
+    # The refreshed entry is good for another full TTL
+    clock.now += 3000
+    manager.get_model("gemini-2.5-pro", "System", "Examples")
+    assert backend.calls == {"create": 1, "extend": 1}
+
+def test_recreates_after_expiry(manager, backend, clock):
+    """Test that an expired cache is created again rather than extended."""
+    manager.get_model("gemini-2.5-pro", "System", "Examples")
+    clock.now += 4000
+
+    manager.get_model("gemini-2.5-pro", "System", "Examples")
+    assert backend.calls == {"create": 2, "extend": 0}
+
+def test_failure_falls_back_and_backs_off(manager, backend, clock):
+    """Test that failures return None and are not retried until the backoff ends."""
+    backend.fail = True
+    assert manager.get_model("gemini-2.5-pro", "System", "Examples") is None
+    assert manager.get_model("gemini-2.5-pro", "System", "Examples") is None
+    assert manager.stats["failures"] == 1
+
+    backend.fail = False
+    clock.now += 601
+    assert manager.get_model("gemini-2.5-pro", "System", "Examples") is not None
+    assert backend.calls["create"] == 1
+
+def test_failed_refresh_keeps_valid_cache(manager, backend, clock):
+    """Test that a cache whose refresh failed is used until it expires."""
+    model = manager.get_model("gemini-2.5-pro", "System", "Examples")
+    clock.now += 3500
+    backend.fail = True
+
+    assert manager.get_model("gemini-2.5-pro", "System", "Examples") is model
+    assert manager.get_model("gemini-2.5-pro", "System", "Examples") is model
+    assert manager.stats["failures"] == 1
+    clock.now += 200
+    assert manager.get_model("gemini-2.5-pro", "System", "Examples") is None
+
+def test_concurrent_first_use_creates_once(manager, backend):
+    """Test that concurrent requests for a new prefix create one cache."""
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(manager.get_model("gemini-2.5-pro", "System", "Examples")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.calls["create"] == 1
+    assert all(model is models[0] for model in models)
+
+def test_evict_drops_entry_so_it_is_recreated(manager, backend):
+    """Test that an evicted prefix is cached again on next use."""
+    stale = manager.get_model("gemini-2.5-pro", "System", "Examples")
+
+    assert manager.evict("gemini-2.5-pro", "System", "Examples", stale)
+    fresh = manager.get_model("gemini-2.5-pro", "System", "Examples")
+    assert fresh is not stale
+    assert backend.calls["create"] == 2
+    # A late eviction for the stale handle leaves the new entry alone
+    assert not manager.evict("gemini-2.5-pro", "System", "Examples", stale)
+    assert manager.get_model("gemini-2.5-pro", "System", "Examples") is fresh
+    assert manager.stats["evictions"] == 1
@@ -1,12 +1,32 @@
+import asyncio
+import docx
 import pytest
-from unittest.mock import patch, MagicMock, ANY
-from utils.document_processor import DocumentProcessor
+from unittest.mock import patch, AsyncMock, MagicMock, ANY
+from utils.document_processor import DocumentProcessor, get_memory_cache_stats
+from utils.text_extraction import ExtractedText, ExtractionLimits
+import utils.document_processor as document_processor_module
 import io
 import datetime
 from datetime import timezone
+import zipfile
 from contextlib import contextmanager
 
 
+PDF_BYTES = b"%PDF-1.4 PDF content"
+
+
+def _docx_bytes():
+    """Smallest ZIP that is recognised as a DOCX."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/document.xml", "<document/>")
+    return buffer.getvalue()
+
+
+DOCX_BYTES = _docx_bytes()
+
+
 class MockSpan:
     def __init__(self):
         self.attributes = {}
@@ -45,11 +65,15 @@ class TestDocumentProcessor:
             processor = DocumentProcessor()
             # Ensure db is initialized
             processor.db = MagicMock()
+            # The memory cache is process-wide; start each test empty
+            document_processor_module._memory_cache.clear()
+            document_processor_module._response_cache.clear()
             return processor
 
-    @patch("utils.document_processor.PdfReader")
+    @patch("utils.text_extraction.PdfReader")
     def test_extract_text_from_pdf(self, mock_pdf_reader, document_processor):
         """Test extracting text from a PDF file."""
+        document_processor.pdf_backend = "pypdf"
         # Mock the PDF document and page
         mock_page = MagicMock()
         mock_page.extract_text.return_value = "Sample PDF text content"
@@ -59,41 +83,35 @@ class TestDocumentProcessor:
         pdf_content = b"dummy PDF content"
         result = document_processor._extract_text_from_pdf(pdf_content)
 
-        # Verify PdfReader was called with the correct arguments
+        # The document is opened once, for its page count and text alike
         mock_pdf_reader.assert_called_once()
         # Check that the first argument is a BytesIO object
         assert isinstance(mock_pdf_reader.call_args[0][0], io.BytesIO)
 
         # Check returned text
-        assert result == "Sample PDF text content"
-
-    @patch("utils.document_processor.docx.Document")
-    def test_extract_text_from_docx(self, mock_docx_document, document_processor):
-        """Test extracting text from a DOCX file."""
-        # Mock the DOCX document and paragraphs
-        mock_doc = MagicMock()
-        mock_para1 = MagicMock()
-        mock_para1.text = "First paragraph"
-        mock_para2 = MagicMock()
-        mock_para2.text = "Second paragraph"
-        mock_doc.paragraphs = [mock_para1, mock_para2]
-        mock_docx_document.return_value = mock_doc
-
-        # Test with a mock file content
-        docx_content = b"dummy DOCX content"
-        result = document_processor._extract_text_from_docx(docx_content)
-
-        # Verify docx.Document was called with the correct arguments
-        mock_docx_document.assert_called_once()
-        # Check that the first argument is a BytesIO object
-        assert isinstance(mock_docx_document.call_args[0][0], io.BytesIO)
-
-        # Check returned text - should have newlines between paragraphs
-        assert result == "First paragraph\nSecond paragraph"
-
-    @patch("utils.document_processor.PdfReader", side_effect=Exception("PDF error"))
+        assert result == ExtractedText("Sample PDF text content", pages_extracted=1, total_pages=1)
+
+    def test_extract_text_from_docx(self, document_processor):
+        """Test extracting paragraph and table text from a DOCX file."""
+        document = docx.Document()
+        document.add_paragraph("First paragraph")
+        document.add_paragraph("Second paragraph")
+        table = document.add_table(rows=1, cols=2)
+        table.cell(0, 0).text = "Skills"
+        table.cell(0, 1).text = "Python"
+        buffer = io.BytesIO()
+        document.save(buffer)
+
+        result = document_processor._extract_text_from_docx(buffer.getvalue())
+
+        # Paragraphs and table rows on their own lines, cells separated by " | "
+        assert result.text == "First paragraph\nSecond paragraph\nSkills | Python"
+        assert not result.truncated
+
+    @patch("utils.text_extraction.PdfReader", side_effect=Exception("PDF error"))
     def test_extract_text_from_pdf_error(self, mock_pdf_reader, document_processor):
         """Test handling errors when extracting text from a PDF file."""
+        document_processor.pdf_backend = "pypdf"
         # Test with a mock file content
         pdf_content = b"corrupt PDF content"
         result = document_processor._extract_text_from_pdf(pdf_content)
@@ -104,15 +122,14 @@ class TestDocumentProcessor:
         # Check that None is returned on error
         assert result is None
 
-    @patch("utils.document_processor.docx.Document", side_effect=Exception("DOCX error"))
-    def test_extract_text_from_docx_error(self, mock_docx_document, document_processor):
+    def test_extract_text_from_docx_error(self, document_processor):
         """Test handling errors when extracting text from a DOCX file."""
-        # Test with a mock file content
-        docx_content = b"corrupt DOCX content"
-        result = document_processor._extract_text_from_docx(docx_content)
-
-        # Verify docx.Document was called
-        mock_docx_document.assert_called_once()
+        # A DOCX whose document.xml is not well-formed
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("[Content_Types].xml", "<Types/>")
+            archive.writestr("word/document.xml", "<document>")
+        result = document_processor._extract_text_from_docx(buffer.getvalue())
 
         # Check that None is returned on error
         assert result is None
@@ -123,8 +140,8 @@ class TestDocumentProcessor:
     def test_download_and_process_pdf(self, mock_memory_cache, mock_extract_pdf, mock_download, document_processor):
         """Test downloading and processing a PDF file."""
         # Setup mocks
-        mock_download.return_value = (b"PDF content", "application/pdf")
-        mock_extract_pdf.return_value = "Extracted PDF text"
+        mock_download.return_value = (PDF_BYTES, "application/pdf")
+        mock_extract_pdf.return_value = ExtractedText("Extracted PDF text")
         mock_memory_cache.return_value = None
 
         # Mock cache document
@@ -138,7 +155,7 @@ class TestDocumentProcessor:
 
         # Verify mocks were called
         mock_download.assert_called_once_with(test_url)
-        mock_extract_pdf.assert_called_once_with(b"PDF content")
+        mock_extract_pdf.assert_called_once_with(PDF_BYTES)
 
         # Check result
         assert result == "Extracted PDF text"
@@ -149,8 +166,8 @@ class TestDocumentProcessor:
     def test_download_and_process_docx(self, mock_memory_cache, mock_extract_docx, mock_download, document_processor):
         """Test downloading and processing a DOCX file."""
         # Setup mocks
-        mock_download.return_value = (b"DOCX content", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
-        mock_extract_docx.return_value = "Extracted DOCX text"
+        mock_download.return_value = (DOCX_BYTES, "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+        mock_extract_docx.return_value = ExtractedText("Extracted DOCX text")
         mock_memory_cache.return_value = None
 
         # Mock cache document
@@ -164,7 +181,7 @@ class TestDocumentProcessor:
 
         # Verify mocks were called
         mock_download.assert_called_once_with(test_gcs_uri)
-        mock_extract_docx.assert_called_once_with(b"DOCX content")
+        mock_extract_docx.assert_called_once_with(DOCX_BYTES)
 
         # Check result
         assert result == "Extracted DOCX text"
@@ -190,4 +207,434 @@ class TestDocumentProcessor:
 
         # Test with an unsupported content type
         with pytest.raises(ValueError, match="Unsupported file format"):
-            document_processor.download_and_process("gs://bucket/test.unknown") 
\ No newline at end of file
+            document_processor.download_and_process("gs://bucket/test.unknown")
+
+    @patch("utils.document_processor.DocumentProcessor._download_from_url")
+    @patch("utils.document_processor.DocumentProcessor._extract_text_from_pdf")
+    def test_download_and_process_memory_cache_hit(self, mock_extract_pdf, mock_download, document_processor):
+        """Test that a repeat document is served from memory without Firestore."""
+        mock_download.return_value = (PDF_BYTES, "application/pdf")
+        mock_extract_pdf.return_value = ExtractedText("Extracted PDF text")
+        mock_cache_doc = MagicMock()
+        mock_cache_doc.exists = False
+        document_processor.db.collection.return_value.document.return_value.get.return_value = mock_cache_doc
+
+        test_url = "https://example.com/repeat.pdf"
+        assert document_processor.download_and_process(test_url) == "Extracted PDF text"
+        firestore_reads = document_processor.db.collection.return_value.document.return_value.get.call_count
+        hits_before = get_memory_cache_stats()["hits"]
+
+        assert document_processor.download_and_process(test_url) == "Extracted PDF text"
+
+        mock_download.assert_called_once()
+        assert document_processor.db.collection.return_value.document.return_value.get.call_count == firestore_reads
+        assert get_memory_cache_stats()["hits"] == hits_before + 1
+
+    def test_memory_cache_shared_across_instances(self, document_processor):
+        """Test that the memory cache is not bound to a single processor."""
+        document_processor._store_in_memory_cache("shared-key", "shared text")
+        with patch('utils.document_processor.storage.Client'), \
+             patch('utils.document_processor.firestore.Client'):
+            other = DocumentProcessor()
+        assert other._get_from_memory_cache("shared-key") == "shared text"
+
+    def test_firestore_clients_shared_across_instances(self):
+        """Test that processors reuse the process-wide Firestore clients and leave them open."""
+        storage_client = MagicMock()
+        with patch('utils.document_processor.firestore.Client') as mock_client_class, \
+             patch('utils.document_processor.firestore.AsyncClient') as mock_async_client_class:
+            first = DocumentProcessor(storage_client=storage_client)
+            second = DocumentProcessor(storage_client=storage_client)
+            assert first.db is second.db
+            assert first._get_async_db() is second._get_async_db()
+            mock_client_class.assert_called_once()
+            mock_async_client_class.assert_called_once()
+
+            first.cleanup()
+        first.db.close.assert_not_called()
+        second._get_async_db().close.assert_not_called()
+        storage_client.close.assert_not_called()
+
+    @patch("utils.document_processor.DocumentProcessor._extract_text_from_pdf")
+    def test_extract_text_cached_extracts_once(self, mock_extract_pdf, document_processor):
+        """Test that identical upload bytes are only extracted once."""
+        mock_extract_pdf.return_value = ExtractedText("Extracted CV text")
+        mock_cache_doc = MagicMock()
+        mock_cache_doc.exists = False
+        cache_ref = document_processor.db.collection.return_value.document.return_value
+        cache_ref.get.return_value = mock_cache_doc
+
+        for _ in range(6):
+            assert document_processor._extract_text_cached(PDF_BYTES).text == "Extracted CV text"
+
+        mock_extract_pdf.assert_called_once_with(PDF_BYTES)
+        document_processor.db.collection.assert_any_call('document_cache')
+        document_processor.db.collection.return_value.document.assert_any_call(
+            document_processor._get_content_cache_key(PDF_BYTES, "application/pdf")
+        )
+        cache_ref.set.assert_called_once()
+
+    @patch("utils.document_processor.DocumentProcessor._extract_text_from_pdf")
+    @patch("utils.document_processor.DocumentProcessor._extract_text_from_docx", return_value=ExtractedText("Extracted DOCX text"))
+    def test_extract_text_cached_parses_docx_once(self, mock_extract_docx, mock_extract_pdf, document_processor):
+        """Test that a DOCX upload goes straight to the DOCX extractor."""
+        document_processor.db.collection.return_value.document.return_value.get.return_value = MagicMock(exists=False)
+
+        assert document_processor._extract_text_cached(DOCX_BYTES).text == "Extracted DOCX text"
+        mock_extract_pdf.assert_not_called()
+        mock_extract_docx.assert_called_once_with(DOCX_BYTES)
+
+    @patch("utils.document_processor.DocumentProcessor._extract_text_from_pdf")
+    def test_extract_text_cached_rejects_unknown_format(self, mock_extract_pdf, document_processor):
+        """Test that unrecognised uploads are not handed to any parser."""
+        document_processor.db.collection.return_value.document.return_value.get.return_value = MagicMock(exists=False)
+
+        assert document_processor._extract_text_cached(b"plain text CV") is None
+        mock_extract_pdf.assert_not_called()
+
+    @patch("utils.document_processor.DocumentProcessor._download_from_url")
+    @patch("utils.document_processor.DocumentProcessor._extract_text_from_docx", return_value=ExtractedText("Extracted DOCX text"))
+    def test_download_and_process_ignores_wrong_content_type(self, mock_extract_docx, mock_download, document_processor):
+        """Test that the detected format wins over the server's Content-Type."""
+        mock_download.return_value = (DOCX_BYTES, "application/octet-stream")
+        document_processor.db.collection.return_value.document.return_value.get.return_value = MagicMock(exists=False)
+
+        assert document_processor.download_and_process("https://example.com/cv") == "Extracted DOCX text"
+        cache_data = document_processor.db.collection.return_value.document.return_value.set.call_args[0][0]
+        assert cache_data["content_type"] == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+    @patch("utils.document_processor.DocumentProcessor._extract_text_from_pdf")
+    def test_extract_texts_reports_truncation(self, mock_extract_pdf, document_processor):
+        """Test that truncated documents are reported and not cached."""
+        mock_extract_pdf.return_value = ExtractedText("First pages", "max_pages", pages_extracted=30, total_pages=42)
+        document_processor.db.collection.return_value.document.return_value.get.return_value = MagicMock(exists=False)
+
+        assert document_processor.extract_texts(PDF_BYTES) == ("First pages", None)
+        assert document_processor.truncated == {
+            "cv": {"truncated_by": "max_pages", "chars": 11, "pages_extracted": 30, "total_pages": 42}
+        }
+        document_processor.db.collection.return_value.document.return_value.set.assert_not_called()
+
+        mock_extract_pdf.return_value = ExtractedText("Whole CV", pages_extracted=2, total_pages=2)
+        document_processor.extract_texts(PDF_BYTES)
+        assert document_processor.truncated == {}
+
+    def test_cache_key_depends_on_limits(self, document_processor):
+        """Test that text extracted under different limits is cached separately."""
+        document_processor.extraction_limits = ExtractionLimits(max_pages=30)
+        key = document_processor._get_content_cache_key(PDF_BYTES, "application/pdf")
+        document_processor.extraction_limits = ExtractionLimits(max_pages=10)
+        assert document_processor._get_content_cache_key(PDF_BYTES, "application/pdf") != key
+        # Only complete text is cached, so the time limit does not change it
+        document_processor.extraction_limits = ExtractionLimits(max_pages=30, max_seconds=5)
+        assert document_processor._get_content_cache_key(PDF_BYTES, "application/pdf") == key
+
+    @patch("utils.document_processor.DocumentProcessor._extract_text_from_pdf")
+    def test_extract_text_cached_firestore_hit(self, mock_extract_pdf, document_processor):
+        """Test that an extraction cached by another instance is reused from Firestore."""
+        mock_cache_doc = MagicMock()
+        mock_cache_doc.exists = True
+        mock_cache_doc.to_dict.return_value = {
+            'content': "Cached CV text",
+            'compressed': False,
+            'expiration': datetime.datetime.now(timezone.utc) + datetime.timedelta(days=1)
+        }
+        document_processor.db.collection.return_value.document.return_value.get.return_value = mock_cache_doc
+
+        assert document_processor._extract_text_cached(PDF_BYTES) == ExtractedText("Cached CV text")
+        mock_extract_pdf.assert_not_called()
+
+    def test_content_cache_key_depends_on_bytes(self, document_processor):
+        """Test that content keys are stable and distinct from URL keys."""
+        key = document_processor._get_content_cache_key(b"CV bytes")
+        assert key == document_processor._get_content_cache_key(b"CV bytes")
+        assert key != document_processor._get_content_cache_key(b"other bytes")
+        assert key.startswith("content-")
+        # Spooled uploads arrive as memoryviews and share the keys of the same bytes
+        assert document_processor._get_content_cache_key(memoryview(b"CV bytes")) == key
+
+    def test_pdf_cache_key_depends_on_backend(self, document_processor):
+        """Test that PDF text from different backends is cached separately."""
+        document_processor.pdf_backend = "pymupdf"
+        pymupdf_key = document_processor._get_content_cache_key(PDF_BYTES, "application/pdf")
+        document_processor.pdf_backend = "pypdf"
+        assert document_processor._get_content_cache_key(PDF_BYTES, "application/pdf") != pymupdf_key
+
+    def test_url_cache_key_depends_on_backend_and_limits(self, document_processor):
+        """Test that text downloaded from a URL is cached per backend and extraction limits."""
+        url = "https://example.com/cv.pdf"
+        document_processor.pdf_backend = "pymupdf"
+        document_processor.extraction_limits = ExtractionLimits(max_pages=30)
+        key = document_processor._get_cache_key(url)
+        assert key == document_processor._get_cache_key(url)
+
+        document_processor.pdf_backend = "pypdf"
+        assert document_processor._get_cache_key(url) != key
+        document_processor.pdf_backend = "pymupdf"
+        document_processor.extraction_limits = ExtractionLimits(max_pages=10)
+        assert document_processor._get_cache_key(url) != key
+
+    def test_pdf_backend_selection(self):
+        """Test the configured default, per-processor override and validation of PDF backends."""
+        with patch('utils.document_processor.storage.Client'), \
+             patch('utils.document_processor.firestore.Client'):
+            with patch("config.PDF_EXTRACTION_BACKEND", "pymupdf"):
+                assert DocumentProcessor().pdf_backend == "pymupdf"
+                assert DocumentProcessor(pdf_backend="pypdf").pdf_backend == "pypdf"
+            with patch("utils.text_extraction.pymupdf", None):
+                assert DocumentProcessor(pdf_backend="pymupdf").pdf_backend == "pypdf"
+            with pytest.raises(ValueError):
+                DocumentProcessor(pdf_backend="unknown")
+
+    @patch("utils.document_processor.text_extraction.count_pdf_pages", return_value=10)
+    @patch("utils.document_processor.get_extraction_pool")
+    def test_extract_text_from_pdf_splits_long_documents(self, mock_get_pool, mock_count, document_processor):
+        """Test that long PDFs are extracted by page range in parallel and reassembled in order."""
+        pool = mock_get_pool.return_value
+        pool.max_workers = 3
+        pool.runs_inline.return_value = False
+        pool.map.return_value = [
+            ExtractedText("Page 1\nPage 2", pages_extracted=4, total_pages=10),
+            ExtractedText("Page 5\nPage 6\nPage 7", pages_extracted=3, total_pages=10),
+            ExtractedText("Page 8\nPage 9\nPage 10", pages_extracted=3, total_pages=10)
+        ]
+        document_processor.extraction_limits = ExtractionLimits()
+
+        with patch("config.PDF_PARALLEL_MIN_PAGES", 8):
+            extracted = document_processor._extract_text_from_pdf(PDF_BYTES)
+
+        assert extracted.text == "Page 1\nPage 2\nPage 5\nPage 6\nPage 7\nPage 8\nPage 9\nPage 10"
+        assert (extracted.pages_extracted, extracted.total_pages, extracted.truncated) == (10, 10, False)
+        extract_range, content, ranges = pool.map.call_args[0]
+        assert extract_range.keywords["backend"] == document_processor.pdf_backend
+        assert extract_range.keywords["total_pages"] == 10
+        assert ranges == [(0, 4), (4, 7), (7, 10)]
+        pool.run.assert_not_called()
+
+        mock_count.return_value = 7
+        with patch("config.PDF_PARALLEL_MIN_PAGES", 8):
+            document_processor._extract_text_from_pdf(PDF_BYTES)
+        pool.run.assert_called_once()
+        # The page count is passed on rather than counted again in the worker
+        assert pool.run.call_args[0][0].keywords["total_pages"] == 7
+        assert mock_count.call_count == 2
+
+    @patch("utils.document_processor.text_extraction.count_pdf_pages", return_value=10)
+    @patch("utils.document_processor.get_extraction_pool")
+    def test_extract_text_from_pdf_does_not_split_inline_documents(self, mock_get_pool, mock_count, document_processor):
+        """Test that long PDFs small enough to extract inline are neither counted nor split."""
+        pool = mock_get_pool.return_value
+        pool.max_workers = 3
+        pool.runs_inline.return_value = True
+        pool.run.return_value = ExtractedText("PDF text")
+
+        with patch("config.PDF_PARALLEL_MIN_PAGES", 8):
+            assert document_processor._extract_text_from_pdf(PDF_BYTES) == ExtractedText("PDF text")
+
+        pool.runs_inline.assert_called_once_with(PDF_BYTES)
+        mock_count.assert_not_called()
+        pool.map.assert_not_called()
+
+    @patch("utils.document_processor.get_extraction_pool")
+    def test_extract_text_from_pdf_uses_backend(self, mock_get_pool, document_processor):
+        """Test that the processor's PDF backend is passed to the extraction pool."""
+        mock_get_pool.return_value.max_workers = 1
+        mock_get_pool.return_value.run.return_value = ExtractedText("PDF text")
+        document_processor.pdf_backend = "pypdf"
+
+        assert document_processor._extract_text_from_pdf(PDF_BYTES) == ExtractedText("PDF text")
+        extract, content = mock_get_pool.return_value.run.call_args[0]
+        assert extract.keywords["backend"] == "pypdf"
+        assert extract.keywords["limits"] == document_processor.extraction_limits
+        assert content == PDF_BYTES
+
+    def test_process_text_uses_bundle(self, document_processor):
+        """Test that a task bundle overrides the processor's prompts and schema."""
+        from utils.task_bundle import build_task_bundle
+        from models.schemas import PSResponseSchema
+
+        document_processor.vertex_client = MagicMock(context_cache=None)
+        document_processor.vertex_client.generate_content.return_value = {"status": "success"}
+        bundle = build_task_bundle("ps", "PS system", "{few_shot_examples}|{cv_content}|{jd_content}",
+                                   "examples", None, PSResponseSchema)
+
+        assert document_processor.process_text("CV text", "JD text", bundle=bundle) == {"status": "success"}
+        # Without a context cache the template is rendered as written, examples in place
+        document_processor.vertex_client.generate_content.assert_called_once_with(
+            "examples|CV text|JD text",
+            system_prompt="PS system",
+            response_schema=PSResponseSchema,
+            task="ps"
+        )
+
+    def test_process_text_sends_examples_as_static_context_with_context_cache(self, document_processor):
+        """Test that few-shot examples are split off the prompt only when they can be cached."""
+        document_processor.vertex_client = MagicMock(context_cache=MagicMock())
+        document_processor.vertex_client.generate_content.return_value = {"status": "success"}
+        bundle = self._ps_bundle()
+
+        document_processor.process_text("CV text", "JD text", bundle=bundle)
+
+        document_processor.vertex_client.generate_content.assert_called_once_with(
+            "|CV text|JD text",
+            system_prompt="PS system",
+            static_context="examples",
+            response_schema=bundle.schema_model,
+            task="ps"
+        )
+
+    def _ps_bundle(self, examples="examples"):
+        from utils.task_bundle import build_task_bundle
+        from models.schemas import PSResponseSchema
+        return build_task_bundle("ps", "PS system", "{few_shot_examples}|{cv_content}|{jd_content}",
+                                 examples, None, PSResponseSchema)
+
+    def test_process_text_serves_repeated_requests_from_cache(self, document_processor):
+        """Test that identical task inputs are generated once."""
+        document_processor.vertex_client = MagicMock()
+        document_processor.vertex_client.generate_content.return_value = {"status": "success", "data": {"a": 1}}
+        bundle = self._ps_bundle()
+
+        first = document_processor.process_text("CV text", "JD text", bundle=bundle)
+        second = document_processor.process_text("CV text", "JD text", bundle=bundle)
+
+        assert first == second == {"status": "success", "data": {"a": 1}}
+        document_processor.vertex_client.generate_content.assert_called_once()
+        # Persisted to Firestore as well
+        document_processor.db.collection.assert_any_call('response_cache')
+        document_processor.process_text("Other CV", "JD text", bundle=bundle)
+        assert document_processor.vertex_client.generate_content.call_count == 2
+
+    def test_response_cache_invalidated_by_bundle_change(self, document_processor):
+        """Test that a changed prompt bundle misses the cache."""
+        document_processor.vertex_client = MagicMock()
+        document_processor.vertex_client.generate_content.return_value = {"status": "success"}
+
+        document_processor.process_text("CV text", "JD text", bundle=self._ps_bundle("examples"))
+        document_processor.process_text("CV text", "JD text", bundle=self._ps_bundle("new examples"))
+
+        assert document_processor.vertex_client.generate_content.call_count == 2
+
+    def test_response_cache_hits_are_unaffected_by_callers_modifying_results(self, document_processor):
+        """Test that changing a returned result does not change what later requests receive."""
+        document_processor.vertex_client = MagicMock()
+        document_processor.vertex_client.generate_content.return_value = {"status": "success", "data": {"a": 1}}
+        bundle = self._ps_bundle()
+
+        first = document_processor.process_text("CV text", "JD text", bundle=bundle)
+        first["data"]["a"] = 2
+        second = document_processor.process_text("CV text", "JD text", bundle=bundle)
+        second["request_id"] = "added by the caller"
+        third = document_processor.process_text("CV text", "JD text", bundle=bundle)
+
+        assert third == {"status": "success", "data": {"a": 1}}
+        document_processor.vertex_client.generate_content.assert_called_once()
+
+    def test_response_cache_key_depends_on_cascade(self, document_processor):
+        """Test that results of a task's model cascade are cached apart from direct calls."""
+        from utils.model_cascade import ModelCascade
+
+        document_processor.vertex_client = MagicMock(model_name="gemini-2.5-pro", default_config={}, cascades={})
+        bundle = self._ps_bundle()
+        direct = document_processor._get_response_cache_key("CV text", "JD text", bundle)
+
+        document_processor.vertex_client.cascades = {"ps": ModelCascade("ps", ["gemini-2.5-flash", "gemini-2.5-pro"])}
+        cascaded = document_processor._get_response_cache_key("CV text", "JD text", bundle)
+        document_processor.vertex_client.cascades = {"ps": ModelCascade("ps", ["gemini-2.5-flash-lite", "gemini-2.5-pro"])}
+
+        assert cascaded != direct
+        assert document_processor._get_response_cache_key("CV text", "JD text", bundle) not in (direct, cascaded)
+
+    def test_response_cache_skips_errors(self, document_processor):
+        """Test that failed generations are not cached."""
+        document_processor.vertex_client = MagicMock()
+        document_processor.vertex_client.generate_content.return_value = {"status": "error", "error": "boom"}
+        bundle = self._ps_bundle()
+
+        document_processor.process_text("CV text", "JD text", bundle=bundle)
+        document_processor.process_text("CV text", "JD text", bundle=bundle)
+
+        assert document_processor.vertex_client.generate_content.call_count == 2
+
+    def test_response_cache_firestore_hit(self, document_processor):
+        """Test that a result cached by another instance is read from Firestore."""
+        document_processor.vertex_client = MagicMock()
+        cache_doc = MagicMock()
+        cache_doc.exists = True
+        cache_doc.to_dict.return_value = {
+            'content': '{"status": "success", "data": {"a": 1}}',
+            'compressed': False,
+            'expiration': datetime.datetime.now(timezone.utc) + datetime.timedelta(hours=1)
+        }
+        document_processor.db.collection.return_value.document.return_value.get.return_value = cache_doc
+
+        result = document_processor.process_text("CV text", "JD text", bundle=self._ps_bundle())
+
+        assert result == {"status": "success", "data": {"a": 1}}
+        document_processor.vertex_client.generate_content.assert_not_called()
+
+    def test_process_text_async_uses_response_cache(self, document_processor):
+        """Test that the async path awaits the client and the async Firestore cache."""
+        document_processor.vertex_client = MagicMock(context_cache=MagicMock())
+        document_processor.vertex_client.generate_content_async = AsyncMock(
+            return_value={"status": "success", "data": {"a": 1}}
+        )
+        async_db = MagicMock()
+        cache_ref = async_db.collection.return_value.document.return_value
+        cache_ref.get = AsyncMock(return_value=MagicMock(exists=False))
+        cache_ref.set = AsyncMock()
+        document_processor._async_db = async_db
+        bundle = self._ps_bundle()
+
+        first = asyncio.run(document_processor.process_text_async("CV text", "JD text", bundle=bundle))
+        second = asyncio.run(document_processor.process_text_async("CV text", "JD text", bundle=bundle))
+
+        assert first == second == {"status": "success", "data": {"a": 1}}
+        document_processor.vertex_client.generate_content_async.assert_awaited_once_with(
+            "|CV text|JD text",
+            system_prompt="PS system",
+            static_context="examples",
+            response_schema=bundle.schema_model,
+            task="ps"
+        )
+        cache_ref.set.assert_awaited_once()
+        document_processor.db.collection.assert_not_called()
+
+    def test_download_and_process_async_uses_httpx(self, document_processor):
+        """Test that URLs are fetched with httpx.AsyncClient and the text is cached."""
+        import httpx
+
+        def handler(request):
+            return httpx.Response(200, content=PDF_BYTES, headers={"Content-Type": "application/pdf"})
+
+        async_db = MagicMock()
+        cache_ref = async_db.collection.return_value.document.return_value
+        cache_ref.get = AsyncMock(return_value=MagicMock(exists=False))
+        cache_ref.set = AsyncMock()
+        document_processor._async_db = async_db
+        transport = httpx.MockTransport(handler)
+        real_client = httpx.AsyncClient
+
+        with patch("utils.document_processor.httpx.AsyncClient",
+                   side_effect=lambda **kwargs: real_client(transport=transport, **kwargs)), \
+             patch.object(document_processor, "_extract_text_from_pdf", return_value=ExtractedText("Extracted PDF text")):
+            result = asyncio.run(document_processor.download_and_process_async("https://example.com/cv.pdf"))
+
+        assert result == "Extracted PDF text"
+        cache_ref.set.assert_awaited_once()
+        assert document_processor._get_from_memory_cache(document_processor._get_cache_key("https://example.com/cv.pdf")) == result
+
+    def test_process_text_stream_uses_response_cache(self, document_processor):
+        """Test that a streamed result is cached and replayed as a single event."""
+        document_processor.vertex_client = MagicMock()
+        document_processor.vertex_client.generate_content_stream.return_value = iter([
+            {"type": "chunk", "text": "{}"},
+            {"type": "result", "result": {"status": "success", "data": {}}}
+        ])
+        bundle = self._ps_bundle()
+
+        assert len(list(document_processor.process_text_stream("CV text", None, bundle=bundle))) == 2
+        replay = list(document_processor.process_text_stream("CV text", None, bundle=bundle))
+
+        assert replay == [{"type": "result", "result": {"status": "success", "data": {}}}]
+        document_processor.vertex_client.generate_content_stream.assert_called_once()
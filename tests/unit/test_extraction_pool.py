@@ -0,0 +1,131 @@
+import io
+import os
+import time
+
+import pytest
+
+from utils.extraction_pool import ExtractionPool, ExtractionTimeoutError
+from utils.upload_spool import spool_upload
+
+
+def _worker_pid(file_content):
+    return os.getpid()
+
+
+def _hang(file_content):
+    time.sleep(60)
+
+
+def _slice(file_content, start, stop):
+    return os.getpid(), file_content[start:stop]
+
+
+def _content_type(file_content):
+    return type(file_content).__name__, bytes(file_content)
+
+
+def _fail(file_content):
+    raise ValueError("corrupt document")
+
+
+def _exits_within(pid, seconds):
+    """Wait until the killed worker has been reaped."""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def pool():
+    """Pool with one worker that takes documents over 10 bytes."""
+    pool = ExtractionPool(max_workers=1, inline_max_bytes=10, timeout_seconds=5)
+    yield pool
+    pool.shutdown()
+
+
+def test_small_documents_run_inline(pool):
+    """Test that tiny documents skip the round trip to a worker."""
+    assert pool.run(_worker_pid, b"tiny") == os.getpid()
+    assert pool.stats()["inline"] == 1
+    assert pool._executor is None
+
+
+def test_large_documents_run_in_worker(pool):
+    """Test that larger documents are extracted in a worker process."""
+    pid = pool.run(_worker_pid, b"x" * 100)
+
+    assert pid != os.getpid()
+    assert pool.run(_worker_pid, b"x" * 100) == pid
+    assert pool.stats()["pooled"] == 2
+
+
+def test_spooled_upload_is_mapped_by_the_worker(pool, tmp_path):
+    """Test that a spooled upload reaches the worker as a mapping of its file, not a copy."""
+    with spool_upload(io.BytesIO(b"x" * 100), max_memory_bytes=10, spool_dir=str(tmp_path)) as upload:
+        assert pool.run(_content_type, upload.view) == ("memoryview", b"x" * 100)
+
+
+def test_extraction_errors_propagate(pool):
+    """Test that parser errors are raised to the caller."""
+    with pytest.raises(ValueError, match="corrupt document"):
+        pool.run(_fail, b"x" * 100)
+
+
+def test_hung_extraction_is_killed_and_pool_replaced(pool):
+    """Test that a pathological document kills its worker and later calls still work."""
+    pool.timeout_seconds = 0.5
+    first_pid = pool.run(_worker_pid, b"x" * 100)
+
+    start = time.monotonic()
+    with pytest.raises(ExtractionTimeoutError):
+        pool.run(_hang, b"x" * 100)
+    assert time.monotonic() - start < 5
+
+    pool.timeout_seconds = 5
+    assert pool.run(_worker_pid, b"x" * 100) not in (first_pid, os.getpid())
+    stats = pool.stats()
+    assert (stats["timeouts"], stats["recycles"]) == (1, 1)
+    assert _exits_within(first_pid, 2)
+
+
+def test_disabled_pool_runs_everything_inline():
+    """Test that zero workers keeps extraction in-process."""
+    pool = ExtractionPool(max_workers=0, inline_max_bytes=10, timeout_seconds=5)
+
+    assert pool.run(_worker_pid, b"x" * 100) == os.getpid()
+    pool.start()
+    assert pool._executor is None
+
+
+def test_map_returns_parts_in_order():
+    """Test that a document split across workers is reassembled in order."""
+    pool = ExtractionPool(max_workers=2, inline_max_bytes=10, timeout_seconds=5)
+    try:
+        results = pool.map(_slice, b"abcdefgh", [(0, 2), (2, 4), (4, 6), (6, 8)])
+    finally:
+        pool.shutdown()
+
+    assert [part for _, part in results] == [b"ab", b"cd", b"ef", b"gh"]
+    assert os.getpid() not in {pid for pid, _ in results}
+    assert pool.stats()["parallel"] == 1
+
+
+def test_map_times_out_as_a_whole(pool):
+    """Test that the timeout bounds all parts of a split document together."""
+    pool.timeout_seconds = 0.5
+
+    with pytest.raises(ExtractionTimeoutError):
+        pool.map(_hang, b"x" * 100, [(), ()])
+    assert pool.stats()["recycles"] == 1
+
+
+def test_disabled_pool_maps_inline():
+    """Test that zero workers runs every part in-process."""
+    pool = ExtractionPool(max_workers=0, inline_max_bytes=10, timeout_seconds=5)
+
+    assert pool.map(_slice, b"abcd", [(0, 2), (2, 4)]) == [(os.getpid(), b"ab"), (os.getpid(), b"cd")]
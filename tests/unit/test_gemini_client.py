@@ -1,6 +1,8 @@
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock, Mock
+from unittest.mock import patch, AsyncMock, MagicMock, Mock
 import json
+import time
 import os
 import re
 from pydantic import ValidationError, BaseModel, Field
@@ -10,6 +12,8 @@ from utils.gemini_client import GeminiClient, get_schema_model, ErrorModel
 from models.schemas import ParsingResponseSchema, StatusEnum, SeverityEnum # Import a specific schema for testing
 import google.cloud.aiplatform as aiplatform
 from vertexai.generative_models import GenerativeModel as VertexGenerativeModel, Part as VertexPart
+from google.api_core import exceptions as api_exceptions
+from utils.resilience import RetryBudget
 
 class TestSchema(BaseModel):
     """Schema used for testing purposes only"""
@@ -20,6 +24,11 @@ class TestSchema(BaseModel):
     # Prevents pytest from treating this as a test class
     __test__ = False
 
+@pytest.fixture(autouse=True)
+def fresh_retry_budget(mocker):
+    """Give every test its own process-wide retry budget."""
+    return mocker.patch('utils.gemini_client._retry_budget', RetryBudget(max_tokens=10, token_ratio=0.1))
+
 # Fixture for GeminiClient (can be shared across tests)
 @pytest.fixture
 def gemini_client(mocker):
@@ -358,8 +367,8 @@ class TestGeminiClient:
         """Test retry mechanism for transient errors."""
         # Setup mock to fail twice then succeed
         mock_vertex_ai["model"].generate_content.side_effect = [
-            Exception("Transient error 1"),
-            Exception("Transient error 2"),
+            api_exceptions.ServiceUnavailable("Transient error 1"),
+            api_exceptions.TooManyRequests("Transient error 2"),
             mock_vertex_ai["response"]
         ]
         
@@ -374,7 +383,7 @@ class TestGeminiClient:
     def test_generate_content_max_retries_exceeded(self, mock_sleep, gemini_client, mock_vertex_ai):
         """Test behavior when max retries are exceeded."""
         # Setup mock to fail consistently with the same error
-        persistent_error = Exception("Persistent error")
+        persistent_error = api_exceptions.ServiceUnavailable("Persistent error")
         mock_vertex_ai["model"].generate_content.side_effect = persistent_error
         
         # Set the max_retries (use a small value to speed up the test)
@@ -676,3 +685,481 @@ def test_generate_content_with_custom_params(gemini_client):
     assert call_kwargs["generation_config"]["top_p"] == 0.9
     assert call_kwargs["generation_config"]["top_k"] == 50
     assert call_kwargs["generation_config"]["max_output_tokens"] == 1024
+
+def _stream_chunks(*texts):
+    """Build mock streaming responses with the given texts."""
+    chunks = []
+    for text in texts:
+        chunk = MagicMock()
+        chunk.text = text
+        chunks.append(chunk)
+    return chunks
+
+def test_generate_content_stream_relays_chunks_and_validates(gemini_client):
+    """Test that chunks are relayed and the final event holds the validated result."""
+    gemini_client.model.generate_content.return_value = iter(
+        _stream_chunks('{"name": "John', ' Doe", ', '"age": 30}')
+    )
+
+    events = list(gemini_client.generate_content_stream("Test input", response_schema=TestSchema))
+
+    assert [e["text"] for e in events if e["type"] == "chunk"] == ['{"name": "John', ' Doe", ', '"age": 30}']
+    assert events[-1] == {
+        "type": "result",
+        "result": {"status": "success", "data": {"name": "John Doe", "age": 30, "skills": None}}
+    }
+    assert gemini_client.model.generate_content.call_args.kwargs["stream"] is True
+
+@patch('time.sleep')
+def test_generate_content_stream_retries_before_first_chunk(mock_sleep, gemini_client):
+    """Test that a failure before any output is retried."""
+    gemini_client.model.generate_content.side_effect = [
+        api_exceptions.DeadlineExceeded("Transient error"),
+        iter(_stream_chunks("Hello"))
+    ]
+
+    events = list(gemini_client.generate_content_stream("Test input"))
+
+    assert events[-1]["result"] == {"status": "success", "data": {"text": "Hello"}}
+    assert gemini_client.model.generate_content.call_count == 2
+
+def test_generate_content_stream_error_after_output_is_not_retried(gemini_client):
+    """Test that a failure after output was relayed ends the stream with an error."""
+    def broken_stream():
+        yield from _stream_chunks("partial")
+        raise Exception("Connection reset")
+
+    gemini_client.model.generate_content.return_value = broken_stream()
+
+    events = list(gemini_client.generate_content_stream("Test input"))
+
+    assert events[0] == {"type": "chunk", "text": "partial"}
+    assert events[-1]["result"]["status"] == "error"
+    assert "Connection reset" in events[-1]["result"]["error"]
+    assert gemini_client.model.generate_content.call_count == 1
+
+def test_generate_content_stream_emits_validated_fields(gemini_client):
+    """Test that fields under data are emitted as they close."""
+    gemini_client.model.generate_content.return_value = iter(_stream_chunks(
+        '{"status": "success", "data": {"headline": "Engineer", "skills": [',
+        '{"name": "Python", "proficiency": "Expert", "skillType": "hard"}, ',
+        '{"name": "Go", "proficiency": "Advanced", "skillType": "hard"}]}}'
+    ))
+
+    events = list(gemini_client.generate_content_stream("Test input", response_schema=ParsingResponseSchema))
+
+    fields = [(e["path"], e["value"]) for e in events if e["type"] == "field"]
+    assert fields[0] == ("data.headline", "Engineer")
+    assert [path for path, _ in fields[1:]] == ["data.skills[0]", "data.skills[1]"]
+    # Each field is emitted right after the chunk that closes it
+    assert [e["type"] for e in events] == ["chunk", "field", "chunk", "field", "chunk", "field", "result"]
+
+def test_generate_content_stream_aborts_on_invalid_field(gemini_client):
+    """Test that generation stops once a field fails validation."""
+    stream = iter(_stream_chunks(
+        '{"status": "success", "data": {"skills": [{"name": "Python", "proficiency": "Guru", "skillType": "hard"}, ',
+        '{"name": "Go"',
+        '}]}}'
+    ))
+    gemini_client.model.generate_content.return_value = stream
+
+    events = list(gemini_client.generate_content_stream("Test input", response_schema=ParsingResponseSchema))
+
+    assert [e["type"] for e in events] == ["chunk", "result"]
+    result = events[-1]["result"]
+    assert result["status"] == "error"
+    assert result["data"]["errors"][0]["code"] == "stream_validation_error"
+    # The remaining chunks were never consumed
+    assert next(stream).text == '{"name": "Go"'
+
+def test_generate_content_stream_without_abort_keeps_streaming(gemini_client):
+    """Test that abort_on_invalid=False relays the whole output."""
+    gemini_client.model.generate_content.return_value = iter(_stream_chunks('{status: "success"', ', "data": {}}'))
+
+    events = list(gemini_client.generate_content_stream(
+        "Test input", response_schema=ParsingResponseSchema, abort_on_invalid=False
+    ))
+
+    assert [e["type"] for e in events] == ["chunk", "chunk", "result"]
+
+def test_vertex_response_schema_inlines_refs_and_nullable():
+    """Test conversion of a Pydantic schema to a Vertex AI response schema."""
+    from utils.gemini_client import vertex_response_schema
+
+    schema = vertex_response_schema(ParsingResponseSchema)
+    serialized = json.dumps(schema)
+
+    assert "$ref" not in serialized and "$defs" not in serialized
+    skills = schema["properties"]["data"]["properties"]["skills"]
+    assert skills["items"]["properties"]["proficiency"]["enum"]
+    assert schema["properties"]["data"]["properties"]["email"] == {"type": "string", "nullable": True}
+    assert "title" not in schema
+    # Callers get their own copy
+    schema["properties"].clear()
+    assert vertex_response_schema(ParsingResponseSchema)["properties"]
+
+def test_generate_content_requests_structured_output(gemini_client):
+    """Test that a response schema is passed to the model as JSON mode."""
+    gemini_client.structured_output = True
+    gemini_client.model.generate_content.return_value.text = '{"name": "Note: see", "age": 30}'
+
+    result = gemini_client.generate_content("Test input", response_schema=TestSchema, temperature=0.2)
+
+    generation_config = gemini_client.model.generate_content.call_args.kwargs["generation_config"].to_dict()
+    assert generation_config["response_mime_type"] == "application/json"
+    assert set(generation_config["response_schema"]["properties"]) == {"name", "age", "skills"}
+    assert generation_config["temperature"] == pytest.approx(0.2)
+    # Values containing "word:" survive because no regex repair is applied
+    assert result == {"status": "success", "data": {"name": "Note: see", "age": 30, "skills": None}}
+
+def test_generate_content_structured_output_validation_error(gemini_client):
+    """Test that schema violations in structured output are reported directly."""
+    gemini_client.structured_output = True
+    gemini_client.model.generate_content.return_value.text = '{"age": 30}'
+
+    result = gemini_client.generate_content("Test input", response_schema=TestSchema)
+
+    assert result["status"] == "error"
+    assert result["data"]["errors"][0]["code"] == "schema_validation_error"
+
+def test_generate_content_structured_output_disabled(gemini_client):
+    """Test that the plain generation config is used when structured output is off."""
+    gemini_client.structured_output = False
+    gemini_client.model.generate_content.return_value.text = '```json\n{"name": "John", "age": 30}\n```'
+
+    result = gemini_client.generate_content("Test input", response_schema=TestSchema)
+
+    assert isinstance(gemini_client.model.generate_content.call_args.kwargs["generation_config"], dict)
+    assert result["status"] == "success"
+
+def test_extract_json_returns_outermost_object():
+    """Test that the complete outer object is returned, not the first inner one."""
+    from utils.gemini_client import extract_json
+
+    text = 'Here is the result: {"data": {"skills": [{"name": "Go"}]}, "note": "a } in a string"} Thanks!'
+    json_text, value = extract_json(text)
+
+    assert value == {"data": {"skills": [{"name": "Go"}]}, "note": "a } in a string"}
+    assert json_text == text[text.index("{"):text.rindex("}") + 1]
+
+def test_extract_json_skips_invalid_candidates():
+    """Test that prose braces and broken candidates are skipped."""
+    from utils.gemini_client import extract_json, find_json_object_spans
+
+    text = 'Use {placeholder} here, then {"a": 1]} and finally {"b": "x \\" {"}'
+    assert extract_json(text) == ('{"b": "x \\" {"}', {"b": 'x " {'})
+    assert [text[s:e] for s, e in find_json_object_spans(text)] == ['{placeholder}', '{"b": "x \\" {"}']
+
+def test_extract_json_returns_candidate_for_cleanup():
+    """Test that an undecodable candidate is returned for lenient cleanup."""
+    from utils.gemini_client import extract_json
+
+    assert extract_json('Result: {name: "John",} done') == ('{name: "John",}', None)
+    assert extract_json('no json here') == ('no json here', None)
+
+def test_model_pool_reuses_handles(gemini_client, mocker):
+    """Test that overridden models are created once and reused."""
+    generative_model_mock = mocker.patch('utils.gemini_client.GenerativeModel', side_effect=lambda **kwargs: MagicMock())
+
+    gemini_client.generate_content("first", model="gemini-2.5-flash")
+    gemini_client.generate_content("second", model="gemini-2.5-flash")
+    flash = gemini_client._get_model("gemini-2.5-flash")
+
+    generative_model_mock.assert_called_once_with(model_name="gemini-2.5-flash")
+    assert flash.generate_content.call_count == 2
+    # The default model is never re-created
+    assert gemini_client._get_model() is gemini_client.model
+
+def test_model_pool_is_thread_safe(gemini_client, mocker):
+    """Test that concurrent first use creates a single handle."""
+    import threading
+    import time as time_module
+
+    def slow_model(**kwargs):
+        time_module.sleep(0.01)
+        return MagicMock()
+
+    generative_model_mock = mocker.patch('utils.gemini_client.GenerativeModel', side_effect=slow_model)
+    handles = []
+    threads = [threading.Thread(target=lambda: handles.append(gemini_client._get_model("gemini-2.5-pro")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert generative_model_mock.call_count == 1
+    assert all(handle is handles[0] for handle in handles)
+
+def test_generate_content_uses_context_cache(gemini_client):
+    """Test that a cached static context replaces the inline prefix."""
+    from utils.context_cache import ContextCacheManager, InMemoryContextCacheBackend
+
+    cached_model = MagicMock()
+    cached_model.generate_content.return_value = MagicMock(text="Cached response")
+    backend = InMemoryContextCacheBackend(lambda record: cached_model)
+    gemini_client.context_cache = ContextCacheManager(backend, 3600, 300, 600)
+
+    for _ in range(2):
+        result = gemini_client.generate_content("per-request", system_prompt="System", static_context="Examples")
+        assert result == {"status": "success", "data": {"text": "Cached response"}}
+
+    assert backend.calls["create"] == 1
+    record = next(iter(backend.contents.values()))
+    assert (record["system_instruction"], record["contents"]) == ("System", "Examples")
+    parts = cached_model.generate_content.call_args[0][0]
+    assert [part.text for part in parts] == ["per-request"]
+    gemini_client.model.generate_content.assert_not_called()
+
+def test_generate_content_sends_static_context_inline_without_cache(gemini_client):
+    """Test that the static context is sent inline when caching fails."""
+    from utils.context_cache import ContextCacheManager, InMemoryContextCacheBackend
+
+    backend = InMemoryContextCacheBackend(lambda record: MagicMock(), fail=True)
+    gemini_client.context_cache = ContextCacheManager(backend, 3600, 300, 600)
+
+    result = gemini_client.generate_content("per-request", system_prompt="System", static_context="Examples")
+
+    assert result["status"] == "success"
+    parts = gemini_client.model.generate_content.call_args[0][0]
+    assert [part.text for part in parts] == ["System", "Examples", "per-request"]
+
+@patch('time.sleep')
+def test_generate_content_sends_prompt_inline_when_cached_content_is_gone(mock_sleep, gemini_client):
+    """Test that a cached content missing on the server is evicted and the call retried inline."""
+    from utils.context_cache import ContextCacheManager, InMemoryContextCacheBackend
+
+    cached_model = MagicMock()
+    cached_model.generate_content.side_effect = api_exceptions.NotFound("CachedContent not found")
+    backend = InMemoryContextCacheBackend(lambda record: cached_model)
+    gemini_client.context_cache = ContextCacheManager(backend, 3600, 300, 600)
+    gemini_client.model.generate_content.return_value = MagicMock(text="Inline response")
+
+    result = gemini_client.generate_content("per-request", system_prompt="System", static_context="Examples")
+
+    assert result == {"status": "success", "data": {"text": "Inline response"}}
+    assert cached_model.generate_content.call_count == 1
+    parts = gemini_client.model.generate_content.call_args[0][0]
+    assert [part.text for part in parts] == ["System", "Examples", "per-request"]
+    assert gemini_client.context_cache.stats["evictions"] == 1
+    mock_sleep.assert_not_called()
+
+    # The next request caches the prefix again instead of reusing the stale entry
+    cached_model.generate_content.side_effect = None
+    cached_model.generate_content.return_value = MagicMock(text="Cached response")
+    result = gemini_client.generate_content("per-request", system_prompt="System", static_context="Examples")
+    assert result == {"status": "success", "data": {"text": "Cached response"}}
+    assert backend.calls["create"] == 2
+
+def test_generate_content_async_sends_prompt_inline_when_cached_content_is_gone(gemini_client):
+    """Test that the async path also falls back inline on a missing cached content."""
+    from utils.context_cache import ContextCacheManager, InMemoryContextCacheBackend
+
+    cached_model = MagicMock()
+    cached_model.generate_content_async = AsyncMock(side_effect=api_exceptions.NotFound("CachedContent not found"))
+    gemini_client.context_cache = ContextCacheManager(InMemoryContextCacheBackend(lambda record: cached_model),
+                                                      3600, 300, 600)
+    gemini_client.model.generate_content_async = AsyncMock(return_value=MagicMock(text="Inline response"))
+
+    result = asyncio.run(gemini_client.generate_content_async("per-request", system_prompt="System",
+                                                              static_context="Examples"))
+
+    assert result == {"status": "success", "data": {"text": "Inline response"}}
+    parts = gemini_client.model.generate_content_async.call_args[0][0]
+    assert [part.text for part in parts] == ["System", "Examples", "per-request"]
+
+@patch('time.sleep')
+def test_generate_content_does_not_retry_invalid_argument(mock_sleep, gemini_client):
+    """Test that non-retryable errors fail on the first attempt."""
+    gemini_client.model.generate_content.side_effect = api_exceptions.InvalidArgument("Bad request")
+
+    result = gemini_client.generate_content("Test input")
+
+    assert result["status"] == "error"
+    assert gemini_client.model.generate_content.call_count == 1
+    mock_sleep.assert_not_called()
+
+@patch('time.sleep')
+def test_generate_content_honours_retry_after(mock_sleep, gemini_client):
+    """Test that a server retry delay is used as the minimum wait."""
+    import datetime
+    overloaded = api_exceptions.ResourceExhausted(
+        "Quota exceeded", details=[MagicMock(retry_delay=datetime.timedelta(seconds=4))]
+    )
+    gemini_client.model.generate_content.side_effect = [overloaded, MagicMock(text="ok")]
+
+    assert gemini_client.generate_content("Test input")["status"] == "success"
+    assert mock_sleep.call_args[0][0] >= 4
+
+@patch('time.sleep')
+def test_generate_content_gives_up_on_long_retry_after(mock_sleep, gemini_client):
+    """Test that a retry delay beyond max_delay is not waited for."""
+    import datetime
+    overloaded = api_exceptions.ResourceExhausted(
+        "Quota exceeded", details=[MagicMock(retry_delay=datetime.timedelta(seconds=60))]
+    )
+    gemini_client.model.generate_content.side_effect = overloaded
+
+    assert gemini_client.generate_content("Test input")["status"] == "error"
+    assert gemini_client.model.generate_content.call_count == 1
+    mock_sleep.assert_not_called()
+
+@patch('time.sleep')
+def test_generate_content_stops_retrying_when_budget_exhausted(mock_sleep, gemini_client, mocker):
+    """Test that the shared retry budget limits retries while calls keep failing."""
+    # Keep the circuit breaker out of the way
+    mocker.patch('config.BREAKER_FAIL_MAX', 100)
+    gemini_client.model.generate_content.side_effect = api_exceptions.ServiceUnavailable("Overloaded")
+
+    calls = []
+    for _ in range(4):
+        gemini_client.generate_content("Test input")
+        calls.append(gemini_client.model.generate_content.call_count)
+
+    # 3 attempts, then 2 (budget drops to half), then first attempts only
+    assert calls == [3, 5, 6, 7]
+
+@patch('time.sleep')
+def test_generate_content_fails_fast_when_circuit_open(mock_sleep, gemini_client, mocker):
+    """Test that an open Vertex breaker rejects calls without reaching the model."""
+    mocker.patch('config.BREAKER_FAIL_MAX', 2)
+    mocker.patch('config.MAX_RETRIES', 1)
+    gemini_client.max_retries = 1
+    gemini_client.model.generate_content.side_effect = api_exceptions.ServiceUnavailable("Overloaded")
+
+    for _ in range(2):
+        gemini_client.generate_content("Test input")
+    result = gemini_client.generate_content("Test input")
+
+    assert result["status"] == "error"
+    assert gemini_client.model.generate_content.call_count == 2
+    mock_sleep.assert_not_called()
+
+def test_generate_content_hedges_slow_calls(gemini_client):
+    """Test that a hedging policy races a second request against a slow one."""
+    import time as time_module
+    from utils.resilience import HedgingPolicy
+
+    def slow_then_fast(*args, **kwargs):
+        if gemini_client.model.generate_content.call_count == 1:
+            time_module.sleep(0.5)
+            return MagicMock(text="slow")
+        return MagicMock(text="fast")
+
+    gemini_client.model.generate_content.side_effect = slow_then_fast
+    gemini_client.hedging = HedgingPolicy(initial_delay_seconds=0.05, max_hedge_ratio=1.0)
+
+    result = gemini_client.generate_content("Test input")
+
+    assert result == {"status": "success", "data": {"text": "fast"}}
+    assert gemini_client.hedging.stats()["hedge_wins"] == 1
+
+def _cascade_client(gemini_client, mocker, outputs):
+    """Give each pooled model a canned response text."""
+    from utils.model_cascade import ModelCascade
+
+    def make_model(model_name, **kwargs):
+        model = MagicMock()
+        model.generate_content.return_value = MagicMock(text=outputs[model_name])
+        return model
+
+    mocker.patch('utils.gemini_client.GenerativeModel', side_effect=make_model)
+    gemini_client.model.generate_content.return_value = MagicMock(text=outputs[gemini_client.model_name])
+    cascade = ModelCascade("ps", ["gemini-2.0-flash-lite", gemini_client.model_name], quality_check=None)
+    gemini_client.cascades = {"ps": cascade}
+    return cascade
+
+def test_cascade_accepts_cheap_model_result(gemini_client, mocker):
+    """Test that a schema-valid result from the cheapest model is returned."""
+    cascade = _cascade_client(gemini_client, mocker, {
+        "gemini-2.0-flash-lite": '{"name": "Lite", "age": 30}',
+        "gemini-pro": '{"name": "Pro", "age": 30}'
+    })
+
+    result = gemini_client.generate_content("Test input", response_schema=TestSchema, task="ps")
+
+    assert result["data"]["name"] == "Lite"
+    gemini_client.model.generate_content.assert_not_called()
+    assert cascade.stats()["escalations"] == 0
+    assert cascade.stats()["served_by"] == {"gemini-2.0-flash-lite": 1}
+
+def test_cascade_escalates_on_validation_failure(gemini_client, mocker):
+    """Test that an invalid cheap result escalates to the stronger model."""
+    cascade = _cascade_client(gemini_client, mocker, {
+        "gemini-2.0-flash-lite": '{"name": "Lite"}',
+        "gemini-pro": '{"name": "Pro", "age": 30}'
+    })
+
+    result = gemini_client.generate_content("Test input", response_schema=TestSchema, task="ps")
+
+    assert result["data"]["name"] == "Pro"
+    stats = gemini_client.get_cascade_stats()["ps"]
+    assert stats == cascade.stats()
+    assert (stats["calls"], stats["escalations"], stats["escalation_rate"]) == (1, 1, 1.0)
+    assert stats["reasons"] == {"schema_validation": 1}
+
+def test_cascade_not_used_for_other_tasks_or_model_override(gemini_client, mocker):
+    """Test that tasks without a cascade and explicit models go straight to one model."""
+    cascade = _cascade_client(gemini_client, mocker, {
+        "gemini-2.0-flash-lite": '{"name": "Lite", "age": 30}',
+        "gemini-pro": '{"name": "Pro", "age": 30}'
+    })
+
+    assert gemini_client.generate_content("x", response_schema=TestSchema, task="parsing")["data"]["name"] == "Pro"
+    assert gemini_client.generate_content("x", response_schema=TestSchema, task="ps",
+                                          model="gemini-pro")["data"]["name"] == "Pro"
+    assert cascade.stats()["calls"] == 0
+
+def test_generate_content_async_validates_schema(gemini_client):
+    """Test that the async path awaits the model and validates the response."""
+    gemini_client.model.generate_content_async = AsyncMock(return_value=MagicMock(text='{"name": "Test", "age": 30}'))
+
+    result = asyncio.run(gemini_client.generate_content_async("Test input", response_schema=TestSchema))
+
+    assert result["status"] == "success"
+    assert result["data"]["name"] == "Test"
+    gemini_client.model.generate_content.assert_not_called()
+
+@patch('asyncio.sleep', new_callable=AsyncMock)
+def test_generate_content_async_retries_without_blocking(mock_sleep, gemini_client):
+    """Test that transient errors are retried with asyncio.sleep."""
+    gemini_client.model.generate_content_async = AsyncMock(side_effect=[
+        api_exceptions.ServiceUnavailable("Overloaded"),
+        MagicMock(text="Recovered")
+    ])
+
+    result = asyncio.run(gemini_client.generate_content_async("Test input"))
+
+    assert result == {"status": "success", "data": {"text": "Recovered"}}
+    mock_sleep.assert_awaited_once()
+
+def test_generate_content_async_runs_calls_concurrently(gemini_client):
+    """Test that concurrent async calls overlap instead of queueing."""
+    async def slow_call(*args, **kwargs):
+        await asyncio.sleep(0.2)
+        return MagicMock(text="Done")
+
+    gemini_client.model.generate_content_async = slow_call
+
+    async def run_all():
+        return await asyncio.gather(*(gemini_client.generate_content_async("x") for _ in range(20)))
+
+    start = time.monotonic()
+    results = asyncio.run(run_all())
+
+    assert all(result["status"] == "success" for result in results)
+    assert time.monotonic() - start < 1.0
+
+def test_generate_content_async_uses_cascade(gemini_client, mocker):
+    """Test that the async path escalates through the task's cascade."""
+    cascade = _cascade_client(gemini_client, mocker, {
+        "gemini-2.0-flash-lite": '{"name": "Lite"}',
+        "gemini-pro": '{"name": "Pro", "age": 30}'
+    })
+    for model in [gemini_client._get_model("gemini-2.0-flash-lite"), gemini_client.model]:
+        model.generate_content_async = AsyncMock(return_value=model.generate_content.return_value)
+
+    result = asyncio.run(gemini_client.generate_content_async("Test input", response_schema=TestSchema, task="ps"))
+
+    assert result["data"]["name"] == "Pro"
+    assert cascade.stats()["reasons"] == {"schema_validation": 1}
@@ -0,0 +1,115 @@
+import json
+import pytest
+from pydantic import ValidationError
+
+from utils.json_stream import IncrementalJSONParser, JSONStreamError, StreamingSchemaValidator, format_path
+from models.schemas import ParsingResponseSchema, CSResponseSchema
+
+SAMPLE = {
+    "status": "success",
+    "data": {
+        "headline": "Engineer \"quoted\" \\ path",
+        "skills": [
+            {"name": "Python", "proficiency": "Expert", "skillType": "hard"},
+            {"name": "Go", "proficiency": "Advanced", "skillType": "hard"}
+        ],
+        "achievements": [],
+        "location": {"city": "Paris", "country": None},
+        "years": -1.5e1,
+        "current": True
+    }
+}
+
+
+def feed_in_chunks(parser, text, size):
+    """Feed text in fixed-size chunks and collect completed values."""
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(parser.feed(text[i:i + size]))
+    return completed
+
+
+class TestIncrementalJSONParser:
+    """Test cases for IncrementalJSONParser."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 17, 10000])
+    def test_result_independent_of_chunking(self, chunk_size):
+        """Test that the parsed value and events do not depend on chunk boundaries."""
+        text = "```json\n" + json.dumps(SAMPLE, indent=2) + "\n```"
+        parser = IncrementalJSONParser(max_depth=3)
+        completed = feed_in_chunks(parser, text, chunk_size)
+
+        assert parser.done
+        assert parser.value == SAMPLE
+        assert [format_path(path) for path, _ in completed] == [
+            "status", "data.headline", "data.skills[0]", "data.skills[1]", "data.skills",
+            "data.achievements", "data.location.city", "data.location.country", "data.location",
+            "data.years", "data.current", "data"
+        ]
+        assert dict(completed)[("data", "skills", 1)]["name"] == "Go"
+
+    def test_values_reported_as_soon_as_they_close(self):
+        """Test that an array item is reported before the rest of the document arrives."""
+        parser = IncrementalJSONParser(max_depth=3)
+        assert parser.feed('{"data": {"skills": [{"name": "Py') == []
+        assert parser.feed('thon"}, ') == [(("data", "skills", 0), {"name": "Python"})]
+        assert not parser.done
+
+    def test_max_depth_limits_reported_values(self):
+        """Test that values deeper than max_depth are not reported."""
+        parser = IncrementalJSONParser(max_depth=1)
+        completed = parser.feed('{"a": {"b": 1}, "c": [1, 2]}')
+        assert completed == [(("a",), {"b": 1}), (("c",), [1, 2])]
+
+    @pytest.mark.parametrize("text", ['{"a": 1,, }', '{"a" 1}', '{"a": [1 2]}', '{"a": tru}', '{a: 1}'])
+    def test_invalid_json_raises(self, text):
+        """Test that structurally invalid JSON is detected while streaming."""
+        with pytest.raises(JSONStreamError):
+            IncrementalJSONParser().feed(text)
+
+    def test_text_after_root_is_ignored(self):
+        """Test that trailing text after the root value is ignored."""
+        parser = IncrementalJSONParser()
+        parser.feed('{"a": 1}\n``` and some explanation {')
+        assert parser.done
+        assert parser.value == {"a": 1}
+
+
+class TestStreamingSchemaValidator:
+    """Test cases for StreamingSchemaValidator."""
+
+    def test_list_items_validated_against_nested_model(self):
+        """Test that list items are validated and emitted individually."""
+        validator = StreamingSchemaValidator(ParsingResponseSchema)
+        event = validator.check(("data", "skills", 0), {"name": "Python", "proficiency": "Expert", "skillType": "hard"})
+        assert event == {
+            "path": "data.skills[0]",
+            "value": {"name": "Python", "proficiency": "Expert", "skillType": "hard"}
+        }
+        # The closed list itself is validated but not emitted again
+        assert validator.check(("data", "skills"), [event["value"]]) is None
+
+    def test_scalar_and_object_fields_emitted(self):
+        """Test that non-list fields are emitted when they close."""
+        validator = StreamingSchemaValidator(ParsingResponseSchema)
+        assert validator.check(("data", "headline"), "Engineer") == {"path": "data.headline", "value": "Engineer"}
+        assert validator.check(("data", "location"), {"city": "Paris"})["value"]["city"] == "Paris"
+
+    def test_invalid_item_raises(self):
+        """Test that an item violating its nested model raises ValidationError."""
+        validator = StreamingSchemaValidator(ParsingResponseSchema)
+        with pytest.raises(ValidationError):
+            validator.check(("data", "skills", 0), {"name": "Python", "proficiency": "Guru"})
+
+    def test_field_constraints_enforced(self):
+        """Test that field-level constraints such as max_length are enforced."""
+        validator = StreamingSchemaValidator(CSResponseSchema)
+        with pytest.raises(ValidationError):
+            validator.check(("data", "skills", 0), {"name": "x" * 51, "proficiency": "Expert", "skillType": "hard"})
+
+    def test_unknown_paths_ignored(self):
+        """Test that values outside the data model are not reported."""
+        validator = StreamingSchemaValidator(ParsingResponseSchema)
+        assert validator.check(("status",), "success") is None
+        assert validator.check(("data", "unknownField"), 1) is None
+        assert validator.check(("data", "location", "city"), "Paris") is None
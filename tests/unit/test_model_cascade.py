@@ -0,0 +1,40 @@
+import pytest
+
+from utils.model_cascade import ModelCascade, build_cascades, cascade_models, default_quality_check
+
+
+def test_cascade_models_orders_cheapest_first():
+    """Test that cheaper models are sorted by cost and the final model comes last."""
+    models = cascade_models(["gemini-2.5-flash", "gemini-2.0-flash-lite", "unknown-model"], "gemini-2.5-pro")
+    assert models == ["gemini-2.0-flash-lite", "gemini-2.5-flash", "gemini-2.5-pro"]
+
+def test_cascade_models_drops_final_model_duplicate():
+    """Test that the final model is not tried twice."""
+    assert cascade_models(["gemini-2.5-pro"], "gemini-2.5-pro") == ["gemini-2.5-pro"]
+
+def test_build_cascades_needs_a_cheaper_model():
+    """Test that no cascades are built when there is nothing to escalate from."""
+    assert build_cascades(["ps"], [], "gemini-2.5-pro") == {}
+    cascades = build_cascades(["ps", "cs"], ["gemini-2.0-flash-lite"], "gemini-2.5-pro")
+    assert set(cascades) == {"ps", "cs"}
+    assert cascades["ps"].models == ("gemini-2.0-flash-lite", "gemini-2.5-pro")
+
+def test_rejection_reasons():
+    """Test classification of results that trigger escalation."""
+    cascade = ModelCascade("ps", ["a", "b"])
+    schema_error = {"status": "error", "data": {"status": "errors", "errors": [{"code": "schema_validation_error"}]}}
+
+    assert cascade.rejection_reason(schema_error) == "schema_validation"
+    assert cascade.rejection_reason({"status": "error", "data": None}) == "error"
+    assert cascade.rejection_reason({"status": "success", "data": {"status": "errors", "errors": [{}]}}) \
+        == "model_reported_errors"
+    assert cascade.rejection_reason({"status": "success", "data": {"status": "success", "data": {}}}) is None
+
+def test_default_quality_check_rejects_empty_data():
+    """Test that a result without data is rejected."""
+    assert default_quality_check({"status": "success", "data": None}) == "empty_response"
+
+def test_cascade_needs_models():
+    """Test that an empty cascade is rejected."""
+    with pytest.raises(ValueError):
+        ModelCascade("ps", [])
@@ -0,0 +1,145 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+from utils.resilience import HedgingPolicy, RetryBudget, full_jitter_delay, is_retryable, retry_after_seconds
+
+
+@pytest.mark.parametrize("error,expected", [
+    (api_exceptions.TooManyRequests("429"), True),
+    (api_exceptions.ResourceExhausted("quota"), True),
+    (api_exceptions.ServiceUnavailable("503"), True),
+    (api_exceptions.DeadlineExceeded("deadline"), True),
+    (TimeoutError("timed out"), True),
+    (api_exceptions.InvalidArgument("bad"), False),
+    (api_exceptions.InternalServerError("500"), False),
+    (api_exceptions.PermissionDenied("403"), False),
+    (ValueError("bad"), False),
+])
+def test_is_retryable(error, expected):
+    """Test that only overload and deadline errors are retried."""
+    assert is_retryable(error) is expected
+
+def test_is_retryable_uses_http_status():
+    """Test classification of HTTP errors from other clients."""
+    error = Exception("HTTP error")
+    error.response = MagicMock(status_code=503)
+    assert is_retryable(error)
+    error.response = MagicMock(status_code=400)
+    assert not is_retryable(error)
+
+def test_retry_after_from_retry_info():
+    """Test reading a google.rpc.RetryInfo style detail."""
+    error = api_exceptions.ResourceExhausted("quota", details=[MagicMock(retry_delay=datetime.timedelta(seconds=3))])
+    assert retry_after_seconds(error) == 3
+
+def test_retry_after_from_header():
+    """Test reading a Retry-After response header."""
+    error = api_exceptions.ServiceUnavailable("busy", response=MagicMock(headers={"Retry-After": "2"}))
+    assert retry_after_seconds(error) == 2.0
+    assert retry_after_seconds(api_exceptions.ServiceUnavailable("busy")) is None
+
+def test_full_jitter_delay_bounds():
+    """Test that the delay scales exponentially up to max_delay."""
+    assert full_jitter_delay(0, 1, 10, rng=lambda: 0.5) == 0.5
+    assert full_jitter_delay(2, 1, 10, rng=lambda: 0.5) == 2.0
+    assert full_jitter_delay(10, 1, 10, rng=lambda: 0.999) < 10
+    assert full_jitter_delay(3, 1, 10, rng=lambda: 0.0) == 0.0
+
+def test_retry_budget_throttles_and_recovers():
+    """Test that failures exhaust the budget and successes refill it."""
+    budget = RetryBudget(max_tokens=4, token_ratio=0.5)
+    assert budget.can_retry()
+    budget.record_failure()
+    budget.record_failure()
+    assert not budget.can_retry()
+    budget.record_success()
+    assert budget.can_retry()
+    for _ in range(10):
+        budget.record_success()
+    assert budget.tokens == 4
+
+def _slow(seconds, value):
+    def call():
+        time.sleep(seconds)
+        return value
+    return call
+
+def test_hedging_fast_call_is_not_hedged():
+    """Test that calls finishing within the hedge delay run once."""
+    policy = HedgingPolicy(initial_delay_seconds=1, max_hedge_ratio=1.0)
+    func = MagicMock(return_value="ok")
+
+    assert policy.call(func) == "ok"
+    assert func.call_count == 1
+    assert policy.stats()["hedged"] == 0
+
+def test_hedging_slow_call_is_raced():
+    """Test that a slow first call is beaten by the hedged call."""
+    policy = HedgingPolicy(initial_delay_seconds=0.05, max_hedge_ratio=1.0)
+    calls = iter([_slow(1.0, "slow"), _slow(0, "fast")])
+
+    assert policy.call(lambda: next(calls)()) == "fast"
+    stats = policy.stats()
+    assert (stats["calls"], stats["hedged"], stats["hedge_wins"]) == (1, 1, 1)
+    assert stats["hedge_win_rate"] == 1.0
+
+def test_hedging_falls_back_when_hedge_fails():
+    """Test that a failed hedge does not mask a successful primary call."""
+    policy = HedgingPolicy(initial_delay_seconds=0.05, max_hedge_ratio=1.0)
+
+    def failing():
+        raise api_exceptions.ServiceUnavailable("down")
+
+    calls = iter([_slow(0.2, "primary"), failing])
+    assert policy.call(lambda: next(calls)()) == "primary"
+    assert policy.stats()["hedge_wins"] == 0
+
+def test_hedging_rate_is_capped():
+    """Test that no more than max_hedge_ratio of calls are hedged."""
+    policy = HedgingPolicy(initial_delay_seconds=0.01, max_hedge_ratio=0.5)
+    func = MagicMock(side_effect=_slow(0.03, "ok"))
+
+    for _ in range(4):
+        policy.call(func)
+
+    assert policy.stats()["hedged"] == 2
+    assert func.call_count == 6
+
+def test_hedging_delay_follows_latency_percentile():
+    """Test that the hedge delay is the configured percentile of recent latencies."""
+    policy = HedgingPolicy(percentile=0.9, initial_delay_seconds=5, min_samples=10)
+    assert policy.hedge_delay() == 5
+    for latency in range(1, 11):
+        policy._record_latency(latency / 10)
+    assert policy.hedge_delay() == 1.0
+
+def test_hedging_primary_calls_are_not_limited_by_hedge_pool():
+    """Test that more primary calls than hedge workers run at the same time."""
+    policy = HedgingPolicy(initial_delay_seconds=5, max_hedge_ratio=1.0, max_workers=1)
+    barrier = threading.Barrier(3, timeout=2)
+
+    def call():
+        barrier.wait()
+        return "ok"
+
+    with ThreadPoolExecutor(max_workers=3) as callers:
+        results = list(callers.map(lambda _: policy.call(call), range(3)))
+
+    assert results == ["ok"] * 3
+    assert policy.stats()["hedged"] == 0
+
+def test_hedging_is_skipped_when_hedge_pool_is_busy():
+    """Test that a slow call is not hedged while every hedge worker is in use."""
+    policy = HedgingPolicy(initial_delay_seconds=0.01, max_hedge_ratio=1.0, max_workers=1)
+    assert policy._hedge_slots.acquire(blocking=False)
+    func = MagicMock(side_effect=_slow(0.05, "ok"))
+
+    assert policy.call(func) == "ok"
+    assert func.call_count == 1
+    assert policy.stats()["hedged"] == 0
@@ -1,6 +1,7 @@
+import time
 import pytest
 from unittest.mock import patch, MagicMock
-from utils.secret_manager import SecretManagerClient
+from utils.secret_manager import SecretManagerClient, RefreshingSecret
 from google.api_core.exceptions import NotFound
 
 
@@ -67,4 +68,63 @@ class TestSecretManagerClient:
         mock_client.access_secret_version.assert_called_once_with(request={"name": secret_path})
     
     # TODO: Add more tests for different secret types
-    # TODO: Add tests for caching behavior if implemented 
\ No newline at end of file
+    # TODO: Add tests for caching behavior if implemented
+
+
+class TestRefreshingSecret:
+    """Test cases for RefreshingSecret."""
+
+    class Clock:
+        def __init__(self):
+            self.now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    def test_fetches_once(self):
+        """Test that the secret is fetched once and then served from memory."""
+        fetch = MagicMock(return_value="secret-v1")
+        secret = RefreshingSecret(fetch, refresh_interval=60, rotation_grace=600, background=False)
+
+        assert secret.keys() == ["secret-v1"]
+        assert secret.keys() == ["secret-v1"]
+        fetch.assert_called_once()
+
+    def test_rotation_keeps_previous_key_during_grace(self):
+        """Test that a rotated-out secret stays active for the grace period."""
+        clock = self.Clock()
+        fetch = MagicMock(side_effect=["secret-v1", "secret-v2", "secret-v2"])
+        secret = RefreshingSecret(fetch, refresh_interval=60, rotation_grace=600, background=False, clock=clock)
+
+        secret.keys()
+        clock.now = 30
+        assert secret.refresh() is True
+        assert secret.keys() == ["secret-v2", "secret-v1"]
+
+        clock.now = 631
+        assert secret.keys() == ["secret-v2"]
+
+    def test_stale_refresh_failure_serves_cached_value(self):
+        """Test that a failed refresh keeps the last known secret."""
+        clock = self.Clock()
+        fetch = MagicMock(side_effect=["secret-v1", Exception("Secret Manager unavailable")])
+        secret = RefreshingSecret(fetch, refresh_interval=60, rotation_grace=600, background=False, clock=clock)
+
+        secret.keys()
+        clock.now = 500
+        assert secret.keys() == ["secret-v1"]
+        assert fetch.call_count == 2
+
+    def test_background_refresh(self):
+        """Test that the background thread picks up a rotated secret."""
+        fetch = MagicMock(side_effect=["secret-v1"] + ["secret-v2"] * 100)
+        secret = RefreshingSecret(fetch, refresh_interval=0.01, rotation_grace=600)
+        try:
+            secret.keys()
+            for _ in range(200):
+                if secret.keys()[0] == "secret-v2":
+                    break
+                time.sleep(0.01)
+            assert secret.keys()[0] == "secret-v2"
+        finally:
+            secret.stop()
@@ -93,6 +93,21 @@ class TestStorageClient:
         # Check returned GCS URI
         assert result == f"gs://{storage_client.bucket_name}/{gcs_path}"
 
+    def test_save_memoryview_to_gcs_streams_buffer(self, storage_client):
+        """Test that a memoryview is uploaded from its buffer instead of being copied to bytes."""
+        mock_blob = MagicMock()
+        mock_bucket = MagicMock()
+        mock_bucket.blob.return_value = mock_blob
+        storage_client.bucket = mock_bucket
+
+        result = storage_client.save_bytes_to_gcs(memoryview(b"%PDF-1.4"), "uploads/cv.pdf", "application/pdf")
+
+        mock_blob.upload_from_string.assert_not_called()
+        file_obj = mock_blob.upload_from_file.call_args[0][0]
+        assert file_obj.read() == b"%PDF-1.4"
+        assert mock_blob.upload_from_file.call_args[1] == {"size": 8, "content_type": "application/pdf"}
+        assert result == f"gs://{storage_client.bucket_name}/uploads/cv.pdf"
+
     def test_read_file(self, storage_client):
         """Test read_file method."""
         # Setup mock bucket and blob
@@ -0,0 +1,82 @@
+import json
+import pytest
+from pathlib import Path
+
+from utils.task_bundle import PromptTemplate, build_task_bundle, check_schema_consistency
+from models.schemas import SCHEMA_REGISTRY, PSResponseSchema
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+
+
+class TestPromptTemplate:
+    """Test cases for PromptTemplate."""
+
+    def test_render_matches_str_format(self):
+        """Test that rendering matches str.format for the same values."""
+        template = "CV: {cv_content}\nJD: {jd_content}\nLiteral {{braces}}"
+        compiled = PromptTemplate(template)
+        assert compiled.render(cv_content="cv", jd_content="jd") == template.format(cv_content="cv", jd_content="jd")
+        assert compiled.fields == ("cv_content", "jd_content")
+
+    def test_static_values_are_not_reformatted(self):
+        """Test that braces in static values survive rendering untouched."""
+        compiled = PromptTemplate(
+            "{few_shot_examples}\n{cv_content}",
+            static_values={"few_shot_examples": '{"name": "{not_a_field}"}'}
+        )
+        assert compiled.render(cv_content="text") == '{"name": "{not_a_field}"}\ntext'
+        assert compiled.fields == ("cv_content",)
+
+    def test_missing_value_raises_key_error(self):
+        """Test that a missing field value raises KeyError like str.format."""
+        with pytest.raises(KeyError):
+            PromptTemplate("{cv_content} {section}").render(cv_content="text")
+
+
+class TestTaskBundle:
+    """Test cases for building task bundles."""
+
+    def test_build_task_bundle(self):
+        """Test building a bundle from raw resources."""
+        schema_json = json.dumps(PSResponseSchema.model_json_schema())
+        bundle = build_task_bundle("ps", "system", "{few_shot_examples}|{cv_content}", "examples", schema_json, PSResponseSchema)
+
+        assert bundle.schema_model is PSResponseSchema
+        assert bundle.schema_dict == json.loads(schema_json)
+        assert bundle.schema_warnings == ()
+        assert bundle.prompt_template.render(cv_content="cv") == "examples|cv"
+        assert len(bundle.version) == 16
+
+    def test_version_changes_with_resources(self):
+        """Test that the bundle version tracks resource content."""
+        first = build_task_bundle("ps", "system", "prompt", "examples", None, PSResponseSchema)
+        same = build_task_bundle("ps", "system", "prompt", "examples", None, PSResponseSchema)
+        changed = build_task_bundle("ps", "system", "prompt", "new examples", None, PSResponseSchema)
+
+        assert first.version == same.version
+        assert first.version != changed.version
+
+    def test_invalid_schema_json_is_reported(self):
+        """Test that an unparseable schema file becomes a bundle warning."""
+        bundle = build_task_bundle("ps", "system", "prompt", "examples", "{not json", PSResponseSchema)
+        assert bundle.schema_dict is None
+        assert "Error validating schema" in bundle.schema_warnings[0]
+
+    def test_check_schema_consistency_missing_properties(self):
+        """Test detection of properties missing from the schema file."""
+        warnings = check_schema_consistency("ps", {"type": "object", "properties": {"status": {}}}, PSResponseSchema)
+        assert any("missing properties: data, errors" in w for w in warnings)
+
+    @pytest.mark.parametrize("task", sorted(SCHEMA_REGISTRY))
+    def test_bundles_build_from_repo_resources(self, task):
+        """Test that every registered task builds from the bundled resource files."""
+        bundle = build_task_bundle(
+            task,
+            (DATA_DIR / "prompts" / "system_prompt.md").read_text(encoding="utf-8"),
+            (DATA_DIR / "prompts" / f"{task}_user_prompt.md").read_text(encoding="utf-8"),
+            (DATA_DIR / "few_shot_examples" / f"{task}_few_shot_examples.md").read_text(encoding="utf-8"),
+            (DATA_DIR / "schemas" / f"{task}_schema.json").read_text(encoding="utf-8"),
+            SCHEMA_REGISTRY[task]
+        )
+        assert "cv_content" in bundle.prompt_template.fields
+        assert "few_shot_examples" not in bundle.prompt_template.fields
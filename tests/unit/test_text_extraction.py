@@ -0,0 +1,261 @@
+import io
+import time
+import zipfile
+from pathlib import Path
+
+import docx
+import pytest
+from pypdf import PdfWriter
+from unittest.mock import MagicMock, patch
+
+from utils import text_extraction
+from utils.text_extraction import DOCX_CONTENT_TYPE, PDF_CONTENT_TYPE, sniff_content_type
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+
+def _merged_pdf():
+    """Six-page PDF made of the three two-page fixture CVs."""
+    writer = PdfWriter()
+    for path in sorted((FIXTURES / "cv_pdfs").glob("*.pdf")):
+        writer.append(str(path))
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def _docx(*paragraphs):
+    document = docx.Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_sniffs_pdf():
+    """Test that PDFs are recognised by their header, even after leading junk."""
+    assert sniff_content_type((FIXTURES / "sample_cv.pdf").read_bytes()) == PDF_CONTENT_TYPE
+    assert sniff_content_type(b"\r\n%PDF-1.7\n...") == PDF_CONTENT_TYPE
+
+
+def test_sniffs_docx():
+    """Test that DOCX files are recognised from the ZIP directory."""
+    assert sniff_content_type(_docx("Hello")) == DOCX_CONTENT_TYPE
+
+
+def test_sniffs_docx_containing_pdf_header():
+    """Test that a DOCX with %PDF- in a part near its start is not taken for a PDF."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("%PDF-notes.txt", "%PDF-1.4 attached")
+        with zipfile.ZipFile(io.BytesIO(_docx("Hello"))) as document:
+            for item in document.infolist():
+                archive.writestr(item, document.read(item.filename))
+    content = buffer.getvalue()
+
+    assert b"%PDF-" in content[:100]
+    assert sniff_content_type(content) == DOCX_CONTENT_TYPE
+
+
+def test_rejects_other_content():
+    """Test that other ZIPs, truncated archives and plain text are not recognised."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("content.xml", "<odt/>")
+
+    assert sniff_content_type(buffer.getvalue()) is None
+    assert sniff_content_type(_docx("Hello")[:100]) is None
+    assert sniff_content_type(b"Plain text CV") is None
+    assert sniff_content_type(b"") is None
+
+
+def test_extract_docx_text():
+    """Test that non-empty paragraphs are joined with newlines."""
+    assert text_extraction.extract_docx_text(_docx("First", "  ", "Second")) == "First\nSecond"
+
+
+def test_extract_docx_text_matches_python_docx_paragraphs():
+    """Test that tabs and line breaks in runs come out as python-docx renders them."""
+    document = docx.Document()
+    paragraph = document.add_paragraph("Name:\tJane")
+    paragraph.add_run().add_break()
+    paragraph.add_run("Engineer")
+    buffer = io.BytesIO()
+    document.save(buffer)
+
+    text = text_extraction.extract_docx_text(buffer.getvalue())
+
+    assert text == docx.Document(io.BytesIO(buffer.getvalue())).paragraphs[0].text == "Name:\tJane\nEngineer"
+
+
+def test_extract_docx_tables():
+    """Test that table rows are emitted in document order, nested tables inside their cell."""
+    document = docx.Document()
+    document.add_paragraph("Before")
+    table = document.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = "Skills"
+    table.cell(0, 1).text = "Python"
+    table.cell(0, 1).add_paragraph("SQL")
+    nested = table.cell(1, 1).add_table(rows=1, cols=2)
+    nested.cell(0, 0).text = "a"
+    nested.cell(0, 1).text = "b"
+    document.add_paragraph("After")
+    buffer = io.BytesIO()
+    document.save(buffer)
+
+    text = text_extraction.extract_docx_text(buffer.getvalue())
+
+    assert text == "Before\nSkills | Python SQL\na | b\nAfter"
+
+
+def test_docx_stops_parsing_at_limit():
+    """Test that parsing stops once the character budget is spent, not at the end of the document."""
+    content = _docx(*(f"Paragraph {i}" for i in range(1000)))
+    iterparse = text_extraction.ElementTree.iterparse
+    events = []
+
+    def counting_iterparse(*args, **kwargs):
+        for item in iterparse(*args, **kwargs):
+            events.append(item)
+            yield item
+
+    with patch.object(text_extraction.ElementTree, "iterparse", counting_iterparse):
+        extracted = text_extraction.extract_docx_document(content, limits=text_extraction.ExtractionLimits(max_chars=20))
+
+    assert extracted == text_extraction.ExtractedText("Paragraph 0\nParagrap", "max_chars")
+    assert 0 < len(events) < 100
+
+
+@pytest.mark.parametrize("backend", sorted(text_extraction.PDF_BACKENDS))
+def test_extract_pdf_text_backends(backend):
+    """Test that every backend extracts the sample CV's text."""
+    text = text_extraction.extract_pdf_text((FIXTURES / "sample_cv.pdf").read_bytes(), backend=backend)
+    assert text.strip()
+    assert not text.startswith("\n")
+
+
+@pytest.mark.parametrize("backend", sorted(text_extraction.PDF_BACKENDS))
+def test_extract_from_memoryview(backend):
+    """Test that a memoryview, as passed for spooled uploads, is sniffed and extracted like bytes."""
+    pdf = (FIXTURES / "sample_cv.pdf").read_bytes()
+    docx_content = _docx("First", "Second")
+
+    assert sniff_content_type(memoryview(pdf)) == PDF_CONTENT_TYPE
+    assert sniff_content_type(memoryview(docx_content)) == DOCX_CONTENT_TYPE
+    assert text_extraction.extract_pdf_text(memoryview(pdf), backend=backend) == text_extraction.extract_pdf_text(pdf, backend=backend)
+    assert text_extraction.count_pdf_pages(memoryview(pdf)) == text_extraction.count_pdf_pages(pdf)
+    assert text_extraction.extract_docx_text(memoryview(docx_content)) == "First\nSecond"
+
+
+def test_extract_pdf_text_falls_back_to_pypdf():
+    """Test that pypdf is used when the selected backend fails on a document."""
+    failing = MagicMock()
+    failing.open.side_effect = RuntimeError("cannot open document")
+    content = (FIXTURES / "sample_cv.pdf").read_bytes()
+
+    with patch("utils.text_extraction.pymupdf", failing):
+        text = text_extraction.extract_pdf_text(content, backend=text_extraction.PYMUPDF_BACKEND)
+
+    assert text == text_extraction.extract_pdf_text(content, backend=text_extraction.PYPDF_BACKEND)
+
+
+def test_split_pages():
+    """Test that page ranges are contiguous, ordered and balanced."""
+    assert text_extraction.split_pages(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert text_extraction.split_pages(2, 4) == [(0, 1), (1, 2)]
+    assert text_extraction.split_pages(5, 1) == [(0, 5)]
+
+
+@pytest.mark.parametrize("backend", sorted(text_extraction.PDF_BACKENDS))
+def test_page_ranges_reassemble_document(backend):
+    """Test that extracting page ranges separately gives the same text as one pass."""
+    content = _merged_pdf()
+    assert text_extraction.count_pdf_pages(content) == 6
+
+    parts = [
+        text_extraction.extract_pdf_document(content, start, stop, backend=backend)
+        for start, stop in text_extraction.split_pages(6, 4)
+    ]
+    merged = text_extraction.merge_extractions(parts)
+
+    assert [part.pages_extracted for part in parts] == [2, 2, 1, 1]
+    assert merged == text_extraction.extract_pdf_document(content, backend=backend)
+    assert (merged.pages_extracted, merged.total_pages, merged.truncated) == (6, 6, False)
+
+
+@pytest.mark.parametrize("backend", sorted(text_extraction.PDF_BACKENDS))
+def test_pdf_page_count_comes_from_the_extracting_backend(backend):
+    """Test that the page count is taken from the backend rather than a separate parse."""
+    content = _merged_pdf()
+    limits = text_extraction.ExtractionLimits(max_pages=4)
+
+    with patch("utils.text_extraction.count_pdf_pages", side_effect=AssertionError("parsed twice")):
+        extracted = text_extraction.extract_pdf_document(content, backend=backend, limits=limits)
+
+    assert (extracted.truncated_by, extracted.pages_extracted, extracted.total_pages) == ("max_pages", 4, 6)
+
+
+def test_count_pdf_pages_of_unreadable_document():
+    """Test that documents that cannot be opened count as having no pages."""
+    assert text_extraction.count_pdf_pages(b"%PDF-1.4 truncated") == 0
+
+
+@pytest.mark.parametrize("backend", sorted(text_extraction.PDF_BACKENDS))
+def test_pdf_page_limit(backend):
+    """Test that extraction stops at the page limit and reports it."""
+    content = _merged_pdf()
+    limits = text_extraction.ExtractionLimits(max_pages=3)
+
+    extracted = text_extraction.extract_pdf_document(content, backend=backend, limits=limits)
+
+    assert extracted.text == text_extraction.extract_pdf_document(content, 0, 3, backend=backend).text
+    assert (extracted.truncated_by, extracted.pages_extracted, extracted.total_pages) == ("max_pages", 3, 6)
+    assert not text_extraction._pymupdf_lock.locked()
+
+
+@pytest.mark.parametrize("backend", sorted(text_extraction.PDF_BACKENDS))
+def test_pdf_char_limit_stops_early(backend):
+    """Test that extraction stops reading pages once the character budget is spent."""
+    content = _merged_pdf()
+    full_text = text_extraction.extract_pdf_text(content, backend=backend)
+
+    extracted = text_extraction.extract_pdf_document(
+        content, backend=backend, limits=text_extraction.ExtractionLimits(max_chars=100)
+    )
+
+    assert extracted.text == full_text[:100]
+    assert extracted.truncated_by == "max_chars"
+    assert extracted.pages_extracted < 6
+    assert extracted.metadata() == {"truncated_by": "max_chars", "chars": 100,
+                                    "pages_extracted": extracted.pages_extracted, "total_pages": 6}
+
+
+def test_pdf_deadline():
+    """Test that no further page is read once the deadline has passed."""
+    extracted = text_extraction.extract_pdf_document(_merged_pdf(), deadline=time.monotonic() - 1)
+
+    assert (extracted.text, extracted.pages_extracted, extracted.truncated_by) == ("", 0, "max_seconds")
+
+
+def test_merge_stops_at_first_truncated_range():
+    """Test that a merged extraction is a prefix of the document."""
+    parts = [
+        text_extraction.ExtractedText("one", pages_extracted=2, total_pages=6),
+        text_extraction.ExtractedText("two", "max_seconds", pages_extracted=1, total_pages=6),
+        text_extraction.ExtractedText("three", pages_extracted=2, total_pages=6)
+    ]
+
+    merged = text_extraction.merge_extractions(parts)
+
+    assert merged == text_extraction.ExtractedText("one\ntwo", "max_seconds", pages_extracted=3, total_pages=6)
+
+
+def test_docx_char_limit():
+    """Test that DOCX paragraphs are read until the character budget is spent."""
+    content = _docx("First", "Second", "Third")
+
+    extracted = text_extraction.extract_docx_document(content, limits=text_extraction.ExtractionLimits(max_chars=8))
+
+    assert extracted == text_extraction.ExtractedText("First\nSe", "max_chars")
+    assert not text_extraction.extract_docx_document(content).truncated
@@ -0,0 +1,101 @@
+import io
+import os
+import pickle
+import tempfile
+
+import pytest
+
+from utils import upload_spool
+from utils.upload_spool import BufferReader, SpoolFileRef, spool_upload
+
+
+def test_small_bytesio_upload_is_used_in_place():
+    """Test that an in-memory upload is exposed without copying its buffer."""
+    stream = io.BytesIO(b"%PDF-1.4 small")
+
+    upload = spool_upload(stream, max_memory_bytes=100)
+
+    assert upload.path is None
+    assert upload.view == b"%PDF-1.4 small"
+    assert upload.view.readonly
+    # The view shares the stream's buffer, which cannot be resized while exported
+    with pytest.raises(BufferError):
+        stream.write(b"more data than the buffer holds")
+    upload.close()
+    stream.write(b"more data than the buffer holds")
+
+
+def test_framework_spooled_file_is_unwrapped(tmp_path):
+    """Test that the in-memory buffer of a SpooledTemporaryFile, as used by werkzeug, is not copied."""
+    stream = tempfile.SpooledTemporaryFile(max_size=1000)
+    stream.write(b"%PDF-1.4 small")
+    stream.seek(0)
+
+    with spool_upload(stream, max_memory_bytes=100, spool_dir=str(tmp_path)) as upload:
+        assert upload.view == b"%PDF-1.4 small"
+        with pytest.raises(BufferError):
+            stream.write(b"more data than the buffer holds")
+    assert not os.listdir(tmp_path)
+    stream.close()
+
+
+def test_small_stream_is_kept_in_memory(tmp_path):
+    """Test that uploads up to the memory limit are not written to a spool file."""
+    stream = io.BufferedReader(io.BytesIO(b"x" * 100))
+
+    with spool_upload(stream, max_memory_bytes=100, spool_dir=str(tmp_path)) as upload:
+        assert upload.path is None
+        assert upload.view == b"x" * 100
+    assert not os.listdir(tmp_path)
+
+
+def test_large_upload_is_spooled_to_a_mapped_file(tmp_path):
+    """Test that larger uploads are copied to a spool file that is mapped and deleted on close."""
+    content = os.urandom(3 * 1024 * 1024 + 7)
+    stream = io.BytesIO(content)
+
+    upload = spool_upload(stream, max_memory_bytes=1024, spool_dir=str(tmp_path))
+
+    assert stream.closed
+    assert os.path.dirname(upload.path) == str(tmp_path)
+    assert len(upload) == len(content)
+    assert upload.view == content
+    assert upload.view.readonly
+    upload.close()
+    assert not os.listdir(tmp_path)
+
+
+def test_spool_file_is_sent_to_workers_by_path(tmp_path):
+    """Test that a spooled file crosses to a worker as its path and is mapped there."""
+    with spool_upload(io.BytesIO(b"y" * 2048), max_memory_bytes=1024, spool_dir=str(tmp_path)) as upload:
+        payload = upload_spool.to_worker_payload(upload.view)
+
+        assert isinstance(payload, SpoolFileRef)
+        with upload_spool.open_worker_payload(pickle.loads(pickle.dumps(payload))) as file_content:
+            assert file_content == b"y" * 2048
+
+
+def test_other_buffers_are_sent_to_workers_as_bytes(tmp_path):
+    """Test that bytes are sent unchanged and in-memory views or parts of a spool file are copied."""
+    assert upload_spool.to_worker_payload(b"abc") == b"abc"
+    assert upload_spool.to_worker_payload(memoryview(b"abc")) == b"abc"
+    with spool_upload(io.BytesIO(b"z" * 2048), max_memory_bytes=1024, spool_dir=str(tmp_path)) as upload:
+        assert upload_spool.to_worker_payload(upload.view[:10]) == b"z" * 10
+
+
+def test_buffer_reader_reads_like_bytesio():
+    """Test that BufferReader supports the reads and seeks the parsers make."""
+    content = bytes(range(256))
+    reader, expected = BufferReader(memoryview(content)), io.BytesIO(content)
+
+    for file in (reader, expected):
+        file.seek(-16, io.SEEK_END)
+    assert reader.read(4) == expected.read(4)
+    for file in (reader, expected):
+        file.seek(10)
+        file.seek(5, io.SEEK_CUR)
+    assert reader.tell() == expected.tell() == 15
+    assert reader.read() == expected.read()
+    assert reader.read(10) == b""
+    with pytest.raises(ValueError):
+        reader.seek(-1)
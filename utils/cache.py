@@ -0,0 +1,266 @@
+"""In-process caches shared across requests on a warm instance."""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _ResourceEntry:
+    """A cached resource value together with its source version."""
+    value: Any
+    version: Optional[str]
+    checked_at: float
+
+
+class ResourceCache:
+    """Versioned TTL cache for static resources (prompts, schemas, examples).
+
+    Entries are served from memory until their TTL elapses. After that, a
+    cheap version probe (e.g. GCS object generation or Secret Manager version
+    name) is used to revalidate the entry; the full loader only runs again when
+    the version has changed or no version is available.
+    """
+
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the resource cache.
+
+        Args:
+            ttl_seconds: Seconds an entry is served without revalidation
+            clock: Monotonic clock, overridable for tests
+        """
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: Dict[Hashable, _ResourceEntry] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "revalidations": 0, "reloads": 0}
+
+    def get(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        version_probe: Optional[Callable[[], Optional[str]]] = None,
+    ) -> Any:
+        """
+        Return the cached value for key, loading or revalidating it if needed.
+
+        Args:
+            key: Cache key
+            loader: Callable returning the fresh value
+            version_probe: Optional callable returning the current source version
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry.checked_at < self.ttl_seconds:
+                self.stats["hits"] += 1
+                return entry.value
+
+        version = None
+        # Probe before loading, so that a change made in between is picked up
+        # by the next revalidation rather than hidden behind an older version
+        if version_probe:
+            try:
+                version = version_probe()
+            except Exception as e:
+                if not entry:
+                    # Nothing to serve yet; load without a version to compare against
+                    logger.warning(f"Version probe failed for {key}, loading it unversioned: {e}")
+                else:
+                    # Keep serving the last good value while the source is unreachable
+                    logger.warning(f"Version probe failed for {key}, serving cached value: {e}")
+                    with self._lock:
+                        entry.checked_at = now
+                    return entry.value
+
+        if entry and version is not None and version == entry.version:
+            with self._lock:
+                entry.checked_at = now
+                self.stats["revalidations"] += 1
+            return entry.value
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = _ResourceEntry(value=value, version=version, checked_at=now)
+            self.stats["reloads" if entry else "misses"] += 1
+        return value
+
+    def is_fresh(self, key: Hashable) -> bool:
+        """Return True if key is cached and still within its TTL."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return bool(entry) and self._clock() - entry.checked_at < self.ttl_seconds
+
+    def version_of(self, key: Hashable) -> Optional[str]:
+        """Return the source version recorded for key, if any."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.version if entry else None
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Drop cached entries so the next access reloads them.
+
+        Args:
+            predicate: Optional filter on keys; all entries are dropped if omitted
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            keys = [k for k in self._entries if predicate(k)]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+
+class ExpiringLRUCache:
+    """Bounded LRU cache whose entries carry an absolute expiry time.
+
+    Expired entries are dropped lazily on access; the least recently used entry
+    is evicted once maxsize is exceeded.
+    """
+
+    def __init__(self, maxsize: int, clock: Callable[[], float] = time.time):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries
+            clock: Wall clock in epoch seconds, overridable for tests
+        """
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value for key, or None if missing or expired."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        """
+        Store a value until the given epoch time.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            expires_at: Epoch seconds after which the entry is invalid
+        """
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ByteLRUCache:
+    """LRU cache bounded by the total size of its values in bytes.
+
+    Sizes are measured with sys.getsizeof by default, which for str values is
+    their in-memory footprint. Values larger than the whole budget are not
+    cached.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = sys.getsizeof):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Maximum total size of cached values
+            sizeof: Callable returning the size of a value in bytes
+        """
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value for key, or None if not cached."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return item[0]
+
+    def set(self, key: Hashable, value: Any) -> bool:
+        """
+        Store a value, evicting least recently used entries to make room.
+
+        Args:
+            key: Cache key
+            value: Value to store
+
+        Returns:
+            True if the value was cached
+        """
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            while self._entries and self._bytes + size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+            self._entries[key] = (value, size)
+            self._bytes += size
+            return True
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and current usage."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
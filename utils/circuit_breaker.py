@@ -0,0 +1,207 @@
+"""Named circuit breakers for upstream services (Vertex AI, Firestore, GCS).
+
+Each breaker opens after BREAKER_FAIL_MAX consecutive failures and then
+rejects calls immediately with pybreaker.CircuitBreakerError, so requests do
+not queue behind timeouts and retries during an upstream incident. After
+BREAKER_RESET_TIMEOUT_SECONDS a single trial call is let through (half-open);
+its outcome closes or re-opens the breaker, and concurrent calls are rejected
+while it runs. Client errors such as invalid
+arguments or missing objects say nothing about upstream health and are not
+counted as failures.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator
+
+import pybreaker
+from google.api_core import exceptions as api_exceptions
+
+import config
+
+logger = logging.getLogger(__name__)
+
+CircuitBreakerError = pybreaker.CircuitBreakerError
+
+VERTEX = "vertex"
+FIRESTORE = "firestore"
+GCS = "gcs"
+
+
+def _is_client_error(error: BaseException) -> bool:
+    """Return True for 4xx API errors other than 429, which are the caller's fault."""
+    return isinstance(error, api_exceptions.ClientError) and not isinstance(error, api_exceptions.TooManyRequests)
+
+
+class BreakerMetricsListener(pybreaker.CircuitBreakerListener):
+    """Counts calls, failures, rejections and state changes of a breaker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"calls": 0, "successes": 0, "failures": 0, "rejections": 0, "opened": 0}
+        self.state_changed_at = time.time()
+
+    def _inc(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def before_call(self, cb: pybreaker.CircuitBreaker, func: Callable, *args, **kwargs) -> None:
+        self._inc("calls")
+
+    def success(self, cb: pybreaker.CircuitBreaker) -> None:
+        self._inc("successes")
+
+    def failure(self, cb: pybreaker.CircuitBreaker, exc: BaseException) -> None:
+        self._inc("failures")
+
+    def state_change(self, cb: pybreaker.CircuitBreaker, old_state: Any, new_state: Any) -> None:
+        old_name = old_state.name if old_state else None
+        with self._lock:
+            self.state_changed_at = time.time()
+            if new_state.name == pybreaker.STATE_OPEN:
+                self.counts["opened"] += 1
+        log = logger.warning if new_state.name == pybreaker.STATE_OPEN else logger.info
+        log(f"Circuit breaker {cb.name} changed from {old_name} to {new_state.name}")
+
+
+_breakers: Dict[str, pybreaker.CircuitBreaker] = {}
+_listeners: Dict[str, BreakerMetricsListener] = {}
+# Held by the trial call of a breaker that is not closed
+_trial_locks: Dict[str, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> pybreaker.CircuitBreaker:
+    """
+    Return the process-wide breaker for an upstream service, creating it on first use.
+
+    Args:
+        name: Breaker name, e.g. VERTEX, FIRESTORE or GCS
+
+    Returns:
+        The named circuit breaker
+    """
+    breaker = _breakers.get(name)
+    if breaker is not None:
+        return breaker
+    with _lock:
+        if name not in _breakers:
+            listener = BreakerMetricsListener()
+            _listeners[name] = listener
+            _trial_locks[name] = threading.Lock()
+            _breakers[name] = pybreaker.CircuitBreaker(
+                fail_max=config.BREAKER_FAIL_MAX,
+                reset_timeout=config.BREAKER_RESET_TIMEOUT_SECONDS,
+                exclude=[_is_client_error],
+                listeners=[listener],
+                name=name,
+                # The call that trips the breaker reports its own error
+                throw_new_error_on_trip=False
+            )
+        return _breakers[name]
+
+
+@contextmanager
+def _calling(name: str) -> Iterator[None]:
+    """Run the body of the with statement as a call through the named breaker."""
+    breaker = get_breaker(name)
+    trial_lock = None
+    try:
+        if breaker.current_state != pybreaker.STATE_CLOSED:
+            # pybreaker lets every call through while half-open; only the
+            # first one may run as the trial, the others fail fast
+            trial_lock = _trial_locks[name]
+            if not trial_lock.acquire(blocking=False):
+                trial_lock = None
+                raise CircuitBreakerError("Trial call in progress, circuit breaker still half-open")
+        # Unlike breaker.call(), calling() does not hold the breaker's lock
+        # while the call runs, so concurrent calls are not serialized
+        with breaker.calling():
+            yield
+    except CircuitBreakerError:
+        _listeners[name]._inc("rejections")
+        raise
+    finally:
+        if trial_lock is not None:
+            trial_lock.release()
+
+
+def call_with_breaker(name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Call func through the named breaker.
+
+    Args:
+        name: Breaker name
+        func: Callable to protect
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The return value of func
+
+    Raises:
+        CircuitBreakerError: If the breaker is open
+    """
+    with _calling(name):
+        return func(*args, **kwargs)
+
+
+async def call_with_breaker_async(name: str, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+    """
+    Await func through the named breaker.
+
+    Args:
+        name: Breaker name
+        func: Coroutine function to protect
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The result of awaiting func
+
+    Raises:
+        CircuitBreakerError: If the breaker is open
+    """
+    with _calling(name):
+        return await func(*args, **kwargs)
+
+
+def is_open(name: str) -> bool:
+    """Return True if the named breaker currently rejects calls."""
+    breaker = get_breaker(name)
+    state = breaker.current_state
+    if state == pybreaker.STATE_CLOSED:
+        return False
+    if _trial_locks[name].locked():
+        return True
+    # Past the reset timeout the next call is let through as a half-open trial
+    return state == pybreaker.STATE_OPEN and time.time() - _listeners[name].state_changed_at < breaker.reset_timeout
+
+
+def retry_after_seconds(name: str) -> int:
+    """Return the seconds until the named breaker lets a trial call through."""
+    breaker = get_breaker(name)
+    remaining = breaker.reset_timeout - (time.time() - _listeners[name].state_changed_at)
+    return max(1, int(remaining + 0.999))
+
+
+def get_breaker_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return state and counters of every breaker created so far."""
+    metrics = {}
+    for name in list(_breakers):
+        breaker = _breakers[name]
+        listener = _listeners[name]
+        with listener._lock:
+            counts = dict(listener.counts)
+        metrics[name] = {"state": breaker.current_state, "fail_counter": breaker.fail_counter, **counts}
+    return metrics
+
+
+def reset_breakers() -> None:
+    """Drop all breakers and their metrics (used by tests)."""
+    with _lock:
+        _breakers.clear()
+        _listeners.clear()
+        _trial_locks.clear()
@@ -0,0 +1,231 @@
+"""Server-side context caching for large static prompt prefixes.
+
+Every task sends the same system prompt and tens of kilobytes of few-shot
+examples with each request. ContextCacheManager stores that prefix once as a
+Vertex AI cached content per (model, prefix) and hands out model handles bound
+to it, refreshing the cache TTL before it expires. When caching is not
+possible (API error, prefix below the model's minimum size, ...) it returns
+None and the caller sends the prefix inline; failures are remembered for a
+while so a failing prefix is not retried on every request. A cached content
+that has expired or been deleted on the server side is dropped with evict, so
+that the next request creates it again.
+"""
+
+import datetime
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _CacheEntry:
+    """A created cached content and the model handle bound to it."""
+    name: str
+    expires_at: float
+    model: Any
+
+
+class VertexContextCacheBackend:
+    """Context cache backend using the Vertex AI CachedContent API."""
+
+    def create(self, model_name: str, system_instruction: Optional[str], contents: str, ttl_seconds: float) -> str:
+        """
+        Create a cached content.
+
+        Args:
+            model_name: Model the cache is created for
+            system_instruction: Optional system instruction to cache
+            contents: Static user content to cache
+            ttl_seconds: Time to live of the cache
+
+        Returns:
+            Resource name of the cached content
+        """
+        from vertexai.preview import caching
+        cached = caching.CachedContent.create(
+            model_name=model_name,
+            system_instruction=system_instruction,
+            contents=[contents],
+            ttl=datetime.timedelta(seconds=ttl_seconds)
+        )
+        return cached.resource_name
+
+    def extend(self, name: str, ttl_seconds: float) -> None:
+        """Reset the TTL of an existing cached content."""
+        from vertexai.preview import caching
+        caching.CachedContent(cached_content_name=name).update(ttl=datetime.timedelta(seconds=ttl_seconds))
+
+    def model_for(self, name: str) -> Any:
+        """Return a model handle that uses the cached content as its prefix."""
+        from vertexai.preview.generative_models import GenerativeModel
+        return GenerativeModel.from_cached_content(cached_content=name)
+
+
+class InMemoryContextCacheBackend:
+    """Offline stand-in for VertexContextCacheBackend, for tests and local runs.
+
+    Cached contents live in a dict; model handles come from model_factory,
+    which receives the cached content record.
+    """
+
+    def __init__(self, model_factory: Callable[[Dict[str, Any]], Any], fail: bool = False):
+        """
+        Initialize the fake backend.
+
+        Args:
+            model_factory: Builds a model handle from a cached content record
+            fail: Make every call raise, to simulate caching being unavailable
+        """
+        self.model_factory = model_factory
+        self.fail = fail
+        self.contents: Dict[str, Dict[str, Any]] = {}
+        self.calls = {"create": 0, "extend": 0}
+
+    def _check(self) -> None:
+        if self.fail:
+            raise RuntimeError("Context caching unavailable")
+
+    def create(self, model_name: str, system_instruction: Optional[str], contents: str, ttl_seconds: float) -> str:
+        self._check()
+        self.calls["create"] += 1
+        name = f"cachedContents/{len(self.contents) + 1}"
+        self.contents[name] = {
+            "name": name,
+            "model_name": model_name,
+            "system_instruction": system_instruction,
+            "contents": contents,
+            "ttl_seconds": ttl_seconds
+        }
+        return name
+
+    def extend(self, name: str, ttl_seconds: float) -> None:
+        self._check()
+        self.calls["extend"] += 1
+        if name not in self.contents:
+            raise KeyError(name)
+        self.contents[name]["ttl_seconds"] = ttl_seconds
+
+    def model_for(self, name: str) -> Any:
+        return self.model_factory(self.contents[name])
+
+
+class ContextCacheManager:
+    """Creates, refreshes and reuses cached contents for static prompt prefixes."""
+
+    def __init__(
+        self,
+        backend: Any,
+        ttl_seconds: float,
+        refresh_margin_seconds: float,
+        retry_after_seconds: float,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            backend: VertexContextCacheBackend or a compatible object
+            ttl_seconds: TTL given to created or refreshed caches
+            refresh_margin_seconds: Refresh a cache once it expires within this margin
+            retry_after_seconds: How long to send a prefix inline after caching it failed
+            clock: Wall clock in epoch seconds, overridable for tests
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._clock = clock
+        self._entries: Dict[Tuple[str, str], _CacheEntry] = {}
+        self._failed_until: Dict[Tuple[str, str], float] = {}
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "creates": 0, "refreshes": 0, "failures": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(model_name: str, system_instruction: Optional[str], contents: str) -> Tuple[str, str]:
+        digest = hashlib.sha256()
+        digest.update((system_instruction or "").encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(contents.encode("utf-8"))
+        return model_name, digest.hexdigest()
+
+    def get_model(self, model_name: str, system_instruction: Optional[str], contents: str) -> Optional[Any]:
+        """
+        Return a model handle whose cached prefix is system_instruction + contents.
+
+        Args:
+            model_name: Model to generate with
+            system_instruction: Static system instruction
+            contents: Static user content (e.g. few-shot examples)
+
+        Returns:
+            Model handle bound to the cached content, or None if the prefix
+            should be sent inline
+        """
+        key = self._key(model_name, system_instruction, contents)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires_at - now > self.refresh_margin_seconds:
+                self.stats["hits"] += 1
+                return entry.model
+            if self._failed_until.get(key, 0) > now:
+                # Keep using a cache whose refresh failed until it actually expires
+                return entry.model if entry and entry.expires_at > now else None
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have created or refreshed it meanwhile
+            now = self._clock()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry and entry.expires_at - now > self.refresh_margin_seconds:
+                return entry.model
+            try:
+                if entry and entry.expires_at > now:
+                    self.backend.extend(entry.name, self.ttl_seconds)
+                    entry = _CacheEntry(entry.name, now + self.ttl_seconds, entry.model)
+                    stat = "refreshes"
+                else:
+                    name = self.backend.create(model_name, system_instruction, contents, self.ttl_seconds)
+                    entry = _CacheEntry(name, now + self.ttl_seconds, self.backend.model_for(name))
+                    stat = "creates"
+            except Exception as e:
+                logger.warning(f"Context caching unavailable for {model_name}, sending prompt inline: {e}")
+                with self._lock:
+                    self._failed_until[key] = now + self.retry_after_seconds
+                    self.stats["failures"] += 1
+                return entry.model if entry and entry.expires_at > now else None
+            with self._lock:
+                self._entries[key] = entry
+                self._failed_until.pop(key, None)
+                self.stats[stat] += 1
+            return entry.model
+
+    def evict(self, model_name: str, system_instruction: Optional[str], contents: str, model: Any) -> bool:
+        """
+        Drop the entry for a prefix whose cached content is gone from the server.
+
+        Args:
+            model_name: Model the prefix was cached for
+            system_instruction: Static system instruction
+            contents: Static user content
+            model: Handle that failed; a newer entry created meanwhile is kept
+
+        Returns:
+            True if the entry was dropped
+        """
+        key = self._key(model_name, system_instruction, contents)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.model is not model:
+                return False
+            del self._entries[key]
+            self.stats["evictions"] += 1
+        logger.warning(f"Dropped cached content {entry.name} for {model_name}, it no longer exists")
+        return True
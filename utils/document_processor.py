@@ -1,35 +1,102 @@
+import asyncio
+import copy
+import functools
 import os
 import tempfile
 import logging
-import io
 import hashlib
 import datetime
+import json
+import threading
+import time
 import zlib
-from typing import Tuple, Optional
-from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple
 from datetime import timezone
 
+import httpx
 import requests
 from google.cloud import storage, firestore
 from tenacity import retry, stop_after_attempt, wait_exponential
-from pypdf import PdfReader
-import docx
 from opentelemetry import trace
 import config
+from utils import circuit_breaker, text_extraction
+from utils.cache import ByteLRUCache, ExpiringLRUCache
+from utils.extraction_pool import get_extraction_pool
+from utils.text_extraction import ExtractedText, ExtractionLimits
+from utils.task_bundle import TaskBundle
 
 logger = logging.getLogger(__name__)
 
+# Extracted document text shared by every DocumentProcessor in the process
+_memory_cache = ByteLRUCache(max_bytes=config.MEMORY_CACHE_MAX_BYTES)
+
+# Validated task results keyed by task, input text, bundle version and generation config
+_response_cache = ExpiringLRUCache(maxsize=config.RESPONSE_CACHE_MAX_ENTRIES)
+
+# Firestore clients shared by every DocumentProcessor in the process, so
+# that requests do not each open their own gRPC channels
+_firestore_client: Optional[firestore.Client] = None
+_async_firestore_client: Optional[firestore.AsyncClient] = None
+_firestore_lock = threading.Lock()
+
+def get_memory_cache_stats() -> Dict[str, int]:
+    """Return hit/miss/eviction counters for the in-memory document cache."""
+    return _memory_cache.stats()
+
+def get_firestore_client() -> firestore.Client:
+    """Return the process-wide Firestore client, creating it on first use."""
+    global _firestore_client
+    if _firestore_client is None:
+        with _firestore_lock:
+            if _firestore_client is None:
+                _firestore_client = firestore.Client()
+    return _firestore_client
+
+def get_async_firestore_client() -> firestore.AsyncClient:
+    """Return the process-wide async Firestore client, creating it on first use.
+    
+    Its channel is bound to the event loop it is first used on, which under
+    uvicorn is the single loop of the process.
+    """
+    global _async_firestore_client
+    if _async_firestore_client is None:
+        with _firestore_lock:
+            if _async_firestore_client is None:
+                _async_firestore_client = firestore.AsyncClient()
+    return _async_firestore_client
+
+def close_firestore_clients() -> None:
+    """Close the process-wide Firestore clients and drop them (used by tests)."""
+    global _firestore_client, _async_firestore_client
+    with _firestore_lock:
+        clients = (_firestore_client, _async_firestore_client)
+        _firestore_client = _async_firestore_client = None
+    for client in clients:
+        if client is not None:
+            client.close()
+
 class DocumentProcessor:
     """Handles document download and processing operations."""
     
-    def __init__(self, storage_client=None, vertex_client=None, system_prompt=None, user_prompt=None, few_shot_examples=None, schema_model=None):
-        """Initialize the document processor."""
+    def __init__(self, storage_client=None, vertex_client=None, system_prompt=None, user_prompt=None, few_shot_examples=None, schema_model=None, prompt_template=None, pdf_backend=None, extraction_limits=None):
+        """Initialize the document processor.
+        
+        pdf_backend selects the PDF text extraction backend (a key of
+        utils.text_extraction.PDF_BACKENDS) and defaults to
+        config.PDF_EXTRACTION_BACKEND. Raises ValueError for an unknown backend.
+        extraction_limits (an ExtractionLimits) bounds the pages, characters
+        and time spent extracting each document and defaults to the
+        EXTRACTION_MAX_* settings.
+        """
         self.tracer = trace.get_tracer(__name__)
         logger.info("Initialized DocumentProcessor")
         # Initialize storage client with ADC if not provided
+        self._owns_storage_client = storage_client is None
         self.storage_client = storage_client or storage.Client()
-        # Initialize Firestore client
-        self.db = firestore.Client()
+        # Firestore clients are shared by the process; the async one is only
+        # needed by the asyncio path and fetched on first use
+        self.db = get_firestore_client()
+        self._async_db = None
         # Track if resources are closed
         self._closed = False
         # Store additional parameters
@@ -38,6 +105,16 @@ class DocumentProcessor:
         self.user_prompt = user_prompt
         self.few_shot_examples = few_shot_examples
         self.schema_model = schema_model
+        # Precompiled user prompt (see utils.task_bundle); takes precedence over user_prompt
+        self.prompt_template = prompt_template
+        self.pdf_backend = text_extraction.resolve_pdf_backend(pdf_backend or config.PDF_EXTRACTION_BACKEND)
+        self.extraction_limits = extraction_limits or ExtractionLimits(
+            max_pages=config.EXTRACTION_MAX_PAGES,
+            max_chars=config.EXTRACTION_MAX_CHARS,
+            max_seconds=config.EXTRACTION_MAX_SECONDS
+        )
+        # Truncation metadata of the documents read by extract_texts, by role ("cv", "jd")
+        self.truncated: Dict[str, Dict[str, Any]] = {}
         
     def __enter__(self):
         """Context manager entry."""
@@ -56,21 +133,12 @@ class DocumentProcessor:
             return
 
         try:
-            # Close Firestore client
-            if hasattr(self, 'db'):
-                self.db.close()
-                logger.info("Closed Firestore client connection")
-
-            # Close Storage client
-            if hasattr(self, 'storage_client'):
+            # The Firestore clients and a storage client passed in by the
+            # caller are shared with other processors and stay open
+            if getattr(self, '_owns_storage_client', False):
                 self.storage_client.close()
                 logger.info("Closed Storage client connection")
 
-            # Clear memory cache
-            if hasattr(self, '_get_from_memory_cache'):
-                self._get_from_memory_cache.cache_clear()
-                logger.info("Cleared memory cache")
-
             self._closed = True
             logger.info("Successfully cleaned up DocumentProcessor resources")
 
@@ -83,17 +151,54 @@ class DocumentProcessor:
         if self._closed:
             raise RuntimeError("DocumentProcessor has been closed and cannot be used")
 
+    def _get_async_db(self) -> firestore.AsyncClient:
+        """Return the async Firestore client, fetching the shared one on first use."""
+        if self._async_db is None:
+            self._async_db = get_async_firestore_client()
+        return self._async_db
+
+    def _get_content_cache_key(self, file_content: bytes, content_type: Optional[str] = None) -> str:
+        """
+        Generate a content-addressed cache key for uploaded file bytes.
+        
+        PDF keys include the extraction backend, since backends differ in
+        the text they return, and all keys include the page and character
+        limits the text was extracted under.
+        
+        Args:
+            file_content: Raw file content
+            content_type: Content type returned by _detect_content_type
+            
+        Returns:
+            BLAKE2b digest of the content, prefixed to keep it apart from URL keys
+        """
+        digest = hashlib.blake2b(file_content, digest_size=16).hexdigest()
+        tag = self.extraction_limits.cache_tag()
+        if tag:
+            digest = f"{tag}-{digest}"
+        if content_type == text_extraction.PDF_CONTENT_TYPE:
+            return f"content-{self.pdf_backend}-{digest}"
+        return f"content-{digest}"
+
     def _get_cache_key(self, url: str) -> str:
         """
         Generate a cache key for the given URL.
         
+        The document type is not known before the download, so every URL key
+        includes the PDF backend, as well as the page and character limits
+        the text is extracted under.
+        
         Args:
             url: URL or GCS URI of the document
             
         Returns:
-            MD5 hash of the URL as the cache key
+            MD5 hash of the URL, prefixed with the backend and limits
         """
-        return hashlib.md5(url.encode()).hexdigest()
+        digest = hashlib.md5(url.encode()).hexdigest()
+        tag = self.extraction_limits.cache_tag()
+        if tag:
+            digest = f"{tag}-{digest}"
+        return f"{self.pdf_backend}-{digest}"
         
     def _cache_document(self, cache_key: str, text_content: str, url: str, content_type: str) -> None:
         """
@@ -105,34 +210,44 @@ class DocumentProcessor:
             url: Original document URL
             content_type: Content type of the document
         """
+        cache_data = self._document_cache_data(text_content, url, content_type)
+        try:
+            circuit_breaker.call_with_breaker(
+                circuit_breaker.FIRESTORE, self.db.collection('document_cache').document(cache_key).set, cache_data
+            )
+        except circuit_breaker.CircuitBreakerError:
+            logger.warning(f"Firestore circuit open, not caching document content for {url}")
+            return
+        logger.info(f"Cached document content for {url} (compressed: {cache_data['compressed']})")
+
+    async def _cache_document_async(self, cache_key: str, text_content: str, url: str, content_type: str) -> None:
+        """Async variant of _cache_document using the async Firestore client."""
+        cache_data = self._document_cache_data(text_content, url, content_type)
+        try:
+            await circuit_breaker.call_with_breaker_async(
+                circuit_breaker.FIRESTORE,
+                self._get_async_db().collection('document_cache').document(cache_key).set,
+                cache_data
+            )
+        except circuit_breaker.CircuitBreakerError:
+            logger.warning(f"Firestore circuit open, not caching document content for {url}")
+            return
+        logger.info(f"Cached document content for {url} (compressed: {cache_data['compressed']})")
+
+    def _document_cache_data(self, text_content: str, url: str, content_type: str) -> Dict[str, Any]:
+        """Build the Firestore document for cached document text, compressing large content."""
         # Get current UTC timestamp
         current_utc = datetime.datetime.now(timezone.utc)
-        
-        # Compress large content
-        if len(text_content) > config.CACHE_COMPRESSION_THRESHOLD:
-            compressed = zlib.compress(text_content.encode('utf-8'))
-            cache_data = {
-                'content': compressed,
-                'compressed': True,
-                'url': url,
-                'content_type': content_type,
-                'timestamp': current_utc,
-                'expiration': current_utc + datetime.timedelta(days=config.CACHE_TTL_DAYS)
-            }
-        else:
-            cache_data = {
-                'content': text_content,
-                'compressed': False,
-                'url': url,
-                'content_type': content_type,
-                'timestamp': current_utc,
-                'expiration': current_utc + datetime.timedelta(days=config.CACHE_TTL_DAYS)
-            }
-        
-        self.db.collection('document_cache').document(cache_key).set(cache_data)
-        logger.info(f"Cached document content for {url} (compressed: {cache_data['compressed']})")
+        compressed = len(text_content) > config.CACHE_COMPRESSION_THRESHOLD
+        return {
+            'content': zlib.compress(text_content.encode('utf-8')) if compressed else text_content,
+            'compressed': compressed,
+            'url': url,
+            'content_type': content_type,
+            'timestamp': current_utc,
+            'expiration': current_utc + datetime.timedelta(days=config.CACHE_TTL_DAYS)
+        }
 
-    @lru_cache(maxsize=config.MEMORY_CACHE_SIZE)
     def _get_from_memory_cache(self, cache_key: str) -> Optional[str]:
         """
         In-memory cache for very frequently accessed documents.
@@ -143,9 +258,213 @@ class DocumentProcessor:
         Returns:
             Cached content if available, None otherwise
         """
-        # This is an LRU-cached method that will store successful results automatically
-        # The return None is only for the very first call with a given cache key
-        return None
+        return _memory_cache.get(cache_key)
+
+    def _store_in_memory_cache(self, cache_key: str, text_content: str) -> None:
+        """
+        Store extracted text in the process-wide memory cache.
+        
+        Args:
+            cache_key: Cache key for the document
+            text_content: Extracted text to cache
+        """
+        _memory_cache.set(cache_key, text_content)
+
+    def _get_from_firestore_cache(self, cache_key: str, source: str, collection: str = 'document_cache') -> Optional[str]:
+        """
+        Look up cached document text in Firestore, dropping expired entries.
+        
+        Args:
+            cache_key: Cache key for the document
+            source: Document URL or description, used for logging
+            collection: Firestore collection holding the entry
+            
+        Returns:
+            Cached content if available and not expired, None otherwise
+            (also None while the Firestore circuit breaker is open)
+        """
+        cache_ref = self.db.collection(collection).document(cache_key)
+        try:
+            cache_doc = circuit_breaker.call_with_breaker(circuit_breaker.FIRESTORE, cache_ref.get)
+        except circuit_breaker.CircuitBreakerError:
+            logger.warning(f"Firestore circuit open, skipping cache lookup for {source}")
+            return None
+        
+        if not cache_doc.exists:
+            return None
+        
+        content, stale = self._decode_cache_entry(cache_doc.to_dict(), source)
+        if stale:
+            cache_ref.delete()
+        return content
+
+    async def _get_from_firestore_cache_async(self, cache_key: str, source: str, collection: str = 'document_cache') -> Optional[str]:
+        """Async variant of _get_from_firestore_cache using the async Firestore client."""
+        cache_ref = self._get_async_db().collection(collection).document(cache_key)
+        try:
+            cache_doc = await circuit_breaker.call_with_breaker_async(circuit_breaker.FIRESTORE, cache_ref.get)
+        except circuit_breaker.CircuitBreakerError:
+            logger.warning(f"Firestore circuit open, skipping cache lookup for {source}")
+            return None
+        
+        if not cache_doc.exists:
+            return None
+        
+        content, stale = self._decode_cache_entry(cache_doc.to_dict(), source)
+        if stale:
+            await cache_ref.delete()
+        return content
+
+    def _decode_cache_entry(self, cache_data: Dict[str, Any], source: str) -> Tuple[Optional[str], bool]:
+        """
+        Decode a Firestore cache entry, checking its expiration.
+        
+        Args:
+            cache_data: Fields of the cache document
+            source: Document URL or description, used for logging
+            
+        Returns:
+            Tuple of (cached content or None, whether the entry should be deleted)
+        """
+        content = cache_data.get('content')
+        is_compressed = cache_data.get('compressed', False)
+        
+        # Check if cache has expired using UTC timestamp
+        expiration = cache_data.get('expiration')
+        if not expiration:
+            return None, False
+        if not isinstance(expiration, datetime.datetime):
+            logger.warning(f"Invalid expiration type in cache: {type(expiration)}")
+            return None, True
+        if not expiration.tzinfo:
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        current_utc = datetime.datetime.now(timezone.utc)
+        if expiration < current_utc:
+            logger.info(f"Cache expired for {source}")
+            return None, True
+        
+        logger.info(f"Cache hit for {source}")
+        return (zlib.decompress(content).decode('utf-8') if is_compressed else content), False
+
+    def _get_response_cache_key(self, cv_text: str, jd_text: Optional[str], bundle: TaskBundle) -> str:
+        """
+        Generate the response cache key for a task run.
+        
+        The key covers the task, the extracted texts, the bundle version (so
+        entries are invalidated when the task's prompts, examples or schema
+        change), the client's model and generation config, and the models of
+        the task's cascade, if it has one.
+        
+        Args:
+            cv_text: Extracted CV text
+            jd_text: Optional extracted JD text
+            bundle: Task bundle the request is built from
+            
+        Returns:
+            SHA-256 digest identifying the request
+        """
+        cascade = (getattr(self.vertex_client, "cascades", None) or {}).get(bundle.task)
+        generation = {
+            "model": getattr(self.vertex_client, "model_name", None),
+            "config": getattr(self.vertex_client, "default_config", None),
+            "cascade": list(cascade.models) if cascade is not None else None
+        }
+        digest = hashlib.sha256()
+        for part in (bundle.task, bundle.version, json.dumps(generation, sort_keys=True, default=str), cv_text, jd_text or ""):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return f"response-{digest.hexdigest()}"
+
+    def _get_cached_response(self, cache_key: str, task: str) -> Optional[dict]:
+        """
+        Look up a validated task result in memory, then in Firestore.
+        
+        Args:
+            cache_key: Response cache key
+            task: Task name, used for logging
+            
+        Returns:
+            A copy of the cached result if available and not expired, None otherwise
+        """
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            # Callers may modify the result; the cached one must stay as it was
+            return copy.deepcopy(cached)
+        try:
+            content = self._get_from_firestore_cache(cache_key, f"{task} response", collection='response_cache')
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed for {task}: {e}")
+            return None
+        return self._load_cached_response(cache_key, content)
+
+    async def _get_cached_response_async(self, cache_key: str, task: str) -> Optional[dict]:
+        """Async variant of _get_cached_response."""
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        try:
+            content = await self._get_from_firestore_cache_async(cache_key, f"{task} response", collection='response_cache')
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed for {task}: {e}")
+            return None
+        return self._load_cached_response(cache_key, content)
+
+    def _load_cached_response(self, cache_key: str, content: Optional[str]) -> Optional[dict]:
+        """Decode a result read from Firestore and keep it in the memory cache."""
+        if content is None:
+            return None
+        result = json.loads(content)
+        _response_cache.set(cache_key, copy.deepcopy(result), time.time() + config.RESPONSE_CACHE_TTL_SECONDS)
+        return result
+
+    def _cache_response(self, cache_key: str, bundle: TaskBundle, result: dict) -> None:
+        """
+        Store a successful task result in memory and in Firestore.
+        
+        Args:
+            cache_key: Response cache key
+            bundle: Task bundle the result was produced with
+            result: Validated result returned by the client
+        """
+        if not isinstance(result, dict) or result.get("status") != "success":
+            return
+        # The caller keeps result, so the cache holds its own copy
+        _response_cache.set(cache_key, copy.deepcopy(result), time.time() + config.RESPONSE_CACHE_TTL_SECONDS)
+        try:
+            circuit_breaker.call_with_breaker(
+                circuit_breaker.FIRESTORE, self.db.collection('response_cache').document(cache_key).set,
+                self._response_cache_data(bundle, result)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache {bundle.task} response in Firestore: {e}")
+
+    async def _cache_response_async(self, cache_key: str, bundle: TaskBundle, result: dict) -> None:
+        """Async variant of _cache_response using the async Firestore client."""
+        if not isinstance(result, dict) or result.get("status") != "success":
+            return
+        # The caller keeps result, so the cache holds its own copy
+        _response_cache.set(cache_key, copy.deepcopy(result), time.time() + config.RESPONSE_CACHE_TTL_SECONDS)
+        try:
+            await circuit_breaker.call_with_breaker_async(
+                circuit_breaker.FIRESTORE, self._get_async_db().collection('response_cache').document(cache_key).set,
+                self._response_cache_data(bundle, result)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache {bundle.task} response in Firestore: {e}")
+
+    def _response_cache_data(self, bundle: TaskBundle, result: dict) -> Dict[str, Any]:
+        """Build the Firestore document for a cached task result."""
+        current_utc = datetime.datetime.now(timezone.utc)
+        content = json.dumps(result)
+        compressed = len(content) > config.CACHE_COMPRESSION_THRESHOLD
+        return {
+            'content': zlib.compress(content.encode('utf-8')) if compressed else content,
+            'compressed': compressed,
+            'task': bundle.task,
+            'bundle_version': bundle.version,
+            'timestamp': current_utc,
+            'expiration': current_utc + datetime.timedelta(seconds=config.RESPONSE_CACHE_TTL_SECONDS)
+        }
 
     def download_and_process(self, url: str) -> Optional[str]:
         """Download a document from URL or GCS and extract its text content."""
@@ -164,35 +483,13 @@ class DocumentProcessor:
                         return memory_cached
                     
                     # Check Firestore cache
-                    cache_ref = self.db.collection('document_cache').document(cache_key)
-                    cache_doc = cache_ref.get()
-                    
-                    if cache_doc.exists:
+                    firestore_cached = self._get_from_firestore_cache(cache_key, url)
+                    if firestore_cached is not None:
                         cache_span.set_attribute("cache.hit", True)
                         cache_span.set_attribute("cache.type", "firestore")
-                        cache_data = cache_doc.to_dict()
-                        content = cache_data.get('content')
-                        is_compressed = cache_data.get('compressed', False)
-                        
-                        # Check if cache has expired using UTC timestamp
-                        expiration = cache_data.get('expiration')
-                        if expiration:
-                            if not isinstance(expiration, datetime.datetime):
-                                logger.warning(f"Invalid expiration type in cache: {type(expiration)}")
-                                cache_ref.delete()
-                            else:
-                                if not expiration.tzinfo:
-                                    expiration = expiration.replace(tzinfo=timezone.utc)
-                                current_utc = datetime.datetime.now(timezone.utc)
-                                if expiration < current_utc:
-                                    logger.info(f"Cache expired for {url}")
-                                    cache_ref.delete()
-                                else:
-                                    logger.info(f"Cache hit for {url}")
-                                    result = zlib.decompress(content).decode('utf-8') if is_compressed else content
-                                    # Store in memory cache for faster subsequent access
-                                    self._get_from_memory_cache.cache_parameters = (cache_key,)  # This will update the LRU cache
-                                    return result
+                        # Store in memory cache for faster subsequent access
+                        self._store_in_memory_cache(cache_key, firestore_cached)
+                        return firestore_cached
                 
                 # If not in cache, process the document
                 with self.tracer.start_span("download_document") as download_span:
@@ -201,33 +498,23 @@ class DocumentProcessor:
                     else:
                         file_content, content_type = self._download_from_url(url)
                     
-                    if not file_content or not content_type:
+                    if not file_content:
                         span.set_attribute("error", True)
                         span.set_attribute("error.message", "Failed to download document")
                         raise ValueError(f"Failed to download document from {url}")
                     
-                    # Validate content types explicitly
-                    if content_type not in config.ALLOWED_CONTENT_TYPES:
-                        logger.warning(f"Unsupported content type: {content_type}")
-                        raise ValueError(f"Unsupported file format: {content_type}")
-                    
-                    # Extract text based on content type
-                    text_content = None
-                    if content_type == 'application/pdf':
-                        text_content = self._extract_text_from_pdf(file_content)
-                    elif content_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-                        text_content = self._extract_text_from_docx(file_content)
-                    else:
-                        logger.warning(f"Unsupported content type: {content_type}")
-                        raise ValueError(f"Unsupported file format: {content_type}")
-                    
-                    if text_content is None:
+                    content_type = self._detect_content_type(file_content, content_type)
+                    extracted = self._extract_text(file_content, content_type)
+                    if extracted is None:
                         raise ValueError(f"Failed to extract text from document")
                 
-                # Cache the result if successful
-                if text_content:
-                    self._cache_document(cache_key, text_content, url, content_type)
-                return text_content
+                # Cache the result if successful and complete
+                if extracted.truncated:
+                    logger.info(f"Extraction of {url} truncated: {extracted.metadata()}")
+                elif extracted.text:
+                    self._store_in_memory_cache(cache_key, extracted.text)
+                    self._cache_document(cache_key, extracted.text, url, content_type)
+                return extracted.text
                 
             except Exception as e:
                 span.set_attribute("error", True)
@@ -235,6 +522,102 @@ class DocumentProcessor:
                 logger.error(f"Error processing document: {e}")
                 raise  # Re-raise the exception to ensure test failures are caught
     
+    async def download_and_process_async(self, url: str) -> Optional[str]:
+        """
+        Async variant of download_and_process.
+        
+        URLs are fetched with httpx.AsyncClient and the Firestore cache is read
+        and written with the async client. GCS downloads and text extraction
+        are blocking and run in a worker thread.
+        
+        Args:
+            url: URL or GCS URI of the document
+            
+        Returns:
+            Extracted text content
+        """
+        self._ensure_not_closed()
+        with self.tracer.start_as_current_span("download_and_process_async") as span:
+            try:
+                span.set_attribute("document.url", url)
+                cache_key = self._get_cache_key(url)
+                
+                memory_cached = self._get_from_memory_cache(cache_key)
+                if memory_cached:
+                    span.set_attribute("cache.type", "memory")
+                    return memory_cached
+                firestore_cached = await self._get_from_firestore_cache_async(cache_key, url)
+                if firestore_cached is not None:
+                    span.set_attribute("cache.type", "firestore")
+                    self._store_in_memory_cache(cache_key, firestore_cached)
+                    return firestore_cached
+                
+                if url.startswith('gs://'):
+                    file_content, content_type = await asyncio.to_thread(self._download_from_gcs, url)
+                else:
+                    file_content, content_type = await self._download_from_url_async(url)
+                if not file_content:
+                    raise ValueError(f"Failed to download document from {url}")
+                
+                content_type = self._detect_content_type(file_content, content_type)
+                extracted = await asyncio.to_thread(self._extract_text, file_content, content_type)
+                if extracted is None:
+                    raise ValueError(f"Failed to extract text from document")
+                if extracted.truncated:
+                    logger.info(f"Extraction of {url} truncated: {extracted.metadata()}")
+                elif extracted.text:
+                    self._store_in_memory_cache(cache_key, extracted.text)
+                    await self._cache_document_async(cache_key, extracted.text, url, content_type)
+                return extracted.text
+                
+            except Exception as e:
+                span.set_attribute("error", True)
+                span.set_attribute("error.message", str(e))
+                logger.error(f"Error processing document: {e}")
+                raise
+
+    def _detect_content_type(self, file_content: bytes, declared_type: Optional[str] = None) -> str:
+        """
+        Detect a document's format from its bytes.
+        
+        Args:
+            file_content: Document content as bytes
+            declared_type: Content type reported by the server, used for logging only
+            
+        Returns:
+            Content type of the document
+            
+        Raises:
+            ValueError: If the format is not recognised or not allowed
+        """
+        content_type = text_extraction.sniff_content_type(file_content)
+        if content_type is None:
+            logger.warning(f"Unrecognised document content (declared {declared_type})")
+            raise ValueError(f"Unsupported file format: unrecognised content (declared {declared_type})")
+        if content_type not in config.ALLOWED_CONTENT_TYPES:
+            logger.warning(f"Unsupported content type: {content_type}")
+            raise ValueError(f"Unsupported file format: {content_type}")
+        if declared_type and declared_type.split(';')[0].strip() != content_type:
+            logger.info(f"Declared content type {declared_type} does not match detected {content_type}")
+        return content_type
+
+    def _extract_text(self, file_content: bytes, content_type: str) -> Optional[ExtractedText]:
+        """
+        Extract text with the extractor for a detected content type.
+        
+        Args:
+            file_content: Document content as bytes
+            content_type: Content type returned by _detect_content_type
+            
+        Returns:
+            Extracted text within the extraction limits, or None if extraction fails
+        """
+        extractors = {
+            text_extraction.PDF_CONTENT_TYPE: self._extract_text_from_pdf,
+            text_extraction.DOCX_CONTENT_TYPE: self._extract_text_from_docx
+        }
+        return extractors[content_type](file_content)
+    
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def _download_from_url(self, url: str) -> Tuple[Optional[bytes], Optional[str]]:
         """
@@ -258,6 +641,27 @@ class DocumentProcessor:
         except Exception as e:
             logger.error(f"Error downloading from URL {url}: {e}")
             return None, None
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    async def _download_from_url_async(self, url: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Download a file from a URL without blocking the event loop.
+        
+        Args:
+            url: URL of the file
+            
+        Returns:
+            Tuple of (file content as bytes, content type) or (None, None) if download fails
+        """
+        self._ensure_not_closed()
+        try:
+            async with httpx.AsyncClient(timeout=30) as client:
+                response = await client.get(url)
+                response.raise_for_status()
+            return response.content, response.headers.get('Content-Type')
+        except Exception as e:
+            logger.error(f"Error downloading from URL {url}: {e}")
+            return None, None
     
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def _download_from_gcs(self, gcs_uri: str) -> Tuple[Optional[bytes], Optional[str]]:
@@ -306,70 +710,365 @@ class DocumentProcessor:
             logger.error(f"Error downloading file from {gcs_uri}: {e}")
             return None, None
     
-    def _extract_text_from_pdf(self, file_content: bytes) -> Optional[str]:
+    def _extract_text_from_pdf(self, file_content: bytes) -> Optional[ExtractedText]:
         """
-        Extract text from a PDF file using pypdf.
+        Extract text from a PDF file with the processor's PDF backend.
+        
+        Large files are parsed in the extraction pool's worker processes.
+        Large files of at least config.PDF_PARALLEL_MIN_PAGES pages (after
+        the page limit) are split into one page range per worker, extracted
+        in parallel and reassembled in page order; files small enough to be
+        extracted inline are never split.
         
         Args:
             file_content: PDF file content as bytes
             
         Returns:
-            Extracted text or None if extraction fails
+            Extracted text within the extraction limits, or None if extraction fails
         """
         self._ensure_not_closed()
+        limits = self.extraction_limits
+        deadline = limits.deadline()
         try:
-            file_stream = io.BytesIO(file_content)
-            pdf_reader = PdfReader(file_stream)
-            
-            # Process pages in chunks to reduce memory usage
-            text_chunks = []
-            for page in pdf_reader.pages:
-                text = page.extract_text().strip()
-                if text:
-                    text_chunks.append(text)
-            
-            return "\n".join(text_chunks)
-            
+            pool = get_extraction_pool()
+            page_count = None
+            if config.PDF_PARALLEL_MIN_PAGES > 0 and pool.max_workers > 1 and not pool.runs_inline(file_content):
+                page_count = text_extraction.count_pdf_pages(file_content)
+                pages_to_read = min(page_count, limits.max_pages) if limits.max_pages else page_count
+                if pages_to_read >= config.PDF_PARALLEL_MIN_PAGES:
+                    extract_range = functools.partial(
+                        text_extraction.extract_pdf_document,
+                        backend=self.pdf_backend,
+                        limits=limits,
+                        deadline=deadline,
+                        total_pages=page_count
+                    )
+                    ranges = text_extraction.split_pages(pages_to_read, pool.max_workers)
+                    return text_extraction.merge_extractions(pool.map(extract_range, file_content, ranges), limits)
+            extract = functools.partial(
+                text_extraction.extract_pdf_document,
+                backend=self.pdf_backend,
+                limits=limits,
+                deadline=deadline,
+                total_pages=page_count
+            )
+            return pool.run(extract, file_content)
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {e}")
             return None
     
-    def _extract_text_from_docx(self, file_content: bytes) -> Optional[str]:
+    def _extract_text_from_docx(self, file_content: bytes) -> Optional[ExtractedText]:
         """
         Extract text from a DOCX file.
         
+        Large files are parsed in the extraction pool's worker processes.
+        
         Args:
             file_content: DOCX file content as bytes
             
         Returns:
-            Extracted text or None if extraction fails
+            Extracted text within the extraction limits, or None if extraction fails
         """
         self._ensure_not_closed()
+        limits = self.extraction_limits
         try:
-            # Create a file-like object from the binary content
-            file_stream = io.BytesIO(file_content)
-            
-            # Create a docx document object
-            doc = docx.Document(file_stream)
-            
-            # Extract text from all paragraphs and join with single newlines
-            paragraphs = [para.text.strip() for para in doc.paragraphs if para.text.strip()]
-            text = "\n".join(paragraphs)
-            
-            logger.info(f"Successfully extracted {len(text)} characters from DOCX")
-            return text
+            extract = functools.partial(text_extraction.extract_docx_document, limits=limits, deadline=limits.deadline())
+            extracted = get_extraction_pool().run(extract, file_content)
+            logger.info(f"Successfully extracted {len(extracted.text)} characters from DOCX")
+            return extracted
             
         except Exception as e:
             logger.error(f"Error extracting text from DOCX: {e}")
             return None
 
-    def process_document(self, cv_content: bytes, jd_content: Optional[bytes] = None) -> dict:
+    def _extract_text_cached(self, file_content: bytes) -> Optional[ExtractedText]:
+        """
+        Extract text from uploaded PDF/DOCX bytes, reusing earlier extractions.
+        
+        The format is detected from the bytes, so each upload is parsed once.
+        
+        Results are keyed by a hash of the bytes and kept both in the
+        process-wide memory cache and in the Firestore document cache, so the
+        same CV submitted for several tasks is only extracted once. Truncated
+        extractions are not cached, so the cache only holds complete texts.
+        
+        Args:
+            file_content: PDF or DOCX file content as bytes
+            
+        Returns:
+            Extracted text within the extraction limits, or None if extraction fails
+        """
+        with self.tracer.start_span("extract_text_cached") as span:
+            try:
+                content_type = self._detect_content_type(file_content)
+            except ValueError:
+                return None
+            span.set_attribute("document.content_type", content_type)
+            cache_key = self._get_content_cache_key(file_content, content_type)
+            source = f"upload {cache_key}"
+            
+            cached = self._get_from_memory_cache(cache_key)
+            if cached:
+                span.set_attribute("cache.hit", True)
+                span.set_attribute("cache.type", "memory")
+                return ExtractedText(cached)
+            
+            try:
+                cached = self._get_from_firestore_cache(cache_key, source)
+            except Exception as e:
+                logger.warning(f"Firestore cache lookup failed for {source}: {e}")
+                cached = None
+            if cached:
+                span.set_attribute("cache.hit", True)
+                span.set_attribute("cache.type", "firestore")
+                self._store_in_memory_cache(cache_key, cached)
+                return ExtractedText(cached)
+            
+            span.set_attribute("cache.hit", False)
+            extracted = self._extract_text(file_content, content_type)
+            if extracted is None:
+                return None
+            
+            if extracted.truncated:
+                span.set_attribute("document.truncated_by", extracted.truncated_by)
+                logger.info(f"Extraction of {source} truncated: {extracted.metadata()}")
+            elif extracted.text:
+                self._store_in_memory_cache(cache_key, extracted.text)
+                try:
+                    self._cache_document(cache_key, extracted.text, source, content_type)
+                except Exception as e:
+                    logger.warning(f"Failed to cache extracted text for {source}: {e}")
+            return extracted
+
+    def extract_texts(self, cv_content: bytes, jd_content: Optional[bytes] = None) -> Tuple[str, Optional[str]]:
+        """
+        Extract text from the uploaded CV and optional JD.
+        
+        Documents cut short by the extraction limits are recorded in
+        self.truncated, keyed "cv" or "jd".
+        
+        Args:
+            cv_content: CV file content as bytes, or a memoryview of a spooled upload
+            jd_content: Optional JD file content, likewise
+            
+        Returns:
+            Tuple of (cv_text, jd_text); jd_text is None if no JD was provided
+            
+        Raises:
+            ValueError: If no text could be extracted from the CV
+        """
+        self._ensure_not_closed()
+        self.truncated = {}
+        cv = None
+        if cv_content:
+            cv = self._extract_text_cached(cv_content)
+        
+        if not cv or not cv.text:
+            raise ValueError("Failed to extract text from CV file")
+        
+        # Extract text from JD if provided
+        jd = None
+        if jd_content:
+            jd = self._extract_text_cached(jd_content)
+        
+        for role, extracted in (("cv", cv), ("jd", jd)):
+            if extracted and extracted.truncated:
+                self.truncated[role] = extracted.metadata()
+        return cv.text, jd.text if jd else None
+
+    async def extract_texts_async(self, cv_content: bytes, jd_content: Optional[bytes] = None) -> Tuple[str, Optional[str]]:
+        """
+        Run extract_texts in a worker thread.
+        
+        PDF and DOCX parsing is CPU-bound, so it is kept off the event loop.
+        
+        Args:
+            cv_content: CV file content as bytes
+            jd_content: Optional JD file content as bytes
+            
+        Returns:
+            Tuple of (cv_text, jd_text); jd_text is None if no JD was provided
+        """
+        return await asyncio.to_thread(self.extract_texts, cv_content, jd_content)
+
+    def _build_request(self, cv_text: str, jd_text: Optional[str], bundle: Optional[TaskBundle]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the model request for a task.
+        
+        Args:
+            cv_text: Extracted CV text
+            jd_text: Optional extracted JD text
+            bundle: Optional task bundle overriding the processor's prompts and schema
+            
+        Returns:
+            Tuple of (prompt, keyword arguments for the client's generate call).
+            If the client has a context cache, a bundle's few-shot examples are
+            passed as static_context rather than rendered into the prompt, so
+            they can be served from the cache; otherwise the prompt template is
+            rendered as it is, examples included.
+        """
+        if (bundle and bundle.few_shot_examples and bundle.prompt_template_without_examples
+                and getattr(self.vertex_client, "context_cache", None) is not None):
+            prompt = bundle.prompt_template_without_examples.render(
+                cv_content=cv_text,
+                jd_content=jd_text or ""
+            )
+            return prompt, {
+                "system_prompt": bundle.system_prompt,
+                "static_context": bundle.few_shot_examples,
+                "response_schema": bundle.schema_model
+            }
+        if bundle:
+            system_prompt, prompt_template, schema_model = bundle.system_prompt, bundle.prompt_template, bundle.schema_model
+        else:
+            system_prompt, prompt_template, schema_model = self.system_prompt, self.prompt_template, self.schema_model
+        
+        # Format the prompt with the extracted text
+        if prompt_template:
+            prompt = prompt_template.render(
+                cv_content=cv_text,
+                jd_content=jd_text or ""
+            )
+        else:
+            prompt = self.user_prompt.format(
+                cv_content=cv_text,
+                jd_content=jd_text or "",
+                few_shot_examples=self.few_shot_examples or ""
+            )
+        return prompt, {"system_prompt": system_prompt, "response_schema": schema_model}
+
+    def process_text(self, cv_text: str, jd_text: Optional[str] = None, bundle: Optional[TaskBundle] = None) -> dict:
+        """
+        Run a task on already extracted text using the Vertex AI client.
+        
+        Args:
+            cv_text: Extracted CV text
+            jd_text: Optional extracted JD text
+            bundle: Optional task bundle; overrides the prompts and schema the
+                processor was created with, so one processor can serve several tasks.
+                Successful results for a bundle are served from the response cache
+                when the same inputs are seen again.
+            
+        Returns:
+            dict: Processing results
+        """
+        self._ensure_not_closed()
+        # Process with Vertex AI
+        if not self.vertex_client:
+            raise ValueError("Vertex AI client not initialized")
+        
+        cache_key = None
+        if bundle and config.RESPONSE_CACHE_ENABLED:
+            cache_key = self._get_response_cache_key(cv_text, jd_text, bundle)
+            cached = self._get_cached_response(cache_key, bundle.task)
+            if cached is not None:
+                logger.info(f"Response cache hit for {bundle.task}")
+                return cached
+        
+        prompt, request_kwargs = self._build_request(cv_text, jd_text, bundle)
+        if bundle:
+            # Lets the client apply the task's model cascade
+            request_kwargs["task"] = bundle.task
+        
+        # Generate content using Vertex AI
+        result = self.vertex_client.generate_content(prompt, **request_kwargs)
+        if cache_key:
+            self._cache_response(cache_key, bundle, result)
+        return result
+
+    async def process_text_async(self, cv_text: str, jd_text: Optional[str] = None, bundle: Optional[TaskBundle] = None) -> dict:
+        """
+        Async variant of process_text.
+        
+        Requires a vertex_client with generate_content_async (GeminiClient);
+        the response cache is read and written with the async Firestore client.
+        
+        Args:
+            cv_text: Extracted CV text
+            jd_text: Optional extracted JD text
+            bundle: Optional task bundle, as for process_text
+            
+        Returns:
+            dict: Processing results
+        """
+        self._ensure_not_closed()
+        if not self.vertex_client or not hasattr(self.vertex_client, "generate_content_async"):
+            raise ValueError("Vertex AI client does not support async generation")
+        
+        cache_key = None
+        if bundle and config.RESPONSE_CACHE_ENABLED:
+            cache_key = self._get_response_cache_key(cv_text, jd_text, bundle)
+            cached = await self._get_cached_response_async(cache_key, bundle.task)
+            if cached is not None:
+                logger.info(f"Response cache hit for {bundle.task}")
+                return cached
+        
+        prompt, request_kwargs = self._build_request(cv_text, jd_text, bundle)
+        if bundle:
+            request_kwargs["task"] = bundle.task
+        
+        result = await self.vertex_client.generate_content_async(prompt, **request_kwargs)
+        if cache_key:
+            await self._cache_response_async(cache_key, bundle, result)
+        return result
+
+    def process_text_stream(self, cv_text: str, jd_text: Optional[str] = None, bundle: Optional[TaskBundle] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Run a task on already extracted text, streaming the model output.
+        
+        Requires a vertex_client with generate_content_stream (GeminiClient).
+        Streaming bypasses model cascades: text is relayed as it arrives, so a
+        cheap model's output could not be withdrawn on escalation, and the
+        task always runs on the default model.
+        
+        Args:
+            cv_text: Extracted CV text
+            jd_text: Optional extracted JD text
+            bundle: Optional task bundle, as for process_text
+            
+        Returns:
+            Iterator of chunk events followed by a final result event
+            (see GeminiClient.generate_content_stream); a cached result is
+            returned as a single result event
+        """
+        self._ensure_not_closed()
+        if not self.vertex_client or not hasattr(self.vertex_client, "generate_content_stream"):
+            raise ValueError("Vertex AI client does not support streaming")
+        
+        cache_key = None
+        if bundle and config.RESPONSE_CACHE_ENABLED:
+            cache_key = self._get_response_cache_key(cv_text, jd_text, bundle)
+            cached = self._get_cached_response(cache_key, bundle.task)
+            if cached is not None:
+                logger.info(f"Response cache hit for {bundle.task}")
+                return iter([{"type": "result", "result": cached}])
+        
+        prompt, request_kwargs = self._build_request(cv_text, jd_text, bundle)
+        events = self.vertex_client.generate_content_stream(prompt, **request_kwargs)
+        if not cache_key:
+            return events
+        return self._cache_stream_result(events, cache_key, bundle)
+
+    def _cache_stream_result(self, events: Iterator[Dict[str, Any]], cache_key: str, bundle: TaskBundle) -> Iterator[Dict[str, Any]]:
+        """Relay stream events, caching the final result once it arrives."""
+        try:
+            for event in events:
+                if event.get("type") == "result":
+                    self._cache_response(cache_key, bundle, event.get("result"))
+                yield event
+        finally:
+            # Stop the underlying generation if the consumer goes away early
+            if hasattr(events, "close"):
+                events.close()
+
+    def process_document(self, cv_content: bytes, jd_content: Optional[bytes] = None, bundle: Optional[TaskBundle] = None) -> dict:
         """
         Process a document using the Vertex AI client.
         
         Args:
             cv_content: CV file content as bytes
             jd_content: Optional JD file content as bytes
+            bundle: Optional task bundle, as for process_text
             
         Returns:
             dict: Processing results
@@ -377,47 +1076,11 @@ class DocumentProcessor:
         self._ensure_not_closed()
         with self.tracer.start_as_current_span("process_document") as span:
             try:
-                # Extract text from CV
-                cv_text = None
-                if cv_content:
-                    # Try PDF first
-                    cv_text = self._extract_text_from_pdf(cv_content)
-                    if not cv_text:
-                        # Try DOCX if PDF fails
-                        cv_text = self._extract_text_from_docx(cv_content)
-                
-                if not cv_text:
-                    raise ValueError("Failed to extract text from CV file")
-                
-                # Extract text from JD if provided
-                jd_text = None
-                if jd_content:
-                    jd_text = self._extract_text_from_pdf(jd_content)
-                    if not jd_text:
-                        jd_text = self._extract_text_from_docx(jd_content)
-                
-                # Process with Vertex AI
-                if not self.vertex_client:
-                    raise ValueError("Vertex AI client not initialized")
-                
-                # Format the prompt with the extracted text
-                prompt = self.user_prompt.format(
-                    cv_content=cv_text,
-                    jd_content=jd_text or "",
-                    few_shot_examples=self.few_shot_examples or ""
-                )
-                
-                # Generate content using Vertex AI
-                result = self.vertex_client.generate_content(
-                    prompt=prompt,
-                    system_prompt=self.system_prompt,
-                    schema_model=self.schema_model
-                )
-                
-                return result
+                cv_text, jd_text = self.extract_texts(cv_content, jd_content)
+                return self.process_text(cv_text, jd_text, bundle=bundle)
                 
             except Exception as e:
                 span.set_attribute("error", True)
                 span.set_attribute("error.message", str(e))
                 logger.error(f"Error processing document: {e}")
-                raise 
\ No newline at end of file
+                raise
@@ -0,0 +1,238 @@
+"""Process pool for CPU-bound document text extraction.
+
+pypdf is pure Python and holds the GIL while it parses, so extracting a
+multi-page CV on a request thread stalls every other request on the
+instance. ExtractionPool runs extraction in worker processes instead.
+Documents up to inline_max_bytes are still parsed inline, where the round
+trip to a worker costs more than it saves. Larger ones go to a bounded
+ProcessPoolExecutor and must finish within timeout_seconds. A worker that
+overruns is killed together with the rest of the pool, which is replaced;
+extractions caught in the recycle are retried once on the new pool.
+
+map() splits one document across the workers instead, e.g. a long PDF by
+page range, and returns the parts in order.
+
+Uploads spooled to a file by utils.upload_spool are passed to the workers
+as the file's path and mapped there, rather than pickled through a pipe.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import config
+from utils import upload_spool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ExtractionTimeoutError(Exception):
+    """Raised when a document is not extracted within the pool's timeout."""
+
+
+def _noop() -> None:
+    """Task used to start the workers ahead of the first document."""
+
+
+def _call(func: Callable[..., T], payload: Any, *args: Any) -> T:
+    """Run func in a worker on a document sent by upload_spool.to_worker_payload."""
+    with upload_spool.open_worker_payload(payload) as file_content:
+        return func(file_content, *args)
+
+
+class ExtractionPool:
+    """Runs extraction functions inline or in worker processes depending on document size."""
+
+    def __init__(
+        self,
+        max_workers: int,
+        inline_max_bytes: int,
+        timeout_seconds: float,
+        start_method: str = "forkserver"
+    ):
+        """
+        Initialize the pool; workers are started by start() or on first use.
+
+        Args:
+            max_workers: Number of worker processes (0 runs everything inline)
+            inline_max_bytes: Documents up to this size are extracted inline
+            timeout_seconds: Time a pooled extraction may take before its worker is killed
+            start_method: multiprocessing start method. forkserver avoids
+                forking a parent that already runs gRPC threads.
+        """
+        self.max_workers = max_workers
+        self.inline_max_bytes = inline_max_bytes
+        self.timeout_seconds = timeout_seconds
+        self._context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            # Workers fork from a server that has already imported the parsers
+            self._context.set_forkserver_preload(["utils.text_extraction"])
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._counts = {"inline": 0, "pooled": 0, "parallel": 0, "timeouts": 0, "recycles": 0}
+
+    def _inc(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+            return self._executor
+
+    def start(self) -> None:
+        """Start every worker now rather than on the first large document."""
+        if self.max_workers <= 0:
+            return
+        executor = self._get_executor()
+        for future in [executor.submit(_noop) for _ in range(self.max_workers)]:
+            future.result()
+        logger.info(f"Started {self.max_workers} extraction workers")
+
+    def runs_inline(self, file_content: bytes) -> bool:
+        """Return True if run() extracts file_content in the calling thread."""
+        return self.max_workers <= 0 or len(file_content) <= self.inline_max_bytes
+
+    def run(self, func: Callable[[bytes], T], file_content: bytes) -> T:
+        """
+        Run an extraction function on a document.
+
+        Args:
+            func: Module-level function taking the document bytes (must be picklable)
+            file_content: Document content, as bytes or a utils.upload_spool buffer
+
+        Returns:
+            The return value of func
+
+        Raises:
+            ExtractionTimeoutError: If a pooled extraction exceeds timeout_seconds
+            BrokenProcessPool: If the worker died twice (e.g. the parser crashed)
+            Exception: Any error raised by func
+        """
+        if self.runs_inline(file_content):
+            self._inc("inline")
+            return func(file_content)
+
+        self._inc("pooled")
+        try:
+            return self._run_pooled(func, file_content)
+        except BrokenProcessPool:
+            # A worker crashed or the pool was recycled after another document hung
+            logger.warning("Extraction pool was broken, retrying on a new pool")
+            return self._run_pooled(func, file_content)
+
+    def map(self, func: Callable[..., T], file_content: bytes, args_list: Sequence[Tuple[Any, ...]]) -> List[T]:
+        """
+        Run func(file_content, *args) for every args in args_list, in parallel.
+        
+        Every call receives its own copy of file_content, or its own mapping
+        of a spooled upload. All calls together must finish within
+        timeout_seconds. Unlike run(), map() does not extract small documents
+        inline; callers check runs_inline() before splitting one.
+        
+        Args:
+            func: Module-level function (must be picklable)
+            file_content: Document content, as bytes or a utils.upload_spool buffer
+            args_list: Extra arguments of each call, e.g. page ranges
+            
+        Returns:
+            The return values of func, in the order of args_list
+            
+        Raises:
+            ExtractionTimeoutError: If the calls do not finish within timeout_seconds
+            BrokenProcessPool: If a worker died twice
+            Exception: Any error raised by func
+        """
+        if self.max_workers <= 0:
+            self._inc("inline")
+            return [func(file_content, *args) for args in args_list]
+
+        self._inc("parallel")
+        try:
+            return self._map_pooled(func, file_content, args_list)
+        except BrokenProcessPool:
+            logger.warning("Extraction pool was broken, retrying on a new pool")
+            return self._map_pooled(func, file_content, args_list)
+
+    def _run_pooled(self, func: Callable[[bytes], T], file_content: bytes) -> T:
+        return self._map_pooled(func, file_content, [()])[0]
+
+    def _map_pooled(self, func: Callable[..., T], file_content: bytes, args_list: Sequence[Tuple[Any, ...]]) -> List[T]:
+        executor = self._get_executor()
+        deadline = time.monotonic() + self.timeout_seconds
+        payload = upload_spool.to_worker_payload(file_content)
+        try:
+            futures = [executor.submit(_call, func, payload, *args) for args in args_list]
+            return [future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures]
+        except FutureTimeoutError:
+            self._inc("timeouts")
+            logger.error(f"Extraction exceeded {self.timeout_seconds}s, killing extraction workers")
+            self._recycle(executor)
+            raise ExtractionTimeoutError(f"Extraction did not finish within {self.timeout_seconds} seconds")
+        except BrokenProcessPool:
+            self._recycle(executor)
+            raise
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Kill the workers of executor and let the next call start a new pool."""
+        with self._lock:
+            if self._executor is not executor:
+                # Already replaced by another thread
+                return
+            self._executor = None
+            self._counts["recycles"] += 1
+        # ProcessPoolExecutor has no public way to stop a running task
+        for process in list((executor._processes or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """Stop the workers."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return inline, pooled, parallel, timeout and recycle counters and the pool configuration."""
+        with self._lock:
+            return {
+                **self._counts,
+                "workers": self.max_workers,
+                "inline_max_bytes": self.inline_max_bytes,
+                "timeout_seconds": self.timeout_seconds
+            }
+
+
+_pool: Optional[ExtractionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Return the process-wide extraction pool, configured from config on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ExtractionPool(
+                    max_workers=config.EXTRACTION_POOL_WORKERS,
+                    inline_max_bytes=config.EXTRACTION_INLINE_MAX_BYTES,
+                    timeout_seconds=config.EXTRACTION_TIMEOUT_SECONDS
+                )
+    return _pool
+
+
+def shutdown_extraction_pool() -> None:
+    """Stop the process-wide pool's workers and drop it (used by tests)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -1,9 +1,11 @@
+import asyncio
 import os
 import json
 import logging
 import time
 import re
-from typing import Dict, Any, Optional, List, Type, Union
+import threading
+from typing import Dict, Any, Iterator, Optional, List, Tuple, Type, Union
 # Import for Vertex AI SDK
 import google.cloud.aiplatform as aiplatform
 # Import the specific GenerativeModel and other imports correctly
@@ -13,11 +15,20 @@ from vertexai.generative_models import Part
 from vertexai.generative_models import GenerationConfig
 from vertexai.generative_models import HarmCategory
 from vertexai.generative_models import HarmBlockThreshold
+from google.api_core import exceptions as api_exceptions
 from google.cloud import storage
 from opentelemetry import trace
 import base64
+import copy
+from functools import lru_cache
 from pydantic import BaseModel, ValidationError
+import config as app_config
 from models.schemas import BaseResponseSchema, SCHEMA_REGISTRY, StatusEnum, SeverityEnum
+from utils.context_cache import ContextCacheManager, VertexContextCacheBackend
+from utils import circuit_breaker
+from utils.resilience import HedgingPolicy, RetryBudget, full_jitter_delay, is_retryable, retry_after_seconds
+from utils.model_cascade import ModelCascade, build_cascades
+from utils.json_stream import IncrementalJSONParser, JSONStreamError, StreamingSchemaValidator
 from enum import Enum
 
 logger = logging.getLogger(__name__)
@@ -25,16 +36,190 @@ logger = logging.getLogger(__name__)
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+# Safety filters are disabled: CVs routinely trip them on harmless content
+SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE
+}
+
+# Schema keywords understood by Vertex AI response schemas (OpenAPI subset)
+_VERTEX_SCHEMA_KEYS = {
+    "type", "format", "description", "nullable", "enum", "items", "properties", "required",
+    "minItems", "maxItems", "minimum", "maximum", "minLength", "maxLength", "anyOf"
+}
+
+def _to_vertex_schema(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    """Inline $refs and drop keywords Vertex AI does not accept from a JSON schema node."""
+    if "$ref" in schema:
+        resolved = defs[schema["$ref"].split("/")[-1]]
+        # Sibling keys (e.g. a field description) take precedence over the definition
+        schema = {**resolved, **{k: v for k, v in schema.items() if k != "$ref"}}
+    if "allOf" in schema and len(schema["allOf"]) == 1:
+        schema = {**schema["allOf"][0], **{k: v for k, v in schema.items() if k != "allOf"}}
+    if "anyOf" in schema:
+        options = [o for o in schema["anyOf"] if o.get("type") != "null"]
+        nullable = len(options) < len(schema["anyOf"])
+        rest = {k: v for k, v in schema.items() if k != "anyOf"}
+        if len(options) == 1:
+            schema = {**options[0], **rest}
+        else:
+            schema = {**rest, "anyOf": options}
+        if nullable:
+            schema["nullable"] = True
+    if "const" in schema:
+        schema = {**schema, "enum": [schema["const"]]}
+
+    result = {}
+    for key, value in schema.items():
+        if key not in _VERTEX_SCHEMA_KEYS:
+            continue
+        if key == "properties":
+            value = {name: _to_vertex_schema(prop, defs) for name, prop in value.items()}
+        elif key == "items":
+            value = _to_vertex_schema(value, defs)
+        elif key == "anyOf":
+            value = [_to_vertex_schema(option, defs) for option in value]
+        result[key] = value
+    return result
+
+@lru_cache(maxsize=None)
+def _vertex_response_schema(schema_model: Type[BaseModel]) -> Dict[str, Any]:
+    """Build (once per model) the Vertex AI response schema for a Pydantic model."""
+    json_schema = schema_model.model_json_schema()
+    return _to_vertex_schema(json_schema, json_schema.get("$defs", {}))
+
+def vertex_response_schema(schema_model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Convert a Pydantic model to a response schema accepted by Vertex AI.
+
+    References to $defs are inlined, Optional fields become nullable, and
+    keywords outside the supported OpenAPI subset (title, default, ...) are
+    removed.
+
+    Args:
+        schema_model: Pydantic model describing the response
+
+    Returns:
+        Dict schema for GenerationConfig(response_schema=...)
+    """
+    return copy.deepcopy(_vertex_response_schema(schema_model))
+
+_MARKDOWN_JSON_BLOCK = re.compile(r'```(?:json)?\n?(.*?)\n?```', flags=re.DOTALL)
+_JSON_OBJECT_START = re.compile(r'{')
+# A complete (or unterminated) string literal, or a bracket
+_JSON_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"?|[{}\[\]]', flags=re.DOTALL)
+_CLOSING_BRACKETS = {'{': '}', '[': ']'}
+_JSON_DECODER = json.JSONDecoder()
+
+def _scan_json_object(text: str, start: int) -> Tuple[int, bool]:
+    """
+    Scan the object opening at text[start], ignoring brackets inside strings.
+
+    Returns:
+        Tuple of (offset where scanning stopped, whether the object was balanced).
+        On a mismatched closing bracket the offset is just past the mismatch.
+    """
+    expected = ['}']
+    pos = start + 1
+    for token in _JSON_TOKEN.finditer(text, pos):
+        value = token.group()
+        pos = token.end()
+        if value[0] == '"':
+            continue
+        if value in _CLOSING_BRACKETS:
+            expected.append(_CLOSING_BRACKETS[value])
+        elif value == expected[-1]:
+            expected.pop()
+            if not expected:
+                return pos, True
+        else:
+            return pos, False
+    return len(text), False
+
+def find_json_object_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the (start, end) offsets of each outermost balanced {...} in text.
+
+    A single left-to-right pass: brackets inside string literals are ignored,
+    nested objects are skipped as part of their parent, and a candidate with a
+    mismatched closing bracket is abandoned where the mismatch occurs, so the
+    total work is linear in len(text).
+
+    Args:
+        text: Text that may contain JSON surrounded by prose
+
+    Yields:
+        Offsets suitable for text[start:end]
+    """
+    pos = 0
+    while True:
+        opening = _JSON_OBJECT_START.search(text, pos)
+        if not opening:
+            return
+        pos, balanced = _scan_json_object(text, opening.start())
+        if balanced:
+            yield opening.start(), pos
+
+def extract_json(text: str) -> Tuple[str, Optional[Any]]:
+    """
+    Locate the JSON object in a model response that may contain prose.
+
+    A fenced markdown block wins if present. Otherwise each outermost '{' is
+    handed to the C JSON decoder, which returns the complete object starting
+    there; a candidate that does not decode is skipped as a whole with the
+    bracket scanner, so the work stays linear. If nothing decodes, the first
+    balanced candidate (or the whole text) is returned undecoded so lenient
+    cleanup can be tried.
+
+    Args:
+        text: Model response text
+
+    Returns:
+        Tuple of (json_text, decoded value or None if json_text did not decode)
+    """
+    block = _MARKDOWN_JSON_BLOCK.search(text)
+    if block:
+        candidate = block.group(1)
+        try:
+            return candidate, json.loads(candidate)
+        except json.JSONDecodeError:
+            return candidate, None
+
+    first_candidate = None
+    pos = 0
+    while True:
+        opening = _JSON_OBJECT_START.search(text, pos)
+        if not opening:
+            break
+        start = opening.start()
+        try:
+            value, end = _JSON_DECODER.raw_decode(text, start)
+            return text[start:end], value
+        except json.JSONDecodeError:
+            pos, balanced = _scan_json_object(text, start)
+            if balanced and first_candidate is None:
+                first_candidate = text[start:pos]
+    return (first_candidate if first_candidate is not None else text), None
+
 class ErrorModel(BaseModel):
     """Model for error responses."""
     code: str
     message: str
     severity: SeverityEnum = SeverityEnum.ERROR
 
+# Shared by every client in the process so retries are throttled per instance
+_retry_budget = RetryBudget(app_config.RETRY_BUDGET_MAX_TOKENS, app_config.RETRY_BUDGET_TOKEN_RATIO)
+
 class GeminiClient:
     """Client for interacting with Gemini API via Vertex AI."""
     
-    def __init__(self, project_id: str, location: str, model_name: str = "gemini-pro"):
+    def __init__(self, project_id: str, location: str, model_name: str = "gemini-pro",
+                 structured_output: Optional[bool] = None,
+                 context_cache: Optional[ContextCacheManager] = None,
+                 hedging: Optional[HedgingPolicy] = None,
+                 cascades: Optional[Dict[str, ModelCascade]] = None):
         """
         Initialize the Gemini client using Vertex AI.
 
@@ -42,6 +227,14 @@ class GeminiClient:
             project_id: Google Cloud project ID
             location: Google Cloud region
             model_name: Name of the model to use
+            structured_output: Request JSON matching the response schema from the
+                model (defaults to config.STRUCTURED_OUTPUT_ENABLED)
+            context_cache: Cache for static prompt prefixes (created from config
+                when None and config.CONTEXT_CACHE_ENABLED is set)
+            hedging: Policy for hedging slow generate_content calls (created from
+                config when None and config.HEDGING_ENABLED is set)
+            cascades: Model cascades by task (built from config.MODEL_CASCADE_TASKS
+                and MODEL_CASCADE_MODELS, ending with model_name, when None)
 
         Raises:
             ValueError: If initialization fails
@@ -49,14 +242,48 @@ class GeminiClient:
         self.project_id = project_id
         self.location = location
         self.model_name = model_name
+        self.structured_output = (
+            app_config.STRUCTURED_OUTPUT_ENABLED if structured_output is None else structured_output
+        )
         
         # Retry configuration
-        self.max_retries = 3
-        self.base_delay = 1  # Base delay in seconds
-        self.max_delay = 10  # Maximum delay in seconds
+        self.max_retries = app_config.MAX_RETRIES
+        self.base_delay = app_config.BASE_DELAY  # Base delay in seconds
+        self.max_delay = app_config.MAX_DELAY  # Maximum delay in seconds
+        self.retry_budget = _retry_budget
         
         self.tracer = trace.get_tracer(__name__)
         
+        # Model handles keyed by model name, created on first use and reused
+        # so each keeps its client and gRPC channel
+        self._model_pool: Dict[str, GenerativeModel] = {}
+        self._model_pool_lock = threading.Lock()
+        
+        # Server-side cache for the static system prompt + few-shot prefix
+        if context_cache is None and app_config.CONTEXT_CACHE_ENABLED:
+            context_cache = ContextCacheManager(
+                VertexContextCacheBackend(),
+                ttl_seconds=app_config.CONTEXT_CACHE_TTL_SECONDS,
+                refresh_margin_seconds=app_config.CONTEXT_CACHE_REFRESH_MARGIN_SECONDS,
+                retry_after_seconds=app_config.CONTEXT_CACHE_RETRY_SECONDS
+            )
+        self.context_cache = context_cache
+        
+        if hedging is None and app_config.HEDGING_ENABLED:
+            hedging = HedgingPolicy(
+                percentile=app_config.HEDGING_PERCENTILE,
+                initial_delay_seconds=app_config.HEDGING_INITIAL_DELAY_SECONDS,
+                max_hedge_ratio=app_config.HEDGING_MAX_RATIO
+            )
+        self.hedging = hedging
+        
+        if cascades is None:
+            cascades = build_cascades(app_config.MODEL_CASCADE_TASKS, app_config.MODEL_CASCADE_MODELS, self.model_name)
+        self.cascades = cascades
+        
+        # Per-schema validators for streamed responses
+        self._stream_validators: Dict[Type[BaseModel], StreamingSchemaValidator] = {}
+        
         # Default generation config
         self.default_config = {
             "temperature": 0.5,
@@ -79,8 +306,36 @@ class GeminiClient:
             raise ValueError(error_msg) from e
     
     def _calculate_retry_delay(self, attempt: int) -> float:
-        """Calculate exponential backoff delay."""
-        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        """Calculate exponential backoff delay with full jitter."""
+        return full_jitter_delay(attempt, self.base_delay, self.max_delay)
+
+    def _retry_delay_for(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Decide whether a failed attempt is retried.
+
+        Args:
+            error: Exception raised by the attempt
+            attempt: Zero-based number of the failed attempt
+
+        Returns:
+            Seconds to wait before the next attempt, or None to give up
+        """
+        if not is_retryable(error):
+            logging.warning(f"Not retrying non-retryable error: {str(error)}")
+            return None
+        self.retry_budget.record_failure()
+        if attempt >= self.max_retries - 1:
+            return None
+        if not self.retry_budget.can_retry():
+            logging.warning(f"Retry budget exhausted, not retrying: {str(error)}")
+            return None
+        delay = self._calculate_retry_delay(attempt)
+        hint = retry_after_seconds(error)
+        if hint is not None:
+            if hint > self.max_delay:
+                logging.warning(f"Server asked to retry after {hint} seconds, giving up: {str(error)}")
+                return None
+            delay = max(delay, hint)
         return delay
 
     def _clean_json_response(self, response: str) -> str:
@@ -98,28 +353,7 @@ class GeminiClient:
 
     def _extract_json_from_text(self, text: str) -> str:
         """Extract JSON objects from text that might contain explanations."""
-        # Try to find JSON objects in markdown code blocks first
-        json_blocks = re.findall(r'```(?:json)?\n?(.*?)\n?```', text, flags=re.DOTALL)
-        if json_blocks:
-            return json_blocks[0]
-        
-        # Try to find JSON objects with curly braces, matching the pattern more carefully
-        json_objects = re.findall(r'({[\s\S]*?})', text)
-        
-        if json_objects:
-            # Try each JSON object until we find a valid one
-            for json_obj in json_objects:
-                try:
-                    # Simple validation check
-                    test_obj = json.loads(json_obj)
-                    # If it parses successfully, return it
-                    return json_obj
-                except json.JSONDecodeError:
-                    # Try the next one
-                    continue
-        
-        # If no JSON blocks or valid objects found, return the original text
-        return text
+        return extract_json(text)[0]
 
     def _process_schema_response(self, response_text: str, schema: Optional[Type[BaseModel]] = None) -> Dict[str, Any]:
         """Process and validate response against schema."""
@@ -132,13 +366,12 @@ class GeminiClient:
                     response_text = str(response_text)
             
             # Extract JSON from possibly longer text response
-            extracted_text = self._extract_json_from_text(response_text)
+            extracted_text, data = extract_json(response_text)
             
-            # Clean the response
-            cleaned_response = self._clean_json_response(extracted_text)
-            
-            # Parse JSON
-            data = json.loads(cleaned_response)
+            if data is None:
+                # Clean the response only if it is not valid JSON as is
+                cleaned_response = self._clean_json_response(extracted_text)
+                data = json.loads(cleaned_response)
             
             # Validate against schema if provided
             if schema:
@@ -191,6 +424,172 @@ class GeminiClient:
                 "data": None
             }
 
+    def _build_content_parts(
+        self,
+        prompt: Union[str, List[Part]],
+        system_prompt: Optional[str] = None,
+        file_uri: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        static_context: Optional[str] = None
+    ) -> List[Part]:
+        """Assemble the request parts: system prompt, static context, optional file, then the prompt."""
+        content_parts = []
+        
+        # Add system prompt if provided
+        if system_prompt:
+            content_parts.append(Part.from_text(system_prompt))
+        
+        # Static context goes right after the system prompt so both form a stable prefix
+        if static_context:
+            content_parts.append(Part.from_text(static_context))
+        
+        # Handle file input
+        if file_uri:
+            if not mime_type:
+                mime_type = "application/octet-stream"
+            content_parts.append(Part.from_uri(file_uri, mime_type=mime_type))
+        
+        # Add main prompt
+        if isinstance(prompt, str):
+            content_parts.append(Part.from_text(prompt))
+        elif isinstance(prompt, list):
+            content_parts.extend(prompt)
+        else:
+            content_parts.append(prompt)
+        return content_parts
+
+    def _build_generation_config(
+        self,
+        temperature: Optional[float] = None,
+        max_output_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        top_k: Optional[int] = None,
+        config: Optional[Dict[str, Any]] = None,
+        response_schema: Optional[Type[BaseModel]] = None
+    ) -> Union[Dict[str, Any], GenerationConfig]:
+        """
+        Merge per-call overrides into the default generation config.
+
+        With structured output enabled and a response schema given, returns a
+        GenerationConfig asking the model for JSON matching the schema.
+        """
+        generation_config = {
+            "temperature": temperature or self.default_config["temperature"],
+            "top_p": top_p or self.default_config["top_p"],
+            "top_k": top_k or self.default_config["top_k"],
+            "max_output_tokens": max_output_tokens or self.default_config["max_output_tokens"],
+            "candidate_count": self.default_config["candidate_count"]
+        }
+        
+        # Override with custom config if provided
+        if config:
+            generation_config.update(config)
+        if self.structured_output and response_schema:
+            return GenerationConfig(
+                **generation_config,
+                response_mime_type="application/json",
+                response_schema=vertex_response_schema(response_schema)
+            )
+        return generation_config
+
+    def _parse_structured_response(self, response_text: str, schema: Type[BaseModel]) -> Dict[str, Any]:
+        """
+        Parse and validate a native structured output response in one step.
+
+        Falls back to the lenient recovery in _process_schema_response only if
+        the body is not valid JSON.
+        """
+        try:
+            validated_data = schema.model_validate_json(response_text)
+        except ValidationError as e:
+            if any(error["type"] == "json_invalid" for error in e.errors()):
+                logging.warning("Structured output was not valid JSON, attempting recovery")
+                return self._process_schema_response(response_text, schema)
+            return {
+                "status": "error",
+                "error": f"Schema validation error: {str(e)}",
+                "data": {
+                    "status": "errors",
+                    "errors": [
+                        ErrorModel(
+                            code="schema_validation_error",
+                            message=str(error),
+                            severity=SeverityEnum.ERROR
+                        ).model_dump()
+                        for error in e.errors()
+                    ]
+                }
+            }
+        return {
+            "status": "success",
+            "data": validated_data.model_dump()
+        }
+
+    def _parse_response(self, response_text: Any, schema: Type[BaseModel]) -> Dict[str, Any]:
+        """Validate a model response against schema using the configured mode."""
+        if self.structured_output and isinstance(response_text, str):
+            return self._parse_structured_response(response_text, schema)
+        return self._process_schema_response(response_text, schema)
+
+    def _prepare_request(
+        self,
+        prompt: Union[str, List[Part]],
+        system_prompt: Optional[str],
+        static_context: Optional[str],
+        file_uri: Optional[str],
+        mime_type: Optional[str],
+        model: Optional[str]
+    ) -> Tuple[Any, List[Part]]:
+        """
+        Pick the model handle and request parts for a call.
+
+        With a static context and a context cache, the system prompt and static
+        context come from a cached content and only the per-request parts are
+        sent; otherwise everything is sent inline.
+
+        Returns:
+            Tuple of (model handle, content parts)
+        """
+        if static_context and self.context_cache is not None:
+            cached_model = self.context_cache.get_model(model or self.model_name, system_prompt, static_context)
+            if cached_model is not None:
+                return cached_model, self._build_content_parts(prompt, None, file_uri, mime_type)
+        # Use the model name specified in the call, or the default
+        target_model = self._get_model(model)
+        return target_model, self._build_content_parts(prompt, system_prompt, file_uri, mime_type, static_context)
+
+    def _inline_request_after(
+        self,
+        error: Exception,
+        target_model: Any,
+        prompt: Union[str, List[Part]],
+        system_prompt: Optional[str],
+        static_context: Optional[str],
+        file_uri: Optional[str],
+        mime_type: Optional[str],
+        model: Optional[str]
+    ) -> Optional[Tuple[Any, List[Part]]]:
+        """
+        Rebuild a request inline if it failed because its cached content is gone.
+
+        A cached content that expired or was deleted on the server makes every
+        call through its handle fail with NotFound. The entry is evicted so the
+        next request caches the prefix again, and this one is retried once with
+        the prefix sent inline.
+
+        Returns:
+            Tuple of (model handle, content parts) to retry with, or None if
+            the error is not about a cached content
+        """
+        if not isinstance(error, api_exceptions.NotFound) or not static_context or self.context_cache is None:
+            return None
+        inline_model = self._get_model(model)
+        if target_model is inline_model:
+            return None
+        self.context_cache.evict(model or self.model_name, system_prompt, static_context, target_model)
+        logging.warning(f"Cached content not found, retrying with the prompt inline: {str(error)}")
+        return inline_model, self._build_content_parts(prompt, system_prompt, file_uri, mime_type, static_context)
+
     def generate_content(
         self,
         prompt: Union[str, List[Part]],
@@ -199,91 +598,77 @@ class GeminiClient:
         file_uri: Optional[str] = None,
         mime_type: Optional[str] = None,
         system_prompt: Optional[str] = None,
+        static_context: Optional[str] = None,
         model: Optional[str] = None,
         temperature: Optional[float] = None,
         max_output_tokens: Optional[int] = None,
         top_p: Optional[float] = None,
         top_k: Optional[int] = None,
-        config: Optional[Dict[str, Any]] = None
+        config: Optional[Dict[str, Any]] = None,
+        task: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate content using the Gemini model via Vertex AI.
 
+        If task has a model cascade, no model override is given and a
+        response_schema is, the cascade's models are tried from cheapest to
+        strongest until one returns a result that validates and passes the
+        cascade's quality check.
+
         Args:
             prompt: Text prompt or list of Part objects
             response_schema: Optional Pydantic model for response validation
             file_uri: Optional GCS URI for file input
             mime_type: Optional MIME type for file input
             system_prompt: Optional system prompt
+            static_context: Optional static text shared by many requests (e.g.
+                few-shot examples), sent from the context cache when available
             model: Optional model override
             temperature: Optional temperature override
             max_output_tokens: Optional max tokens override
             top_p: Optional top_p override
             top_k: Optional top_k override
             config: Optional complete generation config override
+            task: Optional task name, used to pick a model cascade
 
         Returns:
             Dict containing status and response data
         """
+        cascade = self.cascades.get(task) if task and model is None and response_schema else None
+        if cascade is not None:
+            return self._generate_with_cascade(
+                cascade, prompt, response_schema=response_schema, file_uri=file_uri, mime_type=mime_type,
+                system_prompt=system_prompt, static_context=static_context, temperature=temperature,
+                max_output_tokens=max_output_tokens, top_p=top_p, top_k=top_k, config=config
+            )
         with self.tracer.start_as_current_span("generate_content") as span:
             try:
-                # Use the model name specified in the call, or the default
-                target_model = self.model
-                if model:
-                    target_model = GenerativeModel(model_name=model)
-
-                # Prepare content parts
-                content_parts = []
-                
-                # Add system prompt if provided
-                if system_prompt:
-                    content_parts.append(Part.from_text(system_prompt))
-                
-                # Handle file input
-                if file_uri:
-                    if not mime_type:
-                        mime_type = "application/octet-stream"
-                    content_parts.append(Part.from_uri(file_uri, mime_type=mime_type))
-                
-                # Add main prompt
-                if isinstance(prompt, str):
-                    content_parts.append(Part.from_text(prompt))
-                elif isinstance(prompt, list):
-                    content_parts.extend(prompt)
-                else:
-                    content_parts.append(prompt)
-
-                # Prepare generation config
-                generation_config = {
-                    "temperature": temperature or self.default_config["temperature"],
-                    "top_p": top_p or self.default_config["top_p"],
-                    "top_k": top_k or self.default_config["top_k"],
-                    "max_output_tokens": max_output_tokens or self.default_config["max_output_tokens"],
-                    "candidate_count": self.default_config["candidate_count"]
-                }
-                
-                # Override with custom config if provided
-                if config:
-                    generation_config.update(config)
+                target_model, content_parts = self._prepare_request(
+                    prompt, system_prompt, static_context, file_uri, mime_type, model
+                )
+                generation_config = self._build_generation_config(
+                    temperature, max_output_tokens, top_p, top_k, config, response_schema
+                )
 
                 last_exception = None
                 # Generate content with retries
-                for attempt in range(self.max_retries):
+                attempt = 0
+                while attempt < self.max_retries:
                     try:
-                        response = target_model.generate_content(
-                            content_parts,
-                            generation_config=generation_config,
-                            safety_settings={
-                                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-                                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE
-                            }
-                        )
+                        def call_model():
+                            return circuit_breaker.call_with_breaker(
+                                circuit_breaker.VERTEX,
+                                target_model.generate_content,
+                                content_parts,
+                                generation_config=generation_config,
+                                safety_settings=SAFETY_SETTINGS
+                            )
+                        response = self.hedging.call(call_model) if self.hedging else call_model()
+                        self.retry_budget.record_success()
                         
                         # Process the response
                         if response_schema:
-                            return self._process_schema_response(response.text, response_schema)
+                            return self._parse_response(response.text, response_schema)
                         
                         return {
                             "status": "success",
@@ -292,13 +677,20 @@ class GeminiClient:
                         
                     except Exception as e:
                         last_exception = e
-                        # Don't break early for retries
-                        if attempt == self.max_retries - 1:
+                        inline = self._inline_request_after(
+                            e, target_model, prompt, system_prompt, static_context, file_uri, mime_type, model
+                        )
+                        if inline is not None:
+                            target_model, content_parts = inline
+                            continue
+                        span.set_attribute("retry.attempts", attempt + 1)
+                        delay = self._retry_delay_for(e, attempt)
+                        if delay is None:
                             break
                         
-                        delay = self._calculate_retry_delay(attempt)
-                        logging.warning(f"Attempt {attempt + 1} failed, retrying in {delay} seconds: {str(e)}")
+                        logging.warning(f"Attempt {attempt + 1} failed, retrying in {delay:.2f} seconds: {str(e)}")
                         time.sleep(delay)
+                        attempt += 1
                 
                 # If we get here, all retries failed
                 if last_exception:
@@ -328,9 +720,367 @@ class GeminiClient:
                     "data": None
                 }
                 
-    def _get_model(self):
-        """Return the current model instance."""
-        return self.model
+    def _generate_with_cascade(self, cascade: ModelCascade, prompt: Union[str, List[Part]], **kwargs) -> Dict[str, Any]:
+        """
+        Run generate_content on each model of a cascade until a result is accepted.
+
+        Args:
+            cascade: Models to try and the acceptance check
+            prompt: Text prompt or list of Part objects
+            **kwargs: Other generate_content arguments (without model and task)
+
+        Returns:
+            The first accepted result, or the last model's result
+        """
+        with self.tracer.start_as_current_span("generate_content_cascade") as span:
+            span.set_attribute("cascade.task", cascade.task)
+            reasons: List[str] = []
+            for model_name in cascade.models:
+                result = self.generate_content(prompt, model=model_name, **kwargs)
+                reason = cascade.rejection_reason(result)
+                if reason is None or model_name == cascade.models[-1]:
+                    break
+                logging.info(f"Escalating {cascade.task} from {model_name}: {reason}")
+                reasons.append(reason)
+            cascade.record(model_name, reasons)
+            span.set_attribute("cascade.model", model_name)
+            span.set_attribute("cascade.escalations", len(reasons))
+            return result
+
+    def get_cascade_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return escalation statistics for every task with a model cascade."""
+        return {task: cascade.stats() for task, cascade in self.cascades.items()}
+
+    async def generate_content_async(
+        self,
+        prompt: Union[str, List[Part]],
+        *,
+        response_schema: Optional[Type[BaseModel]] = None,
+        file_uri: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        static_context: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_output_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        top_k: Optional[int] = None,
+        config: Optional[Dict[str, Any]] = None,
+        task: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Asyncio-native variant of generate_content.
+
+        Awaits the model's generate_content_async instead of blocking a
+        thread for the duration of the call, and sleeps between retries
+        without blocking the event loop. Retries, the retry budget, the
+        circuit breaker and model cascades behave as in generate_content;
+        requests are not hedged.
+
+        Args:
+            prompt: Text prompt or list of Part objects
+            response_schema: Optional Pydantic model for response validation
+            file_uri: Optional GCS URI for file input
+            mime_type: Optional MIME type for file input
+            system_prompt: Optional system prompt
+            static_context: Optional static text shared by many requests
+            model: Optional model override
+            temperature: Optional temperature override
+            max_output_tokens: Optional max tokens override
+            top_p: Optional top_p override
+            top_k: Optional top_k override
+            config: Optional complete generation config override
+            task: Optional task name, used to pick a model cascade
+
+        Returns:
+            Dict containing status and response data
+        """
+        cascade = self.cascades.get(task) if task and model is None and response_schema else None
+        if cascade is not None:
+            return await self._generate_with_cascade_async(
+                cascade, prompt, response_schema=response_schema, file_uri=file_uri, mime_type=mime_type,
+                system_prompt=system_prompt, static_context=static_context, temperature=temperature,
+                max_output_tokens=max_output_tokens, top_p=top_p, top_k=top_k, config=config
+            )
+        with self.tracer.start_as_current_span("generate_content_async") as span:
+            try:
+                if static_context and self.context_cache is not None:
+                    # Creating or refreshing a cached content is a blocking call
+                    target_model, content_parts = await asyncio.to_thread(
+                        self._prepare_request, prompt, system_prompt, static_context, file_uri, mime_type, model
+                    )
+                else:
+                    target_model, content_parts = self._prepare_request(
+                        prompt, system_prompt, static_context, file_uri, mime_type, model
+                    )
+                generation_config = self._build_generation_config(
+                    temperature, max_output_tokens, top_p, top_k, config, response_schema
+                )
+
+                last_exception = None
+                attempt = 0
+                while attempt < self.max_retries:
+                    try:
+                        response = await circuit_breaker.call_with_breaker_async(
+                            circuit_breaker.VERTEX,
+                            target_model.generate_content_async,
+                            content_parts,
+                            generation_config=generation_config,
+                            safety_settings=SAFETY_SETTINGS
+                        )
+                        self.retry_budget.record_success()
+
+                        if response_schema:
+                            return self._parse_response(response.text, response_schema)
+
+                        return {
+                            "status": "success",
+                            "data": {"text": response.text}
+                        }
+
+                    except Exception as e:
+                        last_exception = e
+                        inline = self._inline_request_after(
+                            e, target_model, prompt, system_prompt, static_context, file_uri, mime_type, model
+                        )
+                        if inline is not None:
+                            target_model, content_parts = inline
+                            continue
+                        span.set_attribute("retry.attempts", attempt + 1)
+                        delay = self._retry_delay_for(e, attempt)
+                        if delay is None:
+                            break
+
+                        logging.warning(f"Attempt {attempt + 1} failed, retrying in {delay:.2f} seconds: {str(e)}")
+                        await asyncio.sleep(delay)
+                        attempt += 1
+
+                error_msg = f"Failed to generate content: {str(last_exception)}"
+                logging.error(error_msg)
+                return {
+                    "status": "error",
+                    "error": error_msg,
+                    "data": None
+                }
+
+            except Exception as e:
+                error_msg = f"Failed to generate content: {str(e)}"
+                logging.error(error_msg)
+                return {
+                    "status": "error",
+                    "error": error_msg,
+                    "data": None
+                }
+
+    async def _generate_with_cascade_async(
+        self, cascade: ModelCascade, prompt: Union[str, List[Part]], **kwargs
+    ) -> Dict[str, Any]:
+        """Asyncio-native variant of _generate_with_cascade."""
+        with self.tracer.start_as_current_span("generate_content_cascade") as span:
+            span.set_attribute("cascade.task", cascade.task)
+            reasons: List[str] = []
+            for model_name in cascade.models:
+                result = await self.generate_content_async(prompt, model=model_name, **kwargs)
+                reason = cascade.rejection_reason(result)
+                if reason is None or model_name == cascade.models[-1]:
+                    break
+                logging.info(f"Escalating {cascade.task} from {model_name}: {reason}")
+                reasons.append(reason)
+            cascade.record(model_name, reasons)
+            span.set_attribute("cascade.model", model_name)
+            span.set_attribute("cascade.escalations", len(reasons))
+            return result
+
+    def generate_content_stream(
+        self,
+        prompt: Union[str, List[Part]],
+        *,
+        response_schema: Optional[Type[BaseModel]] = None,
+        file_uri: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        static_context: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_output_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        top_k: Optional[int] = None,
+        config: Optional[Dict[str, Any]] = None,
+        abort_on_invalid: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate content with the model's streaming API.
+
+        Yields {"type": "chunk", "text": ...} events as text arrives, followed
+        by exactly one {"type": "result", "result": ...} event whose result has
+        the same shape as the return value of generate_content (validated
+        against response_schema if given). Failures before the first chunk are
+        retried like generate_content; once text has been relayed, a failure
+        ends the stream with an error result instead.
+
+        With a response_schema, the output is also parsed incrementally and
+        each field under `data` is emitted as {"type": "field", "path": ...,
+        "value": ...} once it closes (list fields item by item, e.g.
+        "data.skills[0]"), validated against its nested Pydantic model.
+
+        Args:
+            Same as generate_content, plus:
+            abort_on_invalid: Stop generating as soon as the output is not valid
+                JSON or a field fails validation; otherwise stop emitting fields
+                and let the final result report the problem
+
+        Yields:
+            Dict events as described above
+        """
+        # Not a current span: the generator may be resumed in another context
+        with self.tracer.start_span("generate_content_stream") as span:
+            try:
+                target_model, content_parts = self._prepare_request(
+                    prompt, system_prompt, static_context, file_uri, mime_type, model
+                )
+                generation_config = self._build_generation_config(
+                    temperature, max_output_tokens, top_p, top_k, config, response_schema
+                )
+            except Exception as e:
+                error_msg = f"Failed to generate content: {str(e)}"
+                logging.error(error_msg)
+                yield {"type": "result", "result": {"status": "error", "error": error_msg, "data": None}}
+                return
+
+            parser = None
+            validator = None
+            if response_schema:
+                parser = IncrementalJSONParser(max_depth=3)
+                validator = self._stream_validators.get(response_schema)
+                if validator is None:
+                    validator = self._stream_validators[response_schema] = StreamingSchemaValidator(response_schema)
+
+            last_exception = None
+            invalid = None
+            chunks: List[str] = []
+            attempt = 0
+            while attempt < self.max_retries:
+                try:
+                    # Only opening the stream goes through the breaker
+                    responses = circuit_breaker.call_with_breaker(
+                        circuit_breaker.VERTEX,
+                        target_model.generate_content,
+                        content_parts,
+                        generation_config=generation_config,
+                        safety_settings=SAFETY_SETTINGS,
+                        stream=True
+                    )
+                    for response in responses:
+                        try:
+                            text = response.text
+                        except ValueError:
+                            # Chunks without text (e.g. only finish metadata)
+                            continue
+                        if not text:
+                            continue
+                        chunks.append(text)
+                        yield {"type": "chunk", "text": text}
+                        if parser is None:
+                            continue
+                        try:
+                            for path, value in parser.feed(text):
+                                event = validator.check(path, value)
+                                if event:
+                                    yield {"type": "field", **event}
+                        except (JSONStreamError, ValidationError) as e:
+                            if not abort_on_invalid:
+                                logging.warning(f"Stopped incremental parsing of streamed response: {str(e)}")
+                                parser = None
+                                continue
+                            invalid = e
+                            break
+                    if invalid is not None:
+                        # Stop the generation instead of paying for the rest of it
+                        close = getattr(responses, "close", None)
+                        if close:
+                            close()
+                    self.retry_budget.record_success()
+                    last_exception = None
+                    break
+                except Exception as e:
+                    last_exception = e
+                    # Text already sent to the caller cannot be taken back
+                    if chunks:
+                        break
+                    inline = self._inline_request_after(
+                        e, target_model, prompt, system_prompt, static_context, file_uri, mime_type, model
+                    )
+                    if inline is not None:
+                        target_model, content_parts = inline
+                        continue
+                    span.set_attribute("retry.attempts", attempt + 1)
+                    delay = self._retry_delay_for(e, attempt)
+                    if delay is None:
+                        break
+                    logging.warning(f"Attempt {attempt + 1} failed, retrying in {delay:.2f} seconds: {str(e)}")
+                    time.sleep(delay)
+                    attempt += 1
+
+            span.set_attribute("stream.chunks", len(chunks))
+            if invalid is not None:
+                span.set_attribute("stream.aborted", True)
+                error_msg = f"Aborted invalid streamed response: {str(invalid)}"
+                logging.warning(error_msg)
+                yield {"type": "result", "result": {
+                    "status": "error",
+                    "error": error_msg,
+                    "data": {
+                        "status": "errors",
+                        "errors": [
+                            ErrorModel(
+                                code="stream_validation_error",
+                                message=str(invalid),
+                                severity=SeverityEnum.ERROR
+                            ).model_dump()
+                        ]
+                    }
+                }}
+                return
+
+            if last_exception:
+                error_msg = f"Failed to generate content: {str(last_exception)}"
+                logging.error(error_msg)
+                yield {"type": "result", "result": {"status": "error", "error": error_msg, "data": None}}
+                return
+
+            response_text = "".join(chunks)
+            if response_schema:
+                result = self._parse_response(response_text, response_schema)
+            else:
+                result = {"status": "success", "data": {"text": response_text}}
+            yield {"type": "result", "result": result}
+
+    def _get_model(self, model_name: Optional[str] = None) -> GenerativeModel:
+        """
+        Return a pooled model handle, creating it on first use.
+
+        The system prompt is sent as a content part (see _build_content_parts),
+        so handles are shared by every prompt and pooled by model name only.
+
+        Args:
+            model_name: Model to use (defaults to the client's model)
+
+        Returns:
+            GenerativeModel for the requested model
+        """
+        model_name = model_name or self.model_name
+        if model_name == self.model_name:
+            return self.model
+        model = self._model_pool.get(model_name)
+        if model is None:
+            with self._model_pool_lock:
+                model = self._model_pool.get(model_name)
+                if model is None:
+                    if model_name not in app_config.SUPPORTED_MODELS:
+                        logging.warning(f"Model {model_name} is not in SUPPORTED_MODELS")
+                    model = GenerativeModel(model_name=model_name)
+                    self._model_pool[model_name] = model
+        return model
 
 def get_schema_model(task: str) -> Optional[Type[BaseResponseSchema]]:
     """Get the appropriate response schema model for a given task."""
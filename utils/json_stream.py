@@ -0,0 +1,303 @@
+"""Incremental JSON parsing for streamed model output.
+
+IncrementalJSONParser consumes text chunks as they arrive and reports every
+value that closes within a configurable depth, without re-scanning earlier
+input. StreamingSchemaValidator checks those values against the nested
+Pydantic models of a response schema, so fields of the response can be shown
+(and bad generations aborted) before the model has finished.
+"""
+
+import json
+import logging
+import types
+from typing import Annotated, Any, Dict, List, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+Path = Tuple[Union[str, int], ...]
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_START = "-0123456789tfn"
+_SCALAR_CHARS = "+-.0123456789eEtruefalsn"
+
+
+class JSONStreamError(ValueError):
+    """Raised when streamed text can no longer form valid JSON."""
+
+
+class _Frame:
+    """An open object or array."""
+
+    __slots__ = ("kind", "path", "start", "expect", "key", "count")
+
+    def __init__(self, kind: str, path: Path, start: int):
+        self.kind = kind
+        self.path = path
+        self.start = start
+        # object: key -> colon -> value -> comma; array: value -> comma
+        self.expect = "key" if kind == "object" else "value"
+        self.key: Optional[str] = None
+        self.count = 0
+
+    def child_path(self) -> Path:
+        return self.path + ((self.key,) if self.kind == "object" else (self.count,))
+
+
+class IncrementalJSONParser:
+    """Push parser that reports JSON values as soon as they close.
+
+    Text before the root object or array (e.g. a markdown fence) and text
+    after it is ignored. Each call to feed() scans only the new text.
+    """
+
+    def __init__(self, max_depth: int = 3):
+        """
+        Initialize the parser.
+
+        Args:
+            max_depth: Deepest path length for which completed values are reported
+        """
+        self.max_depth = max_depth
+        self.done = False
+        self.value: Any = None
+        self._text = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._started = False
+        # Open string or scalar token: (kind, start, path); kind is "key", "string" or "scalar"
+        self._token: Optional[Tuple[str, int, Path]] = None
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        """
+        Consume a chunk of text.
+
+        Args:
+            chunk: Next piece of streamed text
+
+        Returns:
+            List of (path, value) pairs for values completed in this chunk,
+            in the order they closed
+
+        Raises:
+            JSONStreamError: If the text is not valid JSON
+        """
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        completed: List[Tuple[Path, Any]] = []
+        text = self._text
+        while self._pos < len(text) and not self.done:
+            self._step(text, completed)
+        return completed
+
+    def _step(self, text: str, completed: List[Tuple[Path, Any]]) -> None:
+        """Consume one character (or a run of string characters)."""
+        pos = self._pos
+        char = text[pos]
+
+        if not self._started:
+            if char in "{[":
+                self._started = True
+                self._stack.append(_Frame("object" if char == "{" else "array", (), pos))
+            self._pos += 1
+            return
+
+        if self._token is not None:
+            kind, start, path = self._token
+            if kind == "scalar":
+                if char in _SCALAR_CHARS:
+                    self._pos += 1
+                    return
+                self._token = None
+                self._complete(path, self._loads(text, start, pos), completed)
+                # Reprocess the delimiter
+                return
+            # Inside a string: jump to the next quote or backslash
+            while pos < len(text):
+                char = text[pos]
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    break
+                pos += 1
+            self._pos = pos
+            if pos >= len(text):
+                return
+            self._pos += 1
+            self._token = None
+            value = self._loads(text, start, pos + 1)
+            if kind == "key":
+                frame = self._stack[-1]
+                frame.key = value
+                frame.expect = "colon"
+            else:
+                self._complete(path, value, completed)
+            return
+
+        self._pos += 1
+        if char in _WHITESPACE:
+            return
+        frame = self._stack[-1]
+
+        if frame.expect == "key":
+            if char == '"':
+                self._token = ("key", pos, ())
+            elif char == "}" and frame.count == 0:
+                self._close(text, pos, completed)
+            else:
+                self._error(pos, "expected object key")
+        elif frame.expect == "colon":
+            if char != ":":
+                self._error(pos, "expected ':'")
+            frame.expect = "value"
+        elif frame.expect == "value":
+            if char == "]" and frame.kind == "array" and frame.count == 0:
+                self._close(text, pos, completed)
+                return
+            path = frame.child_path()
+            if char == '"':
+                self._token = ("string", pos, path)
+            elif char in "{[":
+                self._stack.append(_Frame("object" if char == "{" else "array", path, pos))
+            elif char in _SCALAR_START:
+                self._token = ("scalar", pos, path)
+            else:
+                self._error(pos, "expected a value")
+        else:  # comma
+            if char == ",":
+                frame.expect = "key" if frame.kind == "object" else "value"
+            elif char == ("}" if frame.kind == "object" else "]"):
+                self._close(text, pos, completed)
+            else:
+                self._error(pos, "expected ',' or end of container")
+
+    def _close(self, text: str, pos: int, completed: List[Tuple[Path, Any]]) -> None:
+        """Close the innermost container at pos."""
+        frame = self._stack.pop()
+        if not self._stack:
+            self.value = self._loads(text, frame.start, pos + 1)
+            self.done = True
+            return
+        value = None
+        if len(frame.path) <= self.max_depth:
+            value = self._loads(text, frame.start, pos + 1)
+        self._complete(frame.path, value, completed)
+
+    def _complete(self, path: Path, value: Any, completed: List[Tuple[Path, Any]]) -> None:
+        """Record a completed child value and advance its parent."""
+        if 0 < len(path) <= self.max_depth:
+            completed.append((path, value))
+        frame = self._stack[-1]
+        frame.count += 1
+        frame.expect = "comma"
+
+    def _loads(self, text: str, start: int, end: int) -> Any:
+        try:
+            return json.loads(text[start:end])
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(f"Invalid JSON value at offset {start}: {e.msg}") from e
+
+    def _error(self, pos: int, message: str) -> None:
+        raise JSONStreamError(f"Invalid JSON at offset {pos}: {message}, got {self._text[pos]!r}")
+
+
+def format_path(path: Path) -> str:
+    """Render a path as e.g. 'data.skills[0]'."""
+    parts: List[str] = []
+    for part in path:
+        if isinstance(part, int):
+            parts.append(f"[{part}]")
+        else:
+            parts.append(f".{part}" if parts else part)
+    return "".join(parts)
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    """Strip Optional[...] from an annotation."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+class StreamingSchemaValidator:
+    """Validates fields under `data` of a response schema as they stream in.
+
+    List fields are checked item by item against the item type (e.g.
+    SkillModel) and once more as a whole when the list closes, so list-level
+    constraints are enforced too. Other fields are checked when they close.
+    """
+
+    def __init__(self, schema_model: Type[BaseModel]):
+        """
+        Initialize the validator.
+
+        Args:
+            schema_model: Response schema with a `data` field holding a Pydantic model
+        """
+        self.schema_model = schema_model
+        self._adapters: Dict[Tuple[str, bool], Optional[TypeAdapter]] = {}
+        data_field = schema_model.model_fields.get("data")
+        data_model = _unwrap_optional(data_field.annotation) if data_field else None
+        self._fields = {}
+        if isinstance(data_model, type) and issubclass(data_model, BaseModel):
+            self._fields = dict(data_model.model_fields)
+
+    def _adapter(self, name: str, item: bool) -> Optional[TypeAdapter]:
+        """Return a cached TypeAdapter for a data field or for its list items."""
+        key = (name, item)
+        if key not in self._adapters:
+            field_info = self._fields[name]
+            annotation = _unwrap_optional(field_info.annotation)
+            if item:
+                adapter = TypeAdapter(get_args(annotation)[0]) if get_origin(annotation) is list else None
+            elif field_info.metadata:
+                # Keep field-level constraints such as max_length
+                adapter = TypeAdapter(Annotated[(field_info.annotation, *field_info.metadata)])
+            else:
+                adapter = TypeAdapter(field_info.annotation)
+            self._adapters[key] = adapter
+        return self._adapters[key]
+
+    def is_list_field(self, name: str) -> bool:
+        """Return True if the data field holds a list."""
+        return name in self._fields and get_origin(_unwrap_optional(self._fields[name].annotation)) is list
+
+    def check(self, path: Path, value: Any) -> Optional[Dict[str, Any]]:
+        """
+        Validate a completed value.
+
+        Args:
+            path: Path of the value, e.g. ('data', 'skills', 0)
+            value: The parsed value
+
+        Returns:
+            {"path": ..., "value": ...} with the validated value for fields
+            worth emitting, or None for values that are not reported
+
+        Raises:
+            pydantic.ValidationError: If the value does not match the schema
+        """
+        if len(path) < 2 or path[0] != "data" or path[1] not in self._fields:
+            return None
+        name = path[1]
+        if len(path) == 3 and isinstance(path[2], int):
+            adapter = self._adapter(name, item=True)
+        elif len(path) == 2:
+            adapter = self._adapter(name, item=False)
+        else:
+            return None
+        if adapter is None:
+            return None
+        validated = adapter.validate_python(value)
+        if len(path) == 2 and self.is_list_field(name):
+            # Items have already been emitted one by one
+            return None
+        return {"path": format_path(path), "value": adapter.dump_python(validated, mode="json")}
+
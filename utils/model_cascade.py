@@ -0,0 +1,157 @@
+"""Per-task model cascades: cheap model first, stronger models on failure.
+
+For simple tasks a flash model usually returns schema-valid output at a
+fraction of the latency of the default pro model. A ModelCascade lists the
+models to try from cheapest to strongest; GeminiClient moves on to the next
+model only when a result fails schema validation or the quality check, and
+the cascade keeps per-task counts of how often that happens.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Supported models from cheapest/fastest to strongest
+MODEL_COST_ORDER: List[str] = [
+    "gemini-2.0-flash-lite",
+    "gemini-2.0-flash-001",
+    "gemini-2.5-flash",
+    "gemini-2.5-flash-001",
+    "gemini-2.5-pro",
+    "gemini-2.5-pro-preview-03-25",
+]
+
+QualityCheck = Callable[[Dict[str, Any]], Optional[str]]
+
+
+def default_quality_check(result: Dict[str, Any]) -> Optional[str]:
+    """
+    Reject schema-valid results in which the model reported a failure.
+
+    Args:
+        result: Successful result returned by GeminiClient.generate_content
+
+    Returns:
+        Reason for escalating, or None if the result is acceptable
+    """
+    data = result.get("data")
+    if not isinstance(data, dict):
+        return "empty_response"
+    if data.get("status") != "success" or data.get("errors"):
+        return "model_reported_errors"
+    return None
+
+
+def cascade_models(models: Iterable[str], final_model: str) -> List[str]:
+    """
+    Order cascade models from cheapest to strongest, ending with final_model.
+
+    Args:
+        models: Cheaper models to try before final_model
+        final_model: Model whose result is returned whatever its quality
+
+    Returns:
+        Deduplicated list of supported models
+    """
+    rank = {name: i for i, name in enumerate(MODEL_COST_ORDER)}
+    cheaper = []
+    for name in models:
+        if name not in config.SUPPORTED_MODELS:
+            logger.warning(f"Ignoring cascade model {name}: not in SUPPORTED_MODELS")
+        elif name != final_model and name not in cheaper:
+            cheaper.append(name)
+    cheaper.sort(key=lambda name: rank.get(name, len(rank)))
+    return cheaper + [final_model]
+
+
+class ModelCascade:
+    """Models to try for one task, with escalation statistics."""
+
+    def __init__(self, task: str, models: Sequence[str], quality_check: Optional[QualityCheck] = default_quality_check):
+        """
+        Initialize the cascade.
+
+        Args:
+            task: Task the cascade applies to
+            models: Models from cheapest to strongest
+            quality_check: Optional check run on schema-valid results; returns
+                a reason to escalate, or None to accept the result
+        """
+        if not models:
+            raise ValueError(f"Cascade for task {task} needs at least one model")
+        self.task = task
+        self.models = tuple(models)
+        self.quality_check = quality_check
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._escalations = 0
+        self._served_by: Dict[str, int] = {}
+        self._reasons: Dict[str, int] = {}
+
+    def rejection_reason(self, result: Dict[str, Any]) -> Optional[str]:
+        """
+        Decide whether a model's result is accepted.
+
+        Args:
+            result: Result returned by GeminiClient.generate_content
+
+        Returns:
+            Reason for escalating to the next model, or None to accept
+        """
+        if result.get("status") != "success":
+            data = result.get("data") or {}
+            codes = {error.get("code") for error in data.get("errors") or [] if isinstance(error, dict)}
+            return "schema_validation" if "schema_validation_error" in codes else "error"
+        if self.quality_check:
+            return self.quality_check(result)
+        return None
+
+    def record(self, served_by: str, reasons: Sequence[str]) -> None:
+        """
+        Record the outcome of one cascaded call.
+
+        Args:
+            served_by: Model whose result was returned
+            reasons: Rejection reason of each model that was escalated from
+        """
+        with self._lock:
+            self._calls += 1
+            if reasons:
+                self._escalations += 1
+            self._served_by[served_by] = self._served_by.get(served_by, 0) + 1
+            for reason in reasons:
+                self._reasons[reason] = self._reasons.get(reason, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return call and escalation counters, the escalation rate and the models that served results."""
+        with self._lock:
+            return {
+                "models": list(self.models),
+                "calls": self._calls,
+                "escalations": self._escalations,
+                "escalation_rate": self._escalations / self._calls if self._calls else 0.0,
+                "served_by": dict(self._served_by),
+                "reasons": dict(self._reasons)
+            }
+
+
+def build_cascades(tasks: Iterable[str], models: Iterable[str], final_model: str) -> Dict[str, ModelCascade]:
+    """
+    Build the same cascade for each of the given tasks.
+
+    Args:
+        tasks: Tasks to cascade
+        models: Cheaper models to try first
+        final_model: Strongest model, used last
+
+    Returns:
+        Mapping of task to its cascade (empty if there are no cheaper models)
+    """
+    ordered = cascade_models(models, final_model)
+    if len(ordered) < 2:
+        return {}
+    return {task: ModelCascade(task, ordered) for task in tasks}
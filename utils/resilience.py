@@ -0,0 +1,285 @@
+"""Retry and hedging policies for calls to Vertex AI.
+
+Only overload and timeout errors (429, 503, deadline exceeded) are retried;
+everything else, e.g. an invalid argument, fails immediately. Delays use full
+jitter so that clients which failed together do not retry together, and a
+server supplied retry delay is honoured as a lower bound. A process-wide
+RetryBudget stops retries altogether while most calls are failing, so a
+degraded backend does not receive a multiple of the normal traffic.
+HedgingPolicy cuts tail latency by racing a second request against a slow one.
+"""
+
+import datetime
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from google.api_core import exceptions as api_exceptions
+
+logger = logging.getLogger(__name__)
+
+# ResourceExhausted is the gRPC flavour of TooManyRequests (429)
+RETRYABLE_EXCEPTIONS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    TimeoutError,
+)
+
+RETRYABLE_STATUS_CODES = frozenset({429, 503, 504})
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Return True if a failed call is worth retrying.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        True for overload (429, 503) and deadline errors
+    """
+    if isinstance(error, RETRYABLE_EXCEPTIONS):
+        return True
+    if isinstance(error, api_exceptions.GoogleAPICallError):
+        return False
+    # HTTP errors from other clients carry the status on the exception or its response
+    status = getattr(error, "code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status in RETRYABLE_STATUS_CODES
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Extract a server supplied retry delay from an error.
+
+    Looks for a google.rpc.RetryInfo detail and for a Retry-After header on
+    the HTTP response.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        Delay in seconds, or None if the server gave no hint
+    """
+    for detail in getattr(error, "details", None) or ():
+        retry_delay = getattr(detail, "retry_delay", None)
+        if isinstance(retry_delay, datetime.timedelta):
+            return retry_delay.total_seconds()
+        if retry_delay is not None and hasattr(retry_delay, "seconds"):
+            return retry_delay.seconds + getattr(retry_delay, "nanos", 0) / 1e9
+
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers:
+        value = headers.get("Retry-After") or headers.get("retry-after")
+        try:
+            return max(float(value), 0.0) if value is not None else None
+        except (TypeError, ValueError):
+            # HTTP dates are not worth parsing for sub-minute waits
+            return None
+    return None
+
+
+def full_jitter_delay(
+    attempt: int,
+    base_delay: float,
+    max_delay: float,
+    rng: Callable[[], float] = random.random
+) -> float:
+    """
+    Return a random delay in [0, min(max_delay, base_delay * 2 ** attempt)).
+
+    Args:
+        attempt: Zero-based number of the failed attempt
+        base_delay: Delay cap after the first failure
+        max_delay: Upper bound for the delay cap
+        rng: Source of uniform floats in [0, 1), overridable for tests
+
+    Returns:
+        Delay in seconds
+    """
+    return rng() * min(max_delay, base_delay * (2 ** attempt))
+
+
+class RetryBudget:
+    """Token bucket that limits retries while a backend is failing.
+
+    Modelled on gRPC retry throttling: every retryable failure costs one
+    token, every success returns token_ratio tokens, and retries are only
+    allowed while more than half of max_tokens remain. First attempts are
+    never throttled.
+    """
+
+    def __init__(self, max_tokens: float = 10, token_ratio: float = 0.1):
+        """
+        Initialize the budget.
+
+        Args:
+            max_tokens: Size of the bucket
+            token_ratio: Tokens returned per successful call
+        """
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self._tokens = float(max_tokens)
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        """Current number of tokens."""
+        with self._lock:
+            return self._tokens
+
+    def record_success(self) -> None:
+        """Credit the bucket for a successful call."""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.token_ratio)
+
+    def record_failure(self) -> None:
+        """Charge the bucket for a retryable failure."""
+        with self._lock:
+            self._tokens = max(0.0, self._tokens - 1)
+
+    def can_retry(self) -> bool:
+        """Return True if a retry is currently allowed."""
+        with self._lock:
+            return self._tokens > self.max_tokens / 2
+
+
+class HedgingPolicy:
+    """Sends a backup request when the first one is slower than usual.
+
+    If a call has not returned after the hedge delay (the given percentile of
+    recent call latencies, or initial_delay_seconds until enough samples
+    exist), an identical second call is started and whichever finishes first
+    successfully wins. Hedges are capped at max_hedge_ratio of all calls so a
+    slow backend does not receive double the traffic. The primary call runs
+    on its own thread, so concurrency is not limited by the policy and the
+    hedge delay is measured from when the call actually starts; only hedged
+    calls share a bounded pool, and a call is not hedged while that pool is
+    busy. The losing call cannot be interrupted; its result is discarded.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        initial_delay_seconds: float = 5.0,
+        max_hedge_ratio: float = 0.1,
+        window: int = 200,
+        min_samples: int = 20,
+        max_workers: int = 16,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            percentile: Latency percentile (0-1) after which a call is hedged
+            initial_delay_seconds: Hedge delay until min_samples latencies are known
+            max_hedge_ratio: Maximum fraction of calls that may be hedged
+            window: Number of recent latencies the percentile is computed over
+            min_samples: Latencies needed before the percentile is used
+            max_workers: Threads running hedged calls
+            clock: Monotonic clock, overridable for tests
+        """
+        self.percentile = percentile
+        self.initial_delay_seconds = initial_delay_seconds
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self._clock = clock
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._hedge_slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self._counts = {"calls": 0, "hedged": 0, "hedge_wins": 0}
+
+    def hedge_delay(self) -> float:
+        """Return the current delay after which a call is hedged."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay_seconds
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+
+    def _try_acquire_hedge(self) -> bool:
+        # Skip the hedge rather than queue it when every hedge thread is busy
+        if not self._hedge_slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            if self._counts["hedged"] + 1 <= self.max_hedge_ratio * self._counts["calls"]:
+                self._counts["hedged"] += 1
+                return True
+        self._hedge_slots.release()
+        return False
+
+    def _start_primary(self, func: Callable[[], Any]) -> Future:
+        """Run func on a new thread and return a future that is running once this returns."""
+        future: Future = Future()
+        started = threading.Event()
+
+        def run():
+            future.set_running_or_notify_cancel()
+            started.set()
+            try:
+                future.set_result(func())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="hedge-primary", daemon=True).start()
+        started.wait()
+        return future
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        """
+        Run func, hedging it with a second call if it is slow.
+
+        Args:
+            func: Zero-argument callable to run (must be safe to call twice)
+
+        Returns:
+            The result of the first call to succeed
+
+        Raises:
+            Exception: The error of the last call to fail if none succeeded
+        """
+        with self._lock:
+            self._counts["calls"] += 1
+        primary = self._start_primary(func)
+        start = self._clock()
+        done, _ = wait([primary], timeout=self.hedge_delay())
+        if done or not self._try_acquire_hedge():
+            result = primary.result()
+            self._record_latency(self._clock() - start)
+            return result
+
+        logger.info("Call exceeded hedge delay, sending hedged request")
+        hedge = self._executor.submit(func)
+        hedge.add_done_callback(lambda _: self._hedge_slots.release())
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                if future is hedge:
+                    with self._lock:
+                        self._counts["hedge_wins"] += 1
+                self._record_latency(self._clock() - start)
+                return future.result()
+        raise error
+
+    def _record_latency(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return call, hedge and hedge win counters plus the current hedge delay."""
+        with self._lock:
+            counts = dict(self._counts)
+        counts["hedge_win_rate"] = counts["hedge_wins"] / counts["hedged"] if counts["hedged"] else 0.0
+        counts["delay_seconds"] = self.hedge_delay()
+        return counts
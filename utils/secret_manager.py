@@ -2,7 +2,9 @@
 
 import json
 import logging
-from typing import Dict, Any, Optional, Union
+import threading
+import time
+from typing import Dict, Any, Optional, Union, Callable, List, Tuple
 
 from google.cloud import secretmanager
 from google.api_core.exceptions import NotFound
@@ -113,4 +115,112 @@ class SecretManagerClient:
             Examples as a string, or None if not found
         """
         secret_id = f"{prefix}{task}-examples"
-        return self.get_secret(secret_id) 
\ No newline at end of file
+        return self.get_secret(secret_id)
+
+
+class RefreshingSecret:
+    """Secret value kept in memory and refreshed in the background.
+
+    When a refresh returns a new value (secret rotation), the previous value
+    stays active for a grace period so tokens signed with it keep validating.
+    """
+    
+    def __init__(
+        self,
+        fetch: Callable[[], Optional[str]],
+        refresh_interval: float,
+        rotation_grace: float,
+        background: bool = True,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the refreshing secret.
+        
+        Args:
+            fetch: Callable returning the current secret value
+            refresh_interval: Seconds between background refreshes
+            rotation_grace: Seconds a rotated-out value remains active
+            background: Whether to refresh from a daemon thread
+            clock: Monotonic clock, overridable for tests
+        """
+        self._fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.rotation_grace = rotation_grace
+        self.background = background
+        self._clock = clock
+        self._current: Optional[str] = None
+        self._previous: List[Tuple[str, float]] = []
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+    def refresh(self) -> bool:
+        """
+        Fetch the secret and rotate it in if it changed.
+        
+        Returns:
+            True if the active value changed
+        """
+        value = self._fetch()
+        if not value:
+            raise ValueError("Secret fetch returned no value")
+        now = self._clock()
+        with self._lock:
+            self._fetched_at = now
+            if value == self._current:
+                return False
+            if self._current is not None:
+                logger.info("Secret rotated; keeping previous value active during grace period")
+                self._previous.insert(0, (self._current, now + self.rotation_grace))
+            self._previous = [(v, until) for v, until in self._previous if v != value]
+            self._current = value
+            return True
+            
+    def keys(self) -> List[str]:
+        """
+        Return the active secret values, newest first.
+        
+        Fetches synchronously on first use, or if background refreshes have
+        stalled for more than two intervals.
+        
+        Returns:
+            List of active secret values
+        """
+        if self._current is None:
+            self.refresh()
+        elif self._clock() - self._fetched_at > 2 * self.refresh_interval:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Secret refresh failed, using cached value: {e}")
+                with self._lock:
+                    self._fetched_at = self._clock()
+        self._ensure_background_refresh()
+        now = self._clock()
+        with self._lock:
+            self._previous = [(v, until) for v, until in self._previous if until > now]
+            return [self._current] + [v for v, _ in self._previous]
+            
+    def _ensure_background_refresh(self) -> None:
+        """Start the background refresh thread if enabled and not running."""
+        if not self.background or (self._thread and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._refresh_loop, name="secret-refresh", daemon=True)
+            self._thread.start()
+            
+    def _refresh_loop(self) -> None:
+        """Refresh the secret every refresh_interval until stopped."""
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the last known value; keys() retries if this persists
+                logger.warning(f"Background secret refresh failed: {e}")
+                
+    def stop(self) -> None:
+        """Stop the background refresh thread."""
+        self._stop.set()
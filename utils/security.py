@@ -6,7 +6,7 @@ security headers, input sanitization, request validation, and CORS configuration
 
 import time
 from functools import wraps
-from typing import Dict, Optional, Callable, Any, Union
+from typing import Dict, Mapping, Optional, Callable, Any, Tuple, Union
 from flask import Request, Response, make_response
 import re
 from datetime import datetime, timedelta
@@ -24,6 +24,16 @@ ALLOWED_ORIGINS = [
     'http://localhost:3000'  # For local development
 ]
 
+SECURITY_HEADERS: Dict[str, str] = {
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Content-Security-Policy': "default-src 'self'",
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
+    'Permissions-Policy': 'geolocation=(), microphone=(), camera=()'
+}
+
 # In-memory rate limiting store (consider using Redis for production)
 rate_limit_store: Dict[str, Dict[str, Union[int, float]]] = {}
 
@@ -39,39 +49,50 @@ def rate_limit() -> Callable:
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(request: Request, *args: Any, **kwargs: Any) -> Response:
-            client_id = request.headers.get('X-Forwarded-For', 'unknown')
-            current_time = time.time()
-            
-            # Clean up expired entries
-            rate_limit_store.update({
-                k: v for k, v in rate_limit_store.items()
-                if current_time - v['timestamp'] < RATE_LIMIT_WINDOW
-            })
-            
-            # Check and update rate limit
-            if client_id in rate_limit_store:
-                client_data = rate_limit_store[client_id]
-                if (client_data['count'] >= MAX_REQUESTS and 
-                    current_time - client_data['timestamp'] < RATE_LIMIT_WINDOW):
-                    logger.warning(f"Rate limit exceeded for client {client_id}")
-                    return make_response(
-                        {'error': 'Rate limit exceeded. Please try again later.'},
-                        429
-                    )
-                elif current_time - client_data['timestamp'] >= RATE_LIMIT_WINDOW:
-                    client_data['count'] = 0
-                    client_data['timestamp'] = current_time
-                client_data['count'] += 1
-            else:
-                rate_limit_store[client_id] = {
-                    'count': 1,
-                    'timestamp': current_time
-                }
-            
+            if not check_rate_limit(request.headers.get('X-Forwarded-For', 'unknown')):
+                return make_response(
+                    {'error': 'Rate limit exceeded. Please try again later.'},
+                    429
+                )
             return func(request, *args, **kwargs)
         return wrapper
     return decorator
 
+def check_rate_limit(client_id: str) -> bool:
+    """Count a request against a client's rate limit.
+    
+    Args:
+        client_id: Client identifier, e.g. the X-Forwarded-For header
+        
+    Returns:
+        bool: True if the request is allowed, False if the limit is exceeded
+    """
+    current_time = time.time()
+    
+    # Clean up expired entries
+    rate_limit_store.update({
+        k: v for k, v in rate_limit_store.items()
+        if current_time - v['timestamp'] < RATE_LIMIT_WINDOW
+    })
+    
+    # Check and update rate limit
+    if client_id in rate_limit_store:
+        client_data = rate_limit_store[client_id]
+        if (client_data['count'] >= MAX_REQUESTS and 
+            current_time - client_data['timestamp'] < RATE_LIMIT_WINDOW):
+            logger.warning(f"Rate limit exceeded for client {client_id}")
+            return False
+        elif current_time - client_data['timestamp'] >= RATE_LIMIT_WINDOW:
+            client_data['count'] = 0
+            client_data['timestamp'] = current_time
+        client_data['count'] += 1
+    else:
+        rate_limit_store[client_id] = {
+            'count': 1,
+            'timestamp': current_time
+        }
+    return True
+
 def add_security_headers(response: Response) -> Response:
     """Add security headers to the response.
     
@@ -84,17 +105,7 @@ def add_security_headers(response: Response) -> Response:
     Returns:
         Response: Response with security headers added
     """
-    security_headers = {
-        'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
-        'X-Content-Type-Options': 'nosniff',
-        'X-Frame-Options': 'DENY',
-        'X-XSS-Protection': '1; mode=block',
-        'Content-Security-Policy': "default-src 'self'",
-        'Referrer-Policy': 'strict-origin-when-cross-origin',
-        'Permissions-Policy': 'geolocation=(), microphone=(), camera=()'
-    }
-    
-    for header, value in security_headers.items():
+    for header, value in SECURITY_HEADERS.items():
         response.headers[header] = value
     
     return response
@@ -121,38 +132,48 @@ def sanitize_input(text: Optional[str]) -> Optional[str]:
     
     return text
 
-def validate_request_headers(request: Request) -> Optional[Response]:
-    """Validate request headers for security requirements.
-    
-    Checks for required security headers and content type validation
-    for POST/PUT requests.
+def check_request_headers(method: str, headers: Mapping[str, str]) -> Optional[Tuple[Dict[str, str], int]]:
+    """Check request headers for security requirements, independent of the web framework.
     
     Args:
-        request: Flask Request object to validate
+        method: HTTP method of the request
+        headers: Request headers
         
     Returns:
-        Optional[Response]: Error response if validation fails, None if successful
+        Optional[Tuple[Dict[str, str], int]]: Error body and status code if
+        validation fails, None if successful
     """
     # Content-Type validation for POST/PUT
-    if request.method in ['POST', 'PUT']:
-        content_type = request.headers.get('Content-Type', '')
+    if method in ['POST', 'PUT']:
+        content_type = headers.get('Content-Type', '')
         if not content_type.startswith('application/json'):
-            return make_response(
-                {'error': 'Invalid Content-Type. Must be application/json'},
-                415
-            )
+            return {'error': 'Invalid Content-Type. Must be application/json'}, 415
     
     # Required headers check
     required_headers = ['X-Request-ID']
-    missing_headers = [h for h in required_headers if h not in request.headers]
+    missing_headers = [h for h in required_headers if h not in headers]
     if missing_headers:
-        return make_response(
-            {'error': f'Missing required headers: {", ".join(missing_headers)}'},
-            400
-        )
+        return {'error': f'Missing required headers: {", ".join(missing_headers)}'}, 400
     
     return None
 
+def validate_request_headers(request: Request) -> Optional[Response]:
+    """Validate request headers for security requirements.
+    
+    Checks for required security headers and content type validation
+    for POST/PUT requests.
+    
+    Args:
+        request: Flask Request object to validate
+        
+    Returns:
+        Optional[Response]: Error response if validation fails, None if successful
+    """
+    error = check_request_headers(request.method, request.headers)
+    if error:
+        return make_response(*error)
+    return None
+
 def validate_json_schema(request: Request, schema: Dict[str, Any]) -> Optional[Response]:
     """Validate JSON request body against a schema.
     
@@ -202,18 +223,24 @@ def setup_cors(request: Request) -> Response:
     Returns:
         Response: Response with CORS headers
     """
-    origin = request.headers.get('Origin')
-    if not origin:
-        return make_response()
-    
     response = make_response()
+    response.headers.update(cors_headers(request.headers.get('Origin')))
+    return response
+
+def cors_headers(origin: Optional[str]) -> Dict[str, str]:
+    """Return the CORS headers for a request origin.
     
-    if origin in ALLOWED_ORIGINS:
-        response.headers.update({
-            'Access-Control-Allow-Origin': origin,
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Request-ID',
-            'Access-Control-Max-Age': '3600'
-        })
-    
-    return response 
\ No newline at end of file
+    Args:
+        origin: Value of the Origin request header
+        
+    Returns:
+        Dict[str, str]: CORS headers, empty if the origin is not allowed
+    """
+    if not origin or origin not in ALLOWED_ORIGINS:
+        return {}
+    return {
+        'Access-Control-Allow-Origin': origin,
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Request-ID',
+        'Access-Control-Max-Age': '3600'
+    } 
\ No newline at end of file
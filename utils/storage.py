@@ -1,12 +1,15 @@
 import logging
 from google.cloud import storage
-from typing import Optional
+from typing import Optional, Union
 import os
 import requests
 from urllib.parse import urlparse
 import tempfile
 import subprocess
 
+from utils import circuit_breaker
+from utils.upload_spool import open_buffer
+
 logger = logging.getLogger(__name__)
 
 class StorageClient:
@@ -83,7 +86,7 @@ class StorageClient:
             # Download the blob
             bucket = self.storage_client.bucket(bucket_name)
             blob = bucket.blob(blob_name)
-            content = blob.download_as_text()
+            content = circuit_breaker.call_with_breaker(circuit_breaker.GCS, blob.download_as_text)
             
             logger.info(f"Successfully downloaded file from {gcs_uri}")
             return content
@@ -92,12 +95,13 @@ class StorageClient:
             logger.error(f"Error downloading file from GCS: {e}")
             return None
 
-    def save_bytes_to_gcs(self, file_bytes: bytes, gcs_path: str, content_type: Optional[str] = None) -> Optional[str]:
+    def save_bytes_to_gcs(self, file_bytes: Union[bytes, memoryview], gcs_path: str, content_type: Optional[str] = None) -> Optional[str]:
         """
         Upload raw file bytes to GCS.
 
         Args:
-            file_bytes: The bytes of the file to upload.
+            file_bytes: The bytes of the file to upload. A memoryview (e.g. of a
+                spooled upload) is streamed from its buffer rather than copied.
             gcs_path: The full path within the GCS bucket (e.g., 'uploads/user123/cv.pdf').
             content_type: The MIME type of the file (e.g., 'application/pdf').
 
@@ -106,7 +110,10 @@ class StorageClient:
         """
         try:
             blob = self.bucket.blob(gcs_path)
-            blob.upload_from_string(file_bytes, content_type=content_type)
+            if isinstance(file_bytes, bytes):
+                blob.upload_from_string(file_bytes, content_type=content_type)
+            else:
+                blob.upload_from_file(open_buffer(file_bytes), size=file_bytes.nbytes, content_type=content_type)
             gcs_uri = f"gs://{self.bucket_name}/{gcs_path}"
             logger.info(f"Successfully uploaded bytes to {gcs_uri}")
             return gcs_uri
@@ -126,11 +133,11 @@ class StorageClient:
         """
         try:
             blob = self.bucket.blob(path)
-            return blob.download_as_text()
+            return circuit_breaker.call_with_breaker(circuit_breaker.GCS, blob.download_as_text)
         except Exception as e:
             logger.error(f"Error reading file {path}: {str(e)}")
             return None
-    
+
     def write_file(self, path: str, content: str) -> bool:
         """
         Write content to a file in GCS.
@@ -0,0 +1,211 @@
+"""Precompiled per-task prompt bundles.
+
+A TaskBundle holds everything a task needs to build a model request: the
+prompts, few-shot examples, parsed JSON schema, Pydantic response model and a
+precompiled user prompt template. Bundles are built once per task (and again
+only when the underlying resources change) so request handling never
+re-parses schemas or re-runs the schema consistency check.
+"""
+
+import hashlib
+import json
+import logging
+import string
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from models.schemas import BaseResponseSchema
+
+logger = logging.getLogger(__name__)
+
+_FORMATTER = string.Formatter()
+
+
+@dataclass(frozen=True)
+class _Field:
+    """A replacement field left to be filled at render time."""
+    name: str
+    conversion: Optional[str]
+    format_spec: str
+
+
+class PromptTemplate:
+    """A str.format-style template parsed once and rendered many times.
+
+    Static fields (such as few-shot examples) are substituted at compile time,
+    so their content is never re-scanned for braces when the per-request
+    fields are rendered.
+    """
+
+    def __init__(self, template: str, static_values: Optional[Dict[str, Any]] = None):
+        """
+        Compile the template.
+
+        Args:
+            template: Template text using str.format replacement fields
+            static_values: Field values known at compile time
+
+        Raises:
+            ValueError: If the template is malformed
+        """
+        static_values = static_values or {}
+        segments: List[Any] = []
+        literal: List[str] = []
+        for text, name, format_spec, conversion in _FORMATTER.parse(template):
+            literal.append(text)
+            if name is None:
+                continue
+            if name in static_values:
+                value = _FORMATTER.convert_field(static_values[name], conversion)
+                literal.append(_FORMATTER.format_field(value, format_spec or ""))
+                continue
+            segments.append("".join(literal))
+            literal = []
+            segments.append(_Field(name, conversion, format_spec or ""))
+        segments.append("".join(literal))
+        self._segments: Tuple[Any, ...] = tuple(segments)
+        self.fields = tuple(s.name for s in self._segments if isinstance(s, _Field))
+
+    def render(self, **values: Any) -> str:
+        """
+        Render the template with the per-request field values.
+
+        Args:
+            **values: Values for the remaining replacement fields
+
+        Returns:
+            The rendered prompt
+
+        Raises:
+            KeyError: If a replacement field has no value, as with str.format
+        """
+        parts = []
+        for segment in self._segments:
+            if isinstance(segment, _Field):
+                value, _ = _FORMATTER.get_field(segment.name, (), values)
+                value = _FORMATTER.convert_field(value, segment.conversion)
+                parts.append(_FORMATTER.format_field(value, segment.format_spec))
+            else:
+                parts.append(segment)
+        return "".join(parts)
+
+
+@dataclass(frozen=True)
+class TaskBundle:
+    """Immutable set of resources for one task. Treat schema_dict as read-only."""
+    task: str
+    system_prompt: str
+    user_prompt: str
+    few_shot_examples: str
+    schema_dict: Optional[Dict[str, Any]]
+    schema_model: Type[BaseResponseSchema]
+    prompt_template: PromptTemplate
+    schema_warnings: Tuple[str, ...] = ()
+    version: str = ""
+    # User prompt with the few-shot examples left out, for when the examples
+    # are sent separately as (cached) context
+    prompt_template_without_examples: Optional[PromptTemplate] = None
+    # Raw resource strings the bundle was built from, used to detect changes
+    sources: Tuple[Optional[str], ...] = field(default=(), repr=False, compare=False)
+
+
+def check_schema_consistency(
+    task: str,
+    schema_dict: Dict[str, Any],
+    schema_model: Type[BaseResponseSchema]
+) -> List[str]:
+    """
+    Compare a task's JSON schema file with its Pydantic response model.
+
+    Args:
+        task: Task identifier (parsing, ps, cs, etc.)
+        schema_dict: Parsed JSON schema file
+        schema_model: Pydantic response model for the task
+
+    Returns:
+        List of human-readable inconsistencies (empty if consistent)
+    """
+    warnings = []
+    pydantic_schema = schema_model.model_json_schema()
+
+    # Validate schema structure
+    required_fields = ['properties', 'required', 'type', '$defs']
+    missing_fields = [f for f in required_fields if f not in schema_dict and f in pydantic_schema]
+    if missing_fields:
+        warnings.append(f"Schema file for task '{task}' is missing fields: {', '.join(missing_fields)}")
+
+    # Validate property consistency
+    if 'properties' in schema_dict and 'properties' in pydantic_schema:
+        file_props = set(schema_dict['properties'].keys())
+        model_props = set(pydantic_schema['properties'].keys())
+        missing_in_file = model_props - file_props
+        if missing_in_file:
+            warnings.append(f"Schema file for task '{task}' is missing properties: {', '.join(sorted(missing_in_file))}")
+
+    return warnings
+
+
+def build_task_bundle(
+    task: str,
+    system_prompt: str,
+    user_prompt: str,
+    few_shot_examples: Optional[str],
+    schema_json: Optional[str],
+    schema_model: Type[BaseResponseSchema]
+) -> TaskBundle:
+    """
+    Build and validate a TaskBundle from raw resources.
+
+    The schema consistency check runs here, once per bundle, and its result is
+    kept on the bundle and logged.
+
+    Args:
+        task: Task identifier (parsing, ps, cs, etc.)
+        system_prompt: System prompt text
+        user_prompt: User prompt template text
+        few_shot_examples: Few-shot examples text
+        schema_json: JSON schema file contents
+        schema_model: Pydantic response model for the task
+
+    Returns:
+        TaskBundle: The compiled bundle
+    """
+    schema_dict = None
+    schema_warnings: List[str] = []
+    try:
+        if schema_json:
+            schema_dict = json.loads(schema_json)
+            schema_warnings = check_schema_consistency(task, schema_dict, schema_model)
+    except Exception as e:
+        schema_warnings = [f"Error validating schema for task '{task}': {str(e)}"]
+    for warning in schema_warnings:
+        logger.warning(warning)
+
+    prompt_template = PromptTemplate(
+        user_prompt,
+        static_values={"few_shot_examples": few_shot_examples or ""}
+    )
+
+    prompt_template_without_examples = PromptTemplate(
+        user_prompt,
+        static_values={"few_shot_examples": ""}
+    )
+
+    digest = hashlib.sha256()
+    for part in (task, system_prompt, user_prompt, few_shot_examples, schema_json):
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+
+    return TaskBundle(
+        task=task,
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        few_shot_examples=few_shot_examples or "",
+        schema_dict=schema_dict,
+        schema_model=schema_model,
+        prompt_template=prompt_template,
+        schema_warnings=tuple(schema_warnings),
+        version=digest.hexdigest()[:16],
+        prompt_template_without_examples=prompt_template_without_examples,
+        sources=(system_prompt, user_prompt, few_shot_examples, schema_json)
+    )
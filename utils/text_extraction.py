@@ -0,0 +1,482 @@
+"""Pure text extraction functions for PDF and DOCX bytes.
+
+These functions hold no client state and import only the parsing libraries
+and utils.upload_spool, so extraction pool workers can run them without
+loading the Google Cloud clients. Errors propagate to the caller.
+
+The format of a document is detected from its leading bytes rather than a
+declared content type, so each document is parsed once by the right parser.
+Documents may be bytes or a memoryview of a spooled upload (see
+utils.upload_spool); neither is copied to be parsed.
+
+PDF text comes from one of several backends (see PDF_BACKENDS). pypdf is
+pure Python and always available; pymupdf (MuPDF) is native, much faster,
+and keeps the text of each layout block together, so columns in designed
+CVs are not interleaved. It is optional: if it is not installed or fails on
+a document, pypdf is used instead.
+
+Extraction can be bounded by ExtractionLimits. Pages and paragraphs are read
+lazily and reading stops as soon as a page, character or time budget runs
+out; the result then covers a prefix of the document and records which
+limit truncated it.
+
+DOCX text is streamed from word/document.xml inside the archive with an
+incremental XML parser, without building python-docx's object tree. Body
+paragraphs and table rows are emitted in document order; each row becomes
+one line with its cells separated by " | ".
+"""
+
+import logging
+import threading
+import time
+import zipfile
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from xml.etree import ElementTree
+
+from pypdf import PdfReader
+
+from utils.upload_spool import open_buffer
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+logger = logging.getLogger(__name__)
+
+PDF_CONTENT_TYPE = 'application/pdf'
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+_PDF_SIGNATURE = b'%PDF-'
+# PDF readers accept a header preceded by junk within the first KiB
+_PDF_HEADER_WINDOW = 1024
+_ZIP_SIGNATURE = b'PK\x03\x04'
+_DOCX_DOCUMENT_PART = 'word/document.xml'
+_DOCX_PARTS = {'[Content_Types].xml', _DOCX_DOCUMENT_PART}
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+# Run content that python-docx's Paragraph.text renders as characters
+_DOCX_RUN_CHARS = {f'{_W}tab': '\t', f'{_W}br': '\n', f'{_W}cr': '\n', f'{_W}noBreakHyphen': '-'}
+_DOCX_CELL_SEPARATOR = ' | '
+
+PYPDF_BACKEND = 'pypdf'
+PYMUPDF_BACKEND = 'pymupdf'
+
+# MuPDF must not be called from several threads at once, and inline
+# extractions run on request threads
+_pymupdf_lock = threading.Lock()
+
+# Values of ExtractedText.truncated_by
+TRUNCATED_BY_PAGES = 'max_pages'
+TRUNCATED_BY_CHARS = 'max_chars'
+TRUNCATED_BY_TIME = 'max_seconds'
+
+
+@dataclass(frozen=True)
+class ExtractionLimits:
+    """Budget for extracting one document; a limit of 0 is not enforced.
+
+    max_pages only applies to PDFs. Text beyond max_chars is cut off.
+    """
+    max_pages: int = 0
+    max_chars: int = 0
+    max_seconds: float = 0.0
+
+    def deadline(self) -> Optional[float]:
+        """Return the time.monotonic() value at which extraction must stop, if any."""
+        return time.monotonic() + self.max_seconds if self.max_seconds > 0 else None
+
+    def cache_tag(self) -> str:
+        """Describe the limits that decide the extracted text, for cache keys."""
+        if not (self.max_pages or self.max_chars):
+            return ""
+        return f"{self.max_pages}p{self.max_chars}c"
+
+
+@dataclass(frozen=True)
+class ExtractedText:
+    """Text extracted from a document and how much of the document it covers."""
+    text: str
+    # Limit that stopped extraction before the end of the document, if any
+    truncated_by: Optional[str] = None
+    # Pages read and pages in the document (PDF only)
+    pages_extracted: Optional[int] = None
+    total_pages: Optional[int] = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.truncated_by is not None
+
+    def metadata(self) -> Dict[str, Any]:
+        """Return the truncation details reported to API clients."""
+        metadata: Dict[str, Any] = {"truncated_by": self.truncated_by, "chars": len(self.text)}
+        if self.total_pages is not None:
+            metadata["pages_extracted"] = self.pages_extracted
+            metadata["total_pages"] = self.total_pages
+        return metadata
+
+
+def sniff_content_type(file_content: bytes) -> Optional[str]:
+    """
+    Detect the format of a document from its content.
+
+    DOCX files are ZIP archives whose central directory lists
+    [Content_Types].xml and word/document.xml; only the directory is read,
+    not the parts. Other content is a PDF if the %PDF- header appears in its
+    first bytes. ZIPs are checked first since a stored part or file name may
+    contain %PDF- near the start of the archive.
+
+    Args:
+        file_content: Document content
+
+    Returns:
+        PDF_CONTENT_TYPE, DOCX_CONTENT_TYPE, or None if the format is not recognised
+    """
+    if file_content[:len(_ZIP_SIGNATURE)] == _ZIP_SIGNATURE:
+        try:
+            with zipfile.ZipFile(open_buffer(file_content)) as archive:
+                names = set(archive.namelist())
+        except zipfile.BadZipFile:
+            return None
+        return DOCX_CONTENT_TYPE if _DOCX_PARTS <= names else None
+    if _PDF_SIGNATURE in bytes(file_content[:_PDF_HEADER_WINDOW]):
+        return PDF_CONTENT_TYPE
+    return None
+
+
+def _pypdf_pages(
+    file_content: bytes,
+    start: int = 0,
+    stop: Optional[int] = None,
+    on_open: Optional[Callable[[int], None]] = None
+) -> Iterator[str]:
+    """Yield the text of pages [start, stop) with pypdf, one page at a time."""
+    pdf_reader = PdfReader(open_buffer(file_content))
+    if on_open is not None:
+        on_open(len(pdf_reader.pages))
+    for page in pdf_reader.pages[start:stop]:
+        yield page.extract_text().strip()
+
+
+def _pymupdf_pages(
+    file_content: bytes,
+    start: int = 0,
+    stop: Optional[int] = None,
+    on_open: Optional[Callable[[int], None]] = None
+) -> Iterator[str]:
+    """Yield the text of pages [start, stop) with MuPDF, block by block."""
+    with _pymupdf_lock:
+        with pymupdf.open(stream=file_content, filetype="pdf") as document:
+            if on_open is not None:
+                on_open(document.page_count)
+            for page in document.pages(start, stop):
+                yield page.get_text().strip()
+
+
+# Each backend lazily yields the stripped text of a range of pages, and passes
+# the document's page count to on_open once it has opened the document
+PDF_BACKENDS: Dict[str, Callable[..., Iterator[str]]] = {
+    PYPDF_BACKEND: _pypdf_pages,
+    PYMUPDF_BACKEND: _pymupdf_pages
+}
+
+
+def resolve_pdf_backend(name: str) -> str:
+    """
+    Return the PDF backend to use for a requested backend name.
+    
+    Args:
+        name: Key of PDF_BACKENDS
+        
+    Returns:
+        name, or PYPDF_BACKEND if the requested backend is not installed
+        
+    Raises:
+        ValueError: If name is not a known backend
+    """
+    if name not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {name}")
+    if name == PYMUPDF_BACKEND and pymupdf is None:
+        logger.warning("pymupdf is not installed, extracting PDF text with pypdf")
+        return PYPDF_BACKEND
+    return name
+
+
+def count_pdf_pages(file_content: bytes) -> int:
+    """
+    Count the pages of a PDF without extracting any text.
+    
+    Args:
+        file_content: PDF file content as bytes
+        
+    Returns:
+        Number of pages, or 0 if the document cannot be opened
+    """
+    try:
+        if pymupdf is not None:
+            with _pymupdf_lock:
+                with pymupdf.open(stream=file_content, filetype="pdf") as document:
+                    return document.page_count
+        return len(PdfReader(open_buffer(file_content)).pages)
+    except Exception:
+        return 0
+
+
+def split_pages(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Split pages into at most parts contiguous [start, stop) ranges of near-equal size.
+    
+    Args:
+        page_count: Number of pages
+        parts: Maximum number of ranges
+        
+    Returns:
+        Ranges in page order
+    """
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for part in range(parts):
+        stop = start + size + (1 if part < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def join_pages(pages: Iterable[str]) -> str:
+    """Join the non-empty page texts with newlines."""
+    return "\n".join(text for text in pages if text)
+
+
+def _read_parts(
+    parts: Iterator[str],
+    limits: ExtractionLimits,
+    deadline: Optional[float]
+) -> Tuple[List[str], Optional[str]]:
+    """
+    Read page or paragraph texts until they run out or a budget is spent.
+    
+    Args:
+        parts: Lazily extracted texts; closed when reading stops
+        limits: Character budget
+        deadline: time.monotonic() value after which no further part is read
+        
+    Returns:
+        Tuple of (texts read, TRUNCATED_BY_CHARS or TRUNCATED_BY_TIME if
+        reading stopped early, else None)
+    """
+    texts: List[str] = []
+    chars = 0
+    with closing(parts):
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                return texts, TRUNCATED_BY_TIME
+            text = next(parts, None)
+            if text is None:
+                return texts, None
+            texts.append(text)
+            if text:
+                chars += len(text) + (1 if chars else 0)
+            if limits.max_chars and chars > limits.max_chars:
+                return texts, TRUNCATED_BY_CHARS
+
+
+def _join_within(texts: List[str], truncated_by: Optional[str], limits: ExtractionLimits) -> Tuple[str, Optional[str]]:
+    """Join texts and cut the result to the character budget."""
+    text = join_pages(texts)
+    if limits.max_chars and len(text) > limits.max_chars:
+        return text[:limits.max_chars], truncated_by or TRUNCATED_BY_CHARS
+    return text, truncated_by
+
+
+def extract_pdf_document(
+    file_content: bytes,
+    start: int = 0,
+    stop: Optional[int] = None,
+    backend: str = PYPDF_BACKEND,
+    limits: Optional[ExtractionLimits] = None,
+    deadline: Optional[float] = None,
+    total_pages: Optional[int] = None
+) -> ExtractedText:
+    """
+    Extract text from a range of pages of a PDF within extraction limits.
+    
+    Args:
+        file_content: PDF file content as bytes
+        start: First page
+        stop: Page after the last one, or None for the end of the document
+        backend: Key of PDF_BACKENDS; pypdf is used if this backend fails
+        limits: Page and character budget (unlimited by default)
+        deadline: time.monotonic() value after which no further page is read
+        total_pages: Page count of the document, if already known; otherwise
+            the backend reports it when it opens the document
+        
+    Returns:
+        ExtractedText for the pages read; pages_extracted counts pages in the range
+    """
+    limits = limits or ExtractionLimits()
+    page_limited = bool(limits.max_pages) and (stop is None or stop > limits.max_pages)
+    end = limits.max_pages if page_limited else stop
+
+    # Backends stop at the end of the document, so the range needs no page count
+    page_counts: List[int] = []
+    pages = None
+    if backend != PYPDF_BACKEND:
+        try:
+            pages, stopped_by = _read_parts(
+                PDF_BACKENDS[backend](file_content, start, end, page_counts.append), limits, deadline
+            )
+        except Exception as e:
+            logger.warning(f"{backend} could not extract PDF text, falling back to pypdf: {e}")
+    if pages is None:
+        pages, stopped_by = _read_parts(_pypdf_pages(file_content, start, end, page_counts.append), limits, deadline)
+    total_pages = total_pages or (page_counts[-1] if page_counts else 0) or None
+
+    truncated_by = None
+    if page_limited and total_pages is not None and total_pages > limits.max_pages:
+        truncated_by = TRUNCATED_BY_PAGES
+    last_page = min((page for page in (end, total_pages) if page is not None), default=None)
+    if stopped_by == TRUNCATED_BY_TIME and last_page is not None and start + len(pages) >= last_page:
+        # The deadline passed after the last page
+        stopped_by = None
+
+    text, truncated_by = _join_within(pages, stopped_by or truncated_by, limits)
+    return ExtractedText(text, truncated_by, pages_extracted=len(pages), total_pages=total_pages)
+
+
+def merge_extractions(parts: List[ExtractedText], limits: Optional[ExtractionLimits] = None) -> ExtractedText:
+    """
+    Combine the extractions of consecutive page ranges of one PDF.
+    
+    Ranges after the first truncated one are dropped, so the result is
+    always a prefix of the document.
+    
+    Args:
+        parts: ExtractedText of each range, in page order
+        limits: Limits the ranges were extracted with
+        
+    Returns:
+        ExtractedText for the whole document
+    """
+    limits = limits or ExtractionLimits()
+    texts: List[str] = []
+    pages_extracted = 0
+    truncated_by = None
+    for part in parts:
+        texts.append(part.text)
+        pages_extracted += part.pages_extracted or 0
+        if part.truncated_by in (TRUNCATED_BY_CHARS, TRUNCATED_BY_TIME):
+            truncated_by = part.truncated_by
+            break
+    total_pages = parts[0].total_pages if parts else None
+    if truncated_by is None and limits.max_pages and (total_pages or 0) > limits.max_pages:
+        truncated_by = TRUNCATED_BY_PAGES
+    text, truncated_by = _join_within(texts, truncated_by, limits)
+    return ExtractedText(text, truncated_by, pages_extracted=pages_extracted, total_pages=total_pages)
+
+
+def extract_pdf_text(file_content: bytes, backend: str = PYPDF_BACKEND) -> str:
+    """
+    Extract text from a PDF.
+    
+    Args:
+        file_content: PDF file content as bytes
+        backend: Key of PDF_BACKENDS; pypdf is used if this backend fails
+        
+    Returns:
+        Text of the non-empty pages, joined with newlines
+    """
+    return extract_pdf_document(file_content, backend=backend).text
+
+
+def _docx_blocks(file_content: bytes) -> Iterator[str]:
+    """
+    Yield the non-empty paragraphs and table rows of a DOCX, in document order.
+
+    word/document.xml is decompressed and parsed incrementally, and every
+    block is discarded once its text is yielded, so memory stays flat
+    however long the document is and stopping early stops decompressing.
+    Paragraphs in a table cell are joined with spaces and the cells of a row
+    with _DOCX_CELL_SEPARATOR; nested tables flow into the enclosing cell.
+    Paragraphs inside a paragraph (text boxes) are yielded before it.
+    """
+    with zipfile.ZipFile(open_buffer(file_content)) as archive, archive.open(_DOCX_DOCUMENT_PART) as part:
+        paragraphs: List[List[str]] = []
+        cells: List[List[str]] = []
+        rows: List[List[str]] = []
+        body: Optional[ElementTree.Element] = None
+        for event, element in ElementTree.iterparse(part, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if tag == f'{_W}body':
+                    body = element
+                elif tag == f'{_W}p':
+                    paragraphs.append([])
+                elif tag == f'{_W}tc':
+                    cells.append([])
+                elif tag == f'{_W}tr':
+                    rows.append([])
+                continue
+
+            if tag == f'{_W}t':
+                if paragraphs and element.text:
+                    paragraphs[-1].append(element.text)
+            elif tag in _DOCX_RUN_CHARS:
+                if paragraphs:
+                    paragraphs[-1].append(_DOCX_RUN_CHARS[tag])
+            elif tag in (f'{_W}p', f'{_W}tr'):
+                if tag == f'{_W}p':
+                    text = ''.join(paragraphs.pop()).strip()
+                else:
+                    text = _DOCX_CELL_SEPARATOR.join(rows.pop())
+                element.clear()
+                if cells:
+                    if text:
+                        cells[-1].append(text)
+                    continue
+                if text:
+                    yield text
+                if body is not None:
+                    # The parser keeps finished blocks attached to the body
+                    body.clear()
+            elif tag == f'{_W}tc':
+                text = ' '.join(cells.pop())
+                if text and rows:
+                    rows[-1].append(text)
+
+
+def extract_docx_document(
+    file_content: bytes,
+    limits: Optional[ExtractionLimits] = None,
+    deadline: Optional[float] = None
+) -> ExtractedText:
+    """
+    Extract paragraph and table text from a DOCX file within extraction limits.
+    
+    Args:
+        file_content: DOCX file content as bytes
+        limits: Character budget (unlimited by default); max_pages does not apply
+        deadline: time.monotonic() value after which no further paragraph is read
+        
+    Returns:
+        ExtractedText of the non-empty paragraphs and table rows read
+    """
+    limits = limits or ExtractionLimits()
+    blocks, stopped_by = _read_parts(_docx_blocks(file_content), limits, deadline)
+    return ExtractedText(*_join_within(blocks, stopped_by, limits))
+
+
+def extract_docx_text(file_content: bytes) -> str:
+    """
+    Extract paragraph and table text from a DOCX file.
+    
+    Args:
+        file_content: DOCX file content as bytes
+        
+    Returns:
+        Text of the non-empty paragraphs and table rows, joined with newlines
+    """
+    return extract_docx_document(file_content).text
@@ -0,0 +1,242 @@
+"""Spooling of uploaded documents into one read-only buffer.
+
+Uploads used to be read into a bytes object, a full copy of what the web
+framework had already buffered. spool_upload reads an upload once instead:
+uploads up to max_memory_bytes are kept in memory, larger ones are written
+to a file in config.UPLOAD_SPOOL_DIR (tmpfs by default) and memory-mapped.
+Either way the document is handed on as a read-only memoryview that
+hashing, format sniffing, extraction and GCS uploads read without copying.
+A document spooled to a file reaches extraction pool workers as its path
+(see to_worker_payload), so it is not copied through a pipe either.
+"""
+
+import io
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Size of the reads used to copy an upload into its spool file
+_COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class _SpoolMap(mmap.mmap):
+    """Read-only mapping of a spool file that remembers the file's path."""
+    path: str
+
+
+class SpooledUpload:
+    """An uploaded document held in memory or in a memory-mapped spool file."""
+
+    def __init__(self, view: memoryview, mapped: Optional[_SpoolMap] = None):
+        """
+        Wrap a spooled document; use spool_upload to create one.
+
+        Args:
+            view: Read-only view of the document
+            mapped: Mapping of the spool file the view points into, if any
+        """
+        self.view = view
+        self._mapped = mapped
+
+    @property
+    def path(self) -> Optional[str]:
+        """Path of the spool file, or None for uploads kept in memory."""
+        return self._mapped.path if self._mapped is not None else None
+
+    def __len__(self) -> int:
+        return self.view.nbytes
+
+    def close(self) -> None:
+        """Release the buffer and delete the spool file, if any."""
+        mapped, self._mapped = self._mapped, None
+        _release(self.view, mapped)
+        if mapped is not None:
+            try:
+                os.unlink(mapped.path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def spool_upload(
+    stream: BinaryIO,
+    max_memory_bytes: Optional[int] = None,
+    spool_dir: Optional[str] = None
+) -> SpooledUpload:
+    """
+    Spool an upload stream into a single read-only buffer.
+
+    An io.BytesIO that the framework already filled, on its own or inside a
+    tempfile.SpooledTemporaryFile, is used as is. Other
+    streams are read up to max_memory_bytes into memory; if there is more,
+    the upload is copied in chunks to a spool file that is then mapped, and
+    stream is closed so that the framework's copy is freed.
+
+    Args:
+        stream: Upload stream positioned at the start of the document
+        max_memory_bytes: Largest upload kept in memory (default config.UPLOAD_SPOOL_MAX_MEMORY_BYTES)
+        spool_dir: Directory of spool files (default config.UPLOAD_SPOOL_DIR)
+
+    Returns:
+        SpooledUpload that must be closed once the document has been processed
+    """
+    if max_memory_bytes is None:
+        max_memory_bytes = config.UPLOAD_SPOOL_MAX_MEMORY_BYTES
+    if spool_dir is None:
+        spool_dir = config.UPLOAD_SPOOL_DIR
+
+    if isinstance(stream, tempfile.SpooledTemporaryFile):
+        # Werkzeug and Starlette buffer uploads in one; read the BytesIO or
+        # temp file inside it rather than through the wrapper
+        stream = stream._file
+    if isinstance(stream, io.BytesIO) and stream.getbuffer().nbytes <= max_memory_bytes:
+        return SpooledUpload(stream.getbuffer().toreadonly())
+
+    head = stream.read(max_memory_bytes + 1)
+    if len(head) <= max_memory_bytes:
+        return SpooledUpload(memoryview(head))
+
+    fd, path = tempfile.mkstemp(prefix="upload-", dir=spool_dir or None)
+    try:
+        with open(fd, "wb") as spool_file:
+            spool_file.write(head)
+            del head
+            shutil.copyfileobj(stream, spool_file, _COPY_CHUNK_BYTES)
+        mapped = _map_file(path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    # The framework's own copy (often a temp file in tmpfs) is no longer needed
+    stream.close()
+    return SpooledUpload(memoryview(mapped), mapped)
+
+
+def _release(view: memoryview, mapped: Optional[mmap.mmap]) -> None:
+    """Release a view and unmap the file behind it, unless a parser still holds the buffer."""
+    try:
+        view.release()
+        if mapped is not None:
+            mapped.close()
+    except BufferError:
+        # Still exported; the buffer is freed once the parser's objects are collected
+        logger.debug("Spooled upload is still referenced, leaving it to be released later")
+
+
+def _map_file(path: str) -> _SpoolMap:
+    with open(path, "rb") as spool_file:
+        mapped = _SpoolMap(spool_file.fileno(), 0, access=mmap.ACCESS_READ)
+    mapped.path = path
+    return mapped
+
+
+def spooled_path(file_content: Union[bytes, memoryview]) -> Optional[str]:
+    """Return the spool file a buffer returned by spool_upload points into, if any."""
+    if isinstance(file_content, memoryview) and isinstance(file_content.obj, _SpoolMap):
+        return file_content.obj.path
+    return None
+
+
+class SpoolFileRef:
+    """Picklable reference to a spool file, sent to worker processes instead of its content."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+
+def to_worker_payload(file_content: Union[bytes, memoryview]) -> Union[bytes, SpoolFileRef]:
+    """
+    Convert a document buffer into something that can be sent to a worker process.
+
+    Args:
+        file_content: Document content, e.g. SpooledUpload.view
+
+    Returns:
+        The bytes as they are, a SpoolFileRef for a whole spool file, or a copy of any other buffer
+    """
+    if isinstance(file_content, bytes):
+        return file_content
+    path = spooled_path(file_content)
+    if path is not None and file_content.nbytes == len(file_content.obj):
+        return SpoolFileRef(path)
+    return bytes(file_content)
+
+
+@contextmanager
+def open_worker_payload(payload: Union[bytes, SpoolFileRef]) -> Iterator[Union[bytes, memoryview]]:
+    """Yield the document content of a payload made by to_worker_payload, mapping spool files."""
+    if not isinstance(payload, SpoolFileRef):
+        yield payload
+        return
+    mapped = _map_file(payload.path)
+    view = memoryview(mapped)
+    try:
+        yield view
+    finally:
+        _release(view, mapped)
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable read-only file over a bytes-like object that does not copy it.
+
+    io.BytesIO only shares the memory of a bytes object; any other buffer,
+    such as a memoryview of a spool file, is copied.
+    """
+
+    def __init__(self, buffer: Union[bytes, memoryview]):
+        self._view = memoryview(buffer).cast("B")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        start = min(self._position, len(self._view))
+        count = min(len(buffer), len(self._view) - start)
+        buffer[:count] = self._view[start:start + count]
+        self._position = start + count
+        return count
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def open_buffer(file_content: Union[bytes, memoryview]) -> BinaryIO:
+    """Return a seekable file over document content, without copying it."""
+    if isinstance(file_content, bytes):
+        return io.BytesIO(file_content)
+    return BufferReader(file_content)